@@ -8,6 +8,12 @@
 Factory functions for IoT Hub and Device Provisioning Service.
 """
 
+from threading import Lock
+from msrest.universal_http.requests import default_session_configuration_callback
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3 import PoolManager
+from azext_iot.common.discovery_cache import invalidate_discovery_cache_host
 from azext_iot.common.sas_token_auth import SasTokenAuthentication
 from azext_iot.common.utility import ensure_iotdps_sdk_min_version
 from azext_iot.common.auth import IoTOAuth
@@ -23,6 +29,7 @@ from msrestazure.azure_exceptions import CloudError
 __all__ = [
     "SdkResolver",
     "CloudError",
+    "clear_sdk_cache",
     "iot_hub_service_factory",
     "iot_service_provisioning_factory",
 ]
@@ -68,6 +75,67 @@ def iot_service_provisioning_factory(cli_ctx, *_):
     return iot_service_provisioning_factory(cli_ctx=cli_ctx)
 
 
+SDK_CONNECTION_POOL_SIZE = 32
+
+# Clients are cached per process by (entity, policy, sdk type, device id), along with the
+# credentials they were built with. Every cached client keeps its requests sessions open
+# and sends through the same urllib3 pool manager, so they share one keep-alive connection
+# pool per host while each keeps its own retry policy.
+_sdk_clients = {}
+_sdk_clients_lock = Lock()
+_pool_manager = None
+
+
+def clear_sdk_cache():
+    """Drops all cached SDK clients."""
+    with _sdk_clients_lock:
+        _sdk_clients.clear()
+
+
+def _get_pool_manager() -> PoolManager:
+    global _pool_manager
+    if _pool_manager is None:
+        _pool_manager = PoolManager(
+            num_pools=SDK_CONNECTION_POOL_SIZE, maxsize=SDK_CONNECTION_POOL_SIZE
+        )
+    return _pool_manager
+
+
+class _PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter of a single session, sending through the shared pool manager."""
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _get_pool_manager()
+
+    def close(self):
+        # the shared pool outlives the sessions mounting it
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+
+def _configure_pooled_session(session, global_config, local_config, **kwargs):
+    """msrest session configuration callback mounting an adapter on the shared connection pool."""
+    adapter = session.adapters.get("https://")
+    if not isinstance(adapter, _PooledHTTPAdapter):
+        adapter = _PooledHTTPAdapter()
+        session.mount("https://", adapter)
+    # msrest only applies the retry policy when it creates a session, follow later changes
+    adapter.max_retries = global_config.retry_policy()
+    response_hooks = session.hooks["response"]
+    if _invalidate_unauthorized_target not in response_hooks:
+        response_hooks.append(_invalidate_unauthorized_target)
+    return default_session_configuration_callback(session, global_config, local_config, **kwargs)
+
+
+def _invalidate_unauthorized_target(response, *args, **kwargs):
+    """Response hook dropping discovery cached for a host that rejected our credentials."""
+    if response.status_code == 401:
+        invalidate_discovery_cache_host(urlparse(response.url).hostname)
+
+
 class SdkResolver(object):
     def __init__(self, target, device_id=None, auth_override=None):
         self.target = target
@@ -80,13 +148,47 @@ class SdkResolver(object):
         if self.device_id:  # IoT Hub base endpoint stays the same
             self.sas_uri = "{}/devices/{}".format(self.sas_uri, self.device_id)
 
-    def get_sdk(self, sdk_type):
+    def get_sdk(self, sdk_type, retries=None):
+        # clients with explicit credentials are never shared
+        if self.auth_override:
+            return self._build_sdk(sdk_type)
+
+        # neither are clients with custom retries, the retries would apply to every later request
+        if retries is not None:
+            sdk_client = self._build_pooled_sdk(sdk_type)
+            sdk_client.config.retry_policy.retries = retries
+            return sdk_client
+
+        key = (self.target["entity"], self.target["policy"], sdk_type, self.device_id)
+        credentials = self._get_credentials_key()
+        with _sdk_clients_lock:
+            cached = _sdk_clients.get(key)
+            if cached and cached[0] == credentials:
+                return cached[1]
+
+            sdk_client = self._build_pooled_sdk(sdk_type)
+            _sdk_clients[key] = (credentials, sdk_client)
+            return sdk_client
+
+    def _build_pooled_sdk(self, sdk_type):
+        sdk_client = self._build_sdk(sdk_type)
+        sdk_client.config.keep_alive = True
+        sdk_client.config.session_configuration_callback = _configure_pooled_session
+        return sdk_client
+
+    def _build_sdk(self, sdk_type):
         sdk_map = self._construct_sdk_map()
         sdk_client = sdk_map[sdk_type]()
         sdk_client.config.enable_http_logger = True
         sdk_client.config.add_user_agent(USER_AGENT)
         return sdk_client
 
+    def _get_credentials_key(self) -> tuple:
+        # AAD credentials are resolved through the command context
+        if self.target["policy"] == AuthenticationTypeDataplane.login.value:
+            return (self.target.get("cmd"),)
+        return (self.target.get("primarykey"),)
+
     def _construct_sdk_map(self):
         return {
             SdkType.service_sdk: self._get_iothub_service_sdk,  # Don't need to call here
@@ -68,6 +68,45 @@ helps[
     - name: Receive all messages and parse message payload as JSON
       text: >
         az iot hub monitor-events -n {iothub_name} --content-type application/json
+    - name: Resume monitoring from the last event seen by a previous run using the same checkpoint directory
+      text: >
+        az iot hub monitor-events -n {iothub_name} --cg {consumer_group_name} --checkpoint-dir ./checkpoints --timeout 0
+    - name: Receive messages in batches of up to 500 per partition on a busy hub
+      text: >
+        az iot hub monitor-events -n {iothub_name} --prefetch 1000 --batch-size 500
+    - name: Parse events on 4 worker threads so that large payloads do not hold up other partitions
+      text: >
+        az iot hub monitor-events -n {iothub_name} --parse-workers 4
+    - name: Monitor a hub with many partitions using 4 worker processes
+      text: >
+        az iot hub monitor-events -n {iothub_name} --workers 4 --batch-size 100 --timeout 0
+    - name: Report throughput and latency per partition and device as JSON every 30 seconds
+      text: >
+        az iot hub monitor-events -n {iothub_name} --stats json --stats-interval 30 --timeout 0
+    - name: Record the raw messages received to a file, for offline replay and benchmarking
+      text: >
+        az iot hub monitor-events -n {iothub_name} --record messages.rec
+    - name: Monitor around the clock, reconnecting up to 10 times in a row after losing the connection
+      text: >
+        az iot hub monitor-events -n {iothub_name} --timeout 0 --max-reconnects 10 --stats text
+    - name: Output per device rollups of numeric telemetry fields every minute instead of every event
+      text: >
+        az iot hub monitor-events -n {iothub_name} --aggregate 60 --timeout 0
+    - name: Output per device and component rollups every 5 minutes as NDJSON
+      text: >
+        az iot hub monitor-events -n {iothub_name} --aggregate 300 --aggregate-by component --ndjson --timeout 0
+    - name: Output at most 2 events per second from each device, so chatty devices do not drown out the rest
+      text: >
+        az iot hub monitor-events -n {iothub_name} --sample-rate 2 --timeout 0
+    - name: Output one in every 100 events of each device
+      text: >
+        az iot hub monitor-events -n {iothub_name} --sample-every 100
+    - name: Stream events as compact NDJSON to a downstream tool
+      text: >
+        az iot hub monitor-events -n {iothub_name} --ndjson --timeout 0 | jq -c '.event.payload'
+    - name: Write events as NDJSON to a file rotated every 100 MB
+      text: >
+        az iot hub monitor-events -n {iothub_name} --ndjson-file ./events.ndjson --ndjson-max-size 100 --timeout 0
 """
 
 helps[
@@ -92,6 +131,9 @@ helps[
     - name: Exit feedback monitor upon receiving a message with specific id (uuid)
       text: >
         az iot hub monitor-feedback -n {iothub_name} -d {device_id} -w {message_id}
+    - name: Wait up to 10 minutes on the feedback of several messages and report their delivery latency
+      text: >
+        az iot hub monitor-feedback -n {iothub_name} -w {message_id} {message_id} {message_id} --wait-timeout 600
 """
 
 helps[
@@ -302,6 +344,58 @@ helps[
         --auth-type identity --identity {managed_identity_resource_id}
 """
 
+helps[
+    "iot hub device-identity bulk"
+] = """
+    type: group
+    short-summary: Create, update or delete many device identities from a manifest file.
+    long-summary: |
+                  Manifest entries are sent to the IoT Hub bulk registry API in chunks of 100 devices
+                  (the service limit) with several chunks in flight at a time.
+
+                  Manifests can be CSV files with a header row or JSON lines files with one device per line.
+                  Supported keys are deviceId, edgeEnabled, authMethod, primaryKey, secondaryKey,
+                  primaryThumbprint, secondaryThumbprint, status, statusReason, deviceScope and etag.
+"""
+
+helps[
+    "iot hub device-identity bulk create"
+] = """
+    type: command
+    short-summary: Create the device identities listed in a manifest file.
+    examples:
+    - name: Create all devices in a JSON lines manifest and write a per-device result report.
+      text: >
+        az iot hub device-identity bulk create -n {iothub_name} --manifest devices.jsonl --report-file report.jsonl
+    - name: Create all devices in a CSV manifest using 8 concurrent requests.
+      text: >
+        az iot hub device-identity bulk create -n {iothub_name} --manifest devices.csv --workers 8
+"""
+
+helps[
+    "iot hub device-identity bulk update"
+] = """
+    type: command
+    short-summary: Update the device identities listed in a manifest file.
+    long-summary: Entries with an etag are only updated if the etag matches the current identity.
+    examples:
+    - name: Update all devices in a JSON lines manifest.
+      text: >
+        az iot hub device-identity bulk update -n {iothub_name} --manifest devices.jsonl
+"""
+
+helps[
+    "iot hub device-identity bulk delete"
+] = """
+    type: command
+    short-summary: Delete the device identities listed in a manifest file.
+    long-summary: Only deviceId and the optional etag are read from each manifest entry.
+    examples:
+    - name: Delete all devices in a CSV manifest and write a per-device result report.
+      text: >
+        az iot hub device-identity bulk delete -n {iothub_name} --manifest devices.csv --report-file report.jsonl
+"""
+
 helps[
     "iot hub device-identity parent"
 ] = """
@@ -652,6 +746,9 @@ helps[
     - name: Query all module twin data on target device.
       text: >
         az iot hub query -n {iothub_name} -q "select * from devices.modules where devices.deviceId = '{device_id}'"
+    - name: Stream all device twins in an Azure IoT Hub as newline delimited JSON.
+      text: >
+        az iot hub query -n {iothub_name} -q "select * from devices" --top -1 --stream > twins.jsonl
 """
 
 helps[
@@ -390,12 +390,155 @@ def load_arguments(self, _):
             options_list=["--interface", "-i"],
             help="Target interface identifier to filter on. For example: dtmi:com:example:TemperatureController;1",
         )
+        context.argument(
+            "checkpoint_dir",
+            options_list=["--checkpoint-dir", "--cpd"],
+            help="Directory used to persist the last event offset seen per partition. "
+            "When checkpoints exist for the hub and consumer group, monitoring resumes after the "
+            "stored offsets and --enqueued-time is only used for partitions without a checkpoint.",
+        )
+        context.argument(
+            "prefetch",
+            options_list=["--prefetch"],
+            type=int,
+            arg_group="Throughput",
+            help="Link credit (number of messages the service may send ahead) for each partition receiver. "
+            "Defaults to the batch size when --batch-size is set, otherwise the uamqp default.",
+        )
+        context.argument(
+            "batch_size",
+            options_list=["--batch-size"],
+            type=int,
+            arg_group="Throughput",
+            help="Receive and process messages in batches of up to this many messages per partition. "
+            "Must not be greater than --prefetch. Recommended for busy hubs with many partitions.",
+        )
+        context.argument(
+            "parse_workers",
+            options_list=["--parse-workers", "--pw"],
+            type=int,
+            arg_group="Throughput",
+            help="Decode and parse events on this many worker threads instead of on the receive loop. "
+            "Events are still output in order per partition, and a partition stops receiving while "
+            "it has too many events waiting to be parsed.",
+        )
+        context.argument(
+            "workers",
+            options_list=["--workers"],
+            type=int,
+            arg_group="Throughput",
+            help="Shard the hub partitions across this many worker processes, each with its own AMQP "
+            "connection. Events are filtered and parsed in the workers and output by this process, in "
+            "order per partition, with a single set of checkpoints and statistics. "
+            "Cannot be combined with --parse-workers or --record.",
+        )
+        context.argument(
+            "max_reconnects",
+            options_list=["--max-reconnects", "--mr"],
+            type=int,
+            arg_group="Resilience",
+            help="Reconnect a partition receiver that loses its link or connection, up to this many consecutive "
+            "attempts with exponential backoff and jitter, resuming after the last event received. The count "
+            "starts over once a reconnected receiver gets an event. Reconnects and errors per partition are "
+            "included in --stats reports, or written to stderr when the monitor stops. Default: 0 (stop monitoring).",
+        )
+        context.argument(
+            "aggregate",
+            options_list=["--aggregate", "--agg"],
+            type=int,
+            arg_group="Aggregation",
+            help="Instead of every event, output one rollup per device for each tumbling window of this many "
+            "seconds. Each rollup holds the number of events and the count, min, max, mean and last value of "
+            "every numeric field in the JSON payloads, with nested fields named by their dotted path.",
+        )
+        context.argument(
+            "aggregate_by",
+            options_list=["--aggregate-by", "--agb"],
+            nargs="+",
+            arg_type=get_enum_type(["module", "component"]),
+            arg_group="Aggregation",
+            help="Also group rollups by module and/or component, in addition to device.",
+        )
+        context.argument(
+            "sample_every",
+            options_list=["--sample-every", "--se"],
+            type=int,
+            arg_group="Sampling",
+            help="Output only the first of every N events of each device. Suppressed events are dropped before "
+            "their payload is parsed, and counted per device in a report written to stderr every 10 seconds.",
+        )
+        context.argument(
+            "sample_rate",
+            options_list=["--sample-rate", "--sr"],
+            type=float,
+            arg_group="Sampling",
+            help="Output at most this many events per second for each device, allowing bursts of up to one second "
+            "worth of events. Suppressed events are dropped before their payload is parsed, and counted per device "
+            "in a report written to stderr every 10 seconds. Cannot be combined with --sample-every.",
+        )
+        context.argument(
+            "stats",
+            options_list=["--stats"],
+            arg_type=get_enum_type(["text", "json"]),
+            arg_group="Statistics",
+            help="Periodically report messages/sec, bytes/sec and end to end latency (enqueued time to receive "
+            "time) per partition and per device, plus the time spent parsing each event. "
+            "Reports are written to stderr as a summary (text) or as one JSON object per line (json).",
+        )
+        context.argument(
+            "stats_interval",
+            options_list=["--stats-interval", "--si"],
+            type=int,
+            arg_group="Statistics",
+            help="Seconds between statistics reports. Implies --stats text when --stats is not set. Default: 10.",
+        )
+        context.argument(
+            "record",
+            options_list=["--record"],
+            help="Record the raw AMQP body, annotations, properties and application properties of every "
+            "received message to this file. Recordings use a compact binary format specific to this extension, "
+            "read by its replay tooling to reproduce monitor and validation issues offline in tests. "
+            "The format is not a stable export format.",
+        )
+        context.argument(
+            "ndjson",
+            options_list=["--ndjson"],
+            arg_type=get_three_state_flag(),
+            arg_group="NDJSON Output",
+            help="Write events as compact newline delimited JSON through a buffered writer instead of "
+            "pretty printing each event. Events are written in batches and flushed at least once per second. "
+            "Takes precedence over --output for events.",
+        )
+        context.argument(
+            "ndjson_file",
+            options_list=["--ndjson-file", "--nf"],
+            arg_group="NDJSON Output",
+            help="Append NDJSON events to this file instead of stdout. Implies --ndjson.",
+        )
+        context.argument(
+            "ndjson_max_size",
+            options_list=["--ndjson-max-size", "--nms"],
+            type=float,
+            arg_group="NDJSON Output",
+            help="Rotate the --ndjson-file once it would grow past this size in megabytes. "
+            "Up to 5 rotated files are kept as <file>.1 through <file>.5.",
+        )
 
     with self.argument_context("iot hub monitor-feedback") as context:
         context.argument(
             "wait_on_id",
             options_list=["--wait-on-msg", "-w"],
-            help="Feedback monitor will block until a message with specific id (uuid) is received.",
+            nargs="+",
+            help="Feedback monitor will block until a message with specific id (uuid) is received. "
+            "Multiple space-separated message ids may be provided, in which case the monitor blocks until "
+            "feedback for every message is received, then reports delivery status and latency percentiles to stderr.",
+        )
+        context.argument(
+            "wait_timeout",
+            options_list=["--wait-timeout", "--wt"],
+            type=float,
+            help="Stop waiting on the feedback of a message after this many seconds. "
+            "By default the monitor waits until feedback for every message is received.",
         )
 
     with self.argument_context("iot hub device-identity") as context:
@@ -495,6 +638,28 @@ def load_arguments(self, _):
             "Account and Contributor role for the IoT Hub.",
         )
 
+    with self.argument_context("iot hub device-identity bulk") as context:
+        context.argument(
+            "manifest",
+            options_list=["--manifest", "--mf"],
+            help="Path to a device manifest file. Files ending in .csv are read as CSV with a header row, "
+            "otherwise the file is read as JSON lines. Each entry supports the keys deviceId, edgeEnabled, "
+            "authMethod, primaryKey, secondaryKey, primaryThumbprint, secondaryThumbprint, status, "
+            "statusReason, deviceScope and etag.",
+        )
+        context.argument(
+            "report_file",
+            options_list=["--report-file", "--rf"],
+            help="Path of a JSON lines file to write the per-device result report to. "
+            "If omitted, failed devices are included in the command output.",
+        )
+        context.argument(
+            "workers",
+            options_list=["--workers"],
+            type=int,
+            help="Maximum number of bulk registry requests of up to 100 devices to run concurrently.",
+        )
+
     with self.argument_context("iot hub device-identity parent set") as context:
         context.argument(
             "parent_id",
@@ -559,6 +724,13 @@ def load_arguments(self, _):
             type=int,
             help="Maximum number of elements to return. By default query has no cap.",
         )
+        context.argument(
+            "stream",
+            options_list=["--stream"],
+            arg_type=get_three_state_flag(),
+            help="Write results to stdout as newline delimited JSON as each page arrives "
+            "instead of collecting the full result set. Recommended for very large queries.",
+        )
 
     with self.argument_context("iot device") as context:
         context.argument(
@@ -1212,6 +1212,12 @@ def _load_central_monitors_help():
         - name: Receive all messages and parse message payload as JSON
           text: >
             az iot central diagnostics monitor-events --app-id {app_id} --output json
+        - name: Record the raw messages received to a file, for offline replay
+          text: >
+            az iot central diagnostics monitor-events --app-id {app_id} --record messages.rec
+        - name: Monitor around the clock, reconnecting up to 10 times in a row after losing the connection
+          text: >
+            az iot central diagnostics monitor-events --app-id {app_id} --timeout 0 --max-reconnects 10
     """
 
     helps[
@@ -1243,6 +1249,9 @@ def _load_central_monitors_help():
         - name: Filter device and specify an Event Hub consumer group to bind to.
           text: >
             az iot central diagnostics validate-messages --app-id {app_id} -d {device_id} --cg {consumer_group_name}
+        - name: Record the raw messages that were validated, to reproduce the validation issues offline
+          text: >
+            az iot central diagnostics validate-messages --app-id {app_id} --record messages.rec
     """
 
     helps[
@@ -35,6 +35,8 @@ def validate_messages(
     minimum_severity=Severity.warning.name,
     token=None,
     central_dns_suffix=CENTRAL_ENDPOINT,
+    record=None,
+    max_reconnects=None,
 ):
     telemetry_args = TelemetryArguments(
         cmd,
@@ -43,6 +45,8 @@ def validate_messages(
         enqueued_time=enqueued_time,
         repair=repair,
         yes=yes,
+        record=record,
+        max_reconnects=max_reconnects,
     )
     common_parser_args = CommonParserArguments(
         properties=telemetry_args.properties, content_type="application/json"
@@ -84,6 +88,8 @@ def monitor_events(
     yes=False,
     token=None,
     central_dns_suffix=CENTRAL_ENDPOINT,
+    record=None,
+    max_reconnects=None,
 ):
     telemetry_args = TelemetryArguments(
         cmd,
@@ -92,6 +98,8 @@ def monitor_events(
         enqueued_time=enqueued_time,
         repair=repair,
         yes=yes,
+        record=record,
+        max_reconnects=max_reconnects,
     )
     common_parser_args = CommonParserArguments(
         properties=telemetry_args.properties, content_type="application/json"
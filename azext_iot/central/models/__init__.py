@@ -20,6 +20,8 @@ class BaseTemplate(metaclass=ABCMeta):
                 self.component_schema_names = self._extract_schema_names(
                     self.components
                 )
+            self._schema_index = {}
+            self._component_schema_index = self._index_schemas(self.components)
 
         except Exception:
             raise CLIInternalError("Could not parse iot central device template.")
@@ -48,13 +50,18 @@ class BaseTemplate(metaclass=ABCMeta):
             for entity_name, entity_schemas in entity.items()
         }
 
+    def _index_schemas(self, entity: dict) -> dict:
+        # maps each schema name to the (entity name, schema) pairs defining it,
+        # in entity order, so lookups by name do not scan every entity
+        index = {}
+        for entity_name, entity_schemas in entity.items():
+            for schema_name, schema in entity_schemas.items():
+                index.setdefault(schema_name, []).append((entity_name, schema))
+        return index
+
     def _get_interface_list_property(self, property_name) -> list:
         # returns the list of interfaces where property with property_name is defined
-        return [
-            interface
-            for interface, schema in self.schema_names.items()
-            if property_name in schema
-        ]
+        return [interface for interface, _ in self._schema_index.get(property_name, [])]
 
     def _extract_components(self, template: dict) -> dict:
         try:
@@ -22,6 +22,8 @@ class Template(BaseTemplate):
                 self.component_schema_names = self._extract_schema_names(
                     self.components
                 )
+            self._schema_index = self._index_schemas(self.interfaces)
+            self._component_schema_index = self._index_schemas(self.components)
 
         except Exception:
             raise CLIInternalError("Could not parse iot central device template.")
@@ -34,8 +36,8 @@ class Template(BaseTemplate):
             return entry.get(name)
 
         # find first matching name in any component
-        for entry in entities.values():
-            schema = entry.get(name)
+        index = self._component_schema_index if is_component else self._schema_index
+        for _, schema in index.get(name, []):
             if schema:
                 return schema
 
@@ -294,6 +294,23 @@ def load_central_arguments(self, _):
             options_list=["--module-id", "-m"],
             help="The IoT Edge Module ID if the device type is IoT Edge.",
         )
+        context.argument(
+            "record",
+            options_list=["--record"],
+            help="Record the raw AMQP body, annotations, properties and application properties of every "
+            "received message to this file. Recordings use a compact binary format specific to this extension, "
+            "read by its replay tooling to reproduce monitor and validation issues offline in tests. "
+            "The format is not a stable export format.",
+        )
+        context.argument(
+            "max_reconnects",
+            options_list=["--max-reconnects", "--mr"],
+            type=int,
+            help="Reconnect a partition receiver that loses its link or connection, up to this many consecutive "
+            "attempts with exponential backoff and jitter, resuming after the last message received. "
+            "Reconnects and errors per partition are written to stderr when the monitor stops. "
+            "Default: 0 (stop monitoring).",
+        )
 
     with self.argument_context("iot central role") as context:
         context.argument(
@@ -97,6 +97,24 @@ class CentralDeviceTemplateProvider:
             )
         return list(self._device_templates.values())
 
+    def cache_device_templates(
+        self,
+        central_dns_suffix=CENTRAL_ENDPOINT,
+    ) -> List[Union[TemplateV1, TemplateV1_1_preview, TemplatePreview]]:
+        """
+        Lists all device templates and caches them by id, so that subsequent calls
+        to get_device_template are served without a request.
+        """
+        templates = central_services.device_template.list_device_templates(
+            cmd=self._cmd,
+            app_id=self._app_id,
+            token=self._token,
+            central_dns_suffix=central_dns_suffix,
+            api_version=self._api_version,
+        )
+        self._device_templates.update({template.id: template for template in templates})
+        return templates
+
     def map_device_templates(
         self,
         central_dns_suffix=CENTRAL_ENDPOINT,
@@ -55,24 +55,57 @@ class MonitorProvider:
     def start_monitor_events(self, telemetry_args: TelemetryArguments):
         from azext_iot.monitor import telemetry
 
-        telemetry.start_multiple_monitors(
-            targets=self._targets,
-            enqueued_time_utc=telemetry_args.enqueued_time,
-            on_start_string=self._handler.generate_startup_string("Monitoring"),
-            on_message_received=self._handler.parse_message,
-            timeout=telemetry_args.timeout,
-        )
+        recorder = self._build_recorder(telemetry_args)
+        try:
+            telemetry.start_multiple_monitors(
+                targets=self._targets,
+                enqueued_time_utc=telemetry_args.enqueued_time,
+                on_start_string=self._handler.generate_startup_string("Monitoring"),
+                on_message_received=self._handler.parse_message,
+                timeout=telemetry_args.timeout,
+                recorder=recorder,
+                reconnect=self._build_reconnect_policy(telemetry_args),
+            )
+        finally:
+            self._handler.shutdown()
+            if recorder:
+                recorder.close()
 
     def start_validate_messages(self, telemetry_args: TelemetryArguments):
         from azext_iot.monitor import telemetry
 
-        telemetry.start_multiple_monitors(
-            targets=self._targets,
-            enqueued_time_utc=telemetry_args.enqueued_time,
-            on_start_string=self._handler.generate_startup_string("Validating"),
-            on_message_received=self._handler.validate_message,
-            timeout=telemetry_args.timeout,
-        )
+        self._handler.warm_up_template_cache()
+        recorder = self._build_recorder(telemetry_args)
+        try:
+            telemetry.start_multiple_monitors(
+                targets=self._targets,
+                enqueued_time_utc=telemetry_args.enqueued_time,
+                on_start_string=self._handler.generate_startup_string("Validating"),
+                on_message_received=self._handler.validate_message,
+                timeout=telemetry_args.timeout,
+                recorder=recorder,
+                reconnect=self._build_reconnect_policy(telemetry_args),
+            )
+        finally:
+            self._handler.shutdown()
+            if recorder:
+                recorder.close()
+
+    def _build_recorder(self, telemetry_args: TelemetryArguments):
+        if not telemetry_args.record:
+            return None
+
+        from azext_iot.monitor.recording import MessageRecorder
+
+        return MessageRecorder(telemetry_args.record)
+
+    def _build_reconnect_policy(self, telemetry_args: TelemetryArguments):
+        if not telemetry_args.max_reconnects:
+            return None
+
+        from azext_iot.monitor.health import ReconnectPolicy
+
+        return ReconnectPolicy(max_attempts=telemetry_args.max_reconnects)
 
     def _build_targets(
         self,
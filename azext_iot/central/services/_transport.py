@@ -0,0 +1,186 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+# Nothing in this file should be used outside of service/central
+"""
+HTTP transport shared by all IoT Central services.
+
+Requests go through one pooled requests.Session per app host, so paging and provider loops
+reuse their connections, and are retried with backoff while the app answers 429, or 503 for
+idempotent requests.
+AAD tokens for IoT Central are cached in process until shortly before they expire.
+"""
+
+import random
+import requests
+
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from time import sleep, time
+from urllib.parse import urlparse
+from knack.log import get_logger
+from requests.adapters import HTTPAdapter
+from azure.cli.core.util import should_disable_connection_verify
+from azext_iot.common import auth
+
+logger = get_logger(__name__)
+
+CENTRAL_RESOURCE = "https://apps.azureiotcentral.com"
+CENTRAL_CONNECTION_POOL_SIZE = 16
+RETRY_STATUS_CODES = (429, 503)
+# a throttled request was not processed, any other retried status only retries these methods
+RETRY_THROTTLED_STATUS_CODE = 429
+RETRY_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BACKOFF = 0.5
+RETRY_MAX_BACKOFF = 30
+# AAD tokens are refreshed this many seconds before they expire
+AAD_TOKEN_REFRESH_MARGIN = 300
+
+_sessions = {}
+_aad_tokens = {}
+_lock = Lock()
+
+
+def clear_transport_cache():
+    """Closes all pooled sessions and drops cached AAD tokens."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _aad_tokens.clear()
+
+
+def get_session(url: str) -> requests.Session:
+    """Get the pooled session of the host of a url."""
+    host = urlparse(url).netloc.lower()
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=CENTRAL_CONNECTION_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the pooled session of its host, with the signature of requests.request.
+
+    Responses with a status code in RETRY_STATUS_CODES are retried up to RETRY_MAX_ATTEMPTS times,
+    waiting for the Retry-After of the response, or an exponential backoff with jitter without one.
+    Requests with a method outside of RETRY_IDEMPOTENT_METHODS, e.g. running a command, are only
+    retried when throttled, as they may have been processed. The response of the last attempt is
+    returned as is.
+    """
+    kwargs.setdefault("verify", not should_disable_connection_verify())
+    method = method.upper()
+    session = get_session(url)
+    attempt = 1
+    while True:
+        response = session.request(method, url, **kwargs)
+        if not _should_retry(method, response) or attempt >= RETRY_MAX_ATTEMPTS:
+            return response
+
+        delay = _get_retry_delay(response, attempt)
+        logger.debug(
+            "Request %s %s returned %s, retrying in %.1fs (attempt %s of %s)",
+            method,
+            url,
+            response.status_code,
+            delay,
+            attempt,
+            RETRY_MAX_ATTEMPTS,
+        )
+        response.close()
+        sleep(delay)
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return request("PATCH", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
+
+
+def get_aad_token(cmd, resource: str = CENTRAL_RESOURCE) -> dict:
+    """
+    Get an AAD token for a resource, reusing the last token until AAD_TOKEN_REFRESH_MARGIN
+    seconds before its expiresOn. Tokens without a known expiry are never reused.
+    """
+    now = time()
+    with _lock:
+        cached = _aad_tokens.get(resource)
+        if cached and now < cached[1] - AAD_TOKEN_REFRESH_MARGIN:
+            return cached[0]
+
+    token = auth.get_aad_token(cmd, resource=resource)
+    expires_on = _parse_expires_on(token.get("expiresOn"))
+    if expires_on:
+        with _lock:
+            _aad_tokens[resource] = (token, expires_on)
+    return token
+
+
+def _should_retry(method: str, response: requests.Response) -> bool:
+    if response.status_code not in RETRY_STATUS_CODES:
+        return False
+    return response.status_code == RETRY_THROTTLED_STATUS_CODE or method in RETRY_IDEMPOTENT_METHODS
+
+
+def _get_retry_delay(response: requests.Response, attempt: int) -> float:
+    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_BACKOFF)
+    backoff = min(RETRY_BACKOFF * (2 ** (attempt - 1)), RETRY_MAX_BACKOFF)
+    return backoff * random.uniform(0.5, 1)
+
+
+def _parse_retry_after(value: str) -> float:
+    # either delay-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_expires_on(value) -> float:
+    # local time, e.g. 2021-03-09 01:02:03.123456, or seconds since the epoch
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    if value.isdigit():
+        return float(value)
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
@@ -14,9 +14,8 @@ from azure.cli.core.azclierror import (
     CLIInternalError,
 )
 from azext_iot import constants
-from azext_iot.common import auth
+from azext_iot.central.services import _transport
 
-import requests
 import uuid
 from importlib import import_module
 from azext_iot.central.models.enum import ApiVersion
@@ -42,7 +41,7 @@ def make_api_call(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.request(
+    response = _transport.request(
         url=url,
         method=method.upper(),
         headers=headers,
@@ -55,7 +54,7 @@ def make_api_call(
 
 def get_headers(token, cmd, has_json_payload=False):
     if not token:
-        aad_token = auth.get_aad_token(cmd, resource="https://apps.azureiotcentral.com")
+        aad_token = _transport.get_aad_token(cmd)
         token = "Bearer {}".format(aad_token["accessToken"])
 
     headers = {
@@ -4,11 +4,10 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import requests
 
 from knack.log import get_logger
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.enum import ApiVersion
 
 logger = get_logger(__name__)
@@ -56,7 +55,7 @@ def add_api_token(
 
     headers = _utility.get_headers(token, cmd, has_json_payload=True)
 
-    response = requests.put(url, headers=headers, json=payload, params=query_parameters)
+    response = _transport.put(url, headers=headers, json=payload, params=query_parameters)
     return _utility.try_extract_result(response)
 
 
@@ -88,7 +87,7 @@ def get_api_token_list(
 
     headers = _utility.get_headers(token, cmd)
 
-    response = requests.get(url, params=query_parameters, headers=headers)
+    response = _transport.get(url, params=query_parameters, headers=headers)
     return _utility.try_extract_result(response)
 
 
@@ -122,7 +121,7 @@ def get_api_token(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(url, headers=headers, params=query_parameters)
+    response = _transport.get(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
 
 
@@ -156,5 +155,5 @@ def delete_api_token(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.delete(url, headers=headers, params=query_parameters)
+    response = _transport.delete(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
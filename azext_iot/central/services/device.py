@@ -6,10 +6,8 @@
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/devices
 
 from typing import List, Union
-import requests
 from azext_iot.central.common import EDGE_ONLY_FILTER
 from azext_iot.central.models.edge import EdgeModule
-from azext_iot.common.auth import get_aad_token
 
 from knack.log import get_logger
 
@@ -19,7 +17,7 @@ from azure.cli.core.azclierror import (
     BadRequestError,
 )
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.devicetwin import DeviceTwin
 from azext_iot.central.models.preview import DevicePreview
 from azext_iot.central.models.v1 import DeviceV1
@@ -68,7 +66,7 @@ def get_device(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(
+    response = _transport.get(
         url,
         headers=headers,
         params=query_parameters,
@@ -128,7 +126,7 @@ def list_devices(
 
     pages_processed = 0
     while (max_pages == 0 or pages_processed < max_pages) and url:
-        response = requests.get(
+        response = _transport.get(
             url,
             headers=headers,
             params=query_parameters if pages_processed == 0 else None,
@@ -184,7 +182,7 @@ def get_device_registration_summary(
     )
 
     while url:
-        response = requests.get(
+        response = _transport.get(
             url, headers=headers, verify=not should_disable_connection_verify()
         )
         result = _utility.try_extract_result(response)
@@ -254,7 +252,7 @@ def create_device(
 
     data = _utility.get_object(payload, MODEL, api_version)
     json = _utility.to_camel_dict(dict_clean(parse_entity(data)))
-    response = requests.put(url, headers=headers, json=json, params=query_parameters)
+    response = _transport.put(url, headers=headers, json=json, params=query_parameters)
     result = _utility.try_extract_result(response)
 
     return _utility.get_object(result, MODEL, api_version)
@@ -331,7 +329,7 @@ def update_device(
     data = _utility.get_object(payload, MODEL, api_version)
     json = _utility.to_camel_dict(dict_clean(parse_entity(data)))
 
-    response = requests.patch(
+    response = _transport.patch(
         url,
         headers=headers,
         json=json,
@@ -372,7 +370,7 @@ def delete_device(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.delete(url, headers=headers, params=query_parameters)
+    response = _transport.delete(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
 
 
@@ -398,7 +396,7 @@ def list_relationships(
     relationships = []
     pages_processed = 0
     while (max_pages == 0 or pages_processed < max_pages) and url:
-        response = requests.get(
+        response = _transport.get(
             url,
             headers=headers,
             params=query_parameters if pages_processed == 0 else None,
@@ -561,7 +559,7 @@ def get_device_credentials(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(url, headers=headers, params=query_parameters)
+    response = _transport.get(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
 
 
@@ -600,7 +598,7 @@ def run_command(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.post(
+    response = _transport.post(
         url, headers=headers, json=payload, params=query_parameters
     )
 
@@ -649,7 +647,7 @@ def run_component_command(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.post(
+    response = _transport.post(
         url, headers=headers, json=payload, params=query_parameters
     )
 
@@ -694,7 +692,7 @@ def get_command_history(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(url, headers=headers, params=query_parameters)
+    response = _transport.get(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
 
 
@@ -733,7 +731,7 @@ def get_component_command_history(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(url, headers=headers, params=query_parameters)
+    response = _transport.get(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
 
 
@@ -759,18 +757,12 @@ def get_device_twin(
         twin: dict
     """
 
-    if not token:
-        aad_token = get_aad_token(cmd, resource="https://apps.azureiotcentral.com")[
-            "accessToken"
-        ]
-        token = "Bearer {}".format(aad_token)
-
     url = f"https://{app_id}.{central_dns_suffix}/system/iothub/devices/{device_id}/get-twin?extendedInfo=true"
     headers = _utility.get_headers(token, cmd)
 
     # Construct parameters
 
-    response = requests.get(
+    response = _transport.get(
         url,
         headers=headers,
         verify=not should_disable_connection_verify(),
@@ -825,7 +817,7 @@ def run_manual_failover(
         see https://github.com/iot-for-all/iot-central-high-availability-clients#readme for more information"""
         )
 
-    response = requests.post(
+    response = _transport.post(
         url, headers=headers, verify=not should_disable_connection_verify(), json=json
     )
     _utility.log_response_debug(response=response, logger=logger)
@@ -857,7 +849,7 @@ def run_manual_failback(
         app_id, central_dns_suffix, "system/iothub/devices", device_id
     )
     headers = _utility.get_headers(token, cmd)
-    response = requests.post(
+    response = _transport.post(
         url, headers=headers, verify=not should_disable_connection_verify()
     )
     _utility.log_response_debug(response=response, logger=logger)
@@ -894,7 +886,7 @@ def purge_c2d_messages(
         app_id, central_dns_suffix, "system/iothub/devices", device_id
     )
     headers = _utility.get_headers(token, cmd)
-    response = requests.delete(url, headers=headers)
+    response = _transport.delete(url, headers=headers)
     return _utility.try_extract_result(response)
 
 
@@ -920,18 +912,12 @@ def list_device_modules(
         modules: list
     """
 
-    if not token:
-        aad_token = get_aad_token(cmd, resource="https://apps.azureiotcentral.com")[
-            "accessToken"
-        ]
-        token = "Bearer {}".format(aad_token)
-
     url = f"https://{app_id}.{central_dns_suffix}/system/iotedge/devices/{device_id}/modules"
     headers = _utility.get_headers(token, cmd)
 
     # Construct parameters
 
-    response = requests.get(
+    response = _transport.get(
         url,
         headers=headers,
         verify=not should_disable_connection_verify(),
@@ -968,12 +954,6 @@ def restart_device_module(
         module: dict
     """
 
-    if not token:
-        aad_token = get_aad_token(cmd, resource="https://apps.azureiotcentral.com")[
-            "accessToken"
-        ]
-        token = "Bearer {}".format(aad_token)
-
     url = f"https://{app_id}.{central_dns_suffix}/system/iotedge/devices/{device_id}/modules/$edgeAgent/directmethods"
     json = {
         "methodName": "RestartModule",
@@ -983,7 +963,7 @@ def restart_device_module(
 
     # Construct parameters
 
-    response = requests.post(
+    response = _transport.post(
         url,
         json=json,
         headers=headers,
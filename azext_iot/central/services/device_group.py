@@ -6,13 +6,12 @@
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/deviceGroups
 
 from typing import List, Union
-import requests
 
 from knack.log import get_logger
 
 from azure.cli.core.azclierror import AzureResponseError
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.preview import DeviceGroupPreview
 from azext_iot.central.models.v1_1_preview import DeviceGroupV1_1_preview
 from azext_iot.central.models.enum import ApiVersion
@@ -55,7 +54,7 @@ def list_device_groups(
 
     pages_processed = 0
     while (max_pages == 0 or pages_processed < max_pages) and url:
-        response = requests.get(url, headers=headers, params=query_parameters)
+        response = _transport.get(url, headers=headers, params=query_parameters)
         result = _utility.try_extract_result(response)
 
         if "value" not in result:
@@ -5,7 +5,6 @@
 # --------------------------------------------------------------------------------------------
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/devicetemplates
 
-import requests
 from typing import (
     Union,
     List,
@@ -14,7 +13,7 @@ from knack.log import get_logger
 
 from azure.cli.core.azclierror import AzureResponseError
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.preview import TemplatePreview
 from azext_iot.central.models.v1 import TemplateV1
 from azext_iot.central.models.v1_1_preview import TemplateV1_1_preview
@@ -56,7 +55,7 @@ def get_device_template(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(url, headers=headers, params=query_parameters)
+    response = _transport.get(url, headers=headers, params=query_parameters)
     result = _utility.try_extract_result(response)
     return _utility.get_object(result, model=MODEL, api_version=api_version)
 
@@ -98,7 +97,7 @@ def list_device_templates(
 
     pages_processed = 0
     while (max_pages == 0 or pages_processed < max_pages) and url:
-        response = requests.get(
+        response = _transport.get(
             url,
             headers=headers,
             params=query_parameters if pages_processed == 0 else None,
@@ -158,7 +157,7 @@ def create_device_template(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.put(url, headers=headers, json=payload, params=query_parameters)
+    response = _transport.put(url, headers=headers, json=payload, params=query_parameters)
     result = _utility.try_extract_result(response)
     return _utility.get_object(result, model=MODEL, api_version=api_version)
 
@@ -200,7 +199,7 @@ def update_device_template(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.patch(
+    response = _transport.patch(
         url, headers=headers, json=payload, params=query_parameters
     )
     result = _utility.try_extract_result(response)
@@ -238,5 +237,5 @@ def delete_device_template(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.delete(url, headers=headers, params=query_parameters)
+    response = _transport.delete(url, headers=headers, params=query_parameters)
     return _utility.try_extract_result(response)
@@ -5,12 +5,11 @@
 # --------------------------------------------------------------------------------------------
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/fileuploads
 
-import requests
 from typing import Union
 from knack.log import get_logger
 
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.v1_1_preview import FileUploadV1_1_preview
 from azure.cli.core.util import should_disable_connection_verify
 
@@ -36,7 +35,7 @@ def _make_call(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.request(
+    response = _transport.request(
         url=url,
         method=method.upper(),
         headers=headers,
@@ -155,11 +154,11 @@ def createorupdate_fileupload(
         payload["sasTtl"] = sasTtl
 
     if update:
-        response = requests.patch(
+        response = _transport.patch(
             url, headers=headers, json=payload, params=query_parameters
         )
     else:
-        response = requests.put(
+        response = _transport.put(
             url, headers=headers, json=payload, params=query_parameters
         )
     result = _utility.try_extract_result(response)
@@ -5,13 +5,12 @@
 # --------------------------------------------------------------------------------------------
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/jobs
 
-import requests
 from typing import List, Union
 from knack.log import get_logger
 
 from azure.cli.core.azclierror import AzureResponseError
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azure.cli.core.util import should_disable_connection_verify
 from azext_iot.central.models.v1_1_preview import JobV1_1_preview
 from azext_iot.central.models.preview import JobPreview
@@ -46,7 +45,7 @@ def _call_job(
     if method is None:
         method = "get"
 
-    response = requests.request(
+    response = _transport.request(
         method=method.upper(),
         url=url,
         headers=headers,
@@ -96,7 +95,7 @@ def _list_job(
 
     pages_processed = 0
     while (max_pages == 0 or pages_processed < max_pages) and url:
-        response = requests.get(
+        response = _transport.get(
             url,
             headers=headers,
             params=query_parameters,
@@ -389,7 +388,7 @@ def create_job(
             "batch": threshold_batch,
         }
 
-    response = requests.put(url, headers=headers, json=payload, params=query_parameters)
+    response = _transport.put(url, headers=headers, json=payload, params=query_parameters)
     result = _utility.try_extract_result(response)
 
     return _utility.get_object(result, "Job", api_version)
@@ -5,13 +5,12 @@
 # --------------------------------------------------------------------------------------------
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/roles
 
-import requests
 from knack.log import get_logger
 from typing import List, Union
 
 from azure.cli.core.azclierror import AzureResponseError
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.v1_1_preview import OrganizationV1_1_preview
 from azure.cli.core.util import should_disable_connection_verify
 
@@ -46,7 +45,7 @@ def _make_call(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.request(
+    response = _transport.request(
         url=url,
         method=method.upper(),
         headers=headers,
@@ -6,13 +6,12 @@
 # This is largely derived from https://docs.microsoft.com/en-us/rest/api/iotcentral/roles
 
 from typing import List, Union
-import requests
 
 from knack.log import get_logger
 
 from azure.cli.core.azclierror import AzureResponseError
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.v1 import RoleV1
 from azext_iot.central.models.v1_1_preview import RoleV1_1_preview
 from azext_iot.central.models.preview import RolePreview
@@ -54,7 +53,7 @@ def get_role(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.get(
+    response = _transport.get(
         url,
         headers=headers,
         params=query_parameters,
@@ -98,7 +97,7 @@ def list_roles(
 
     pages_processed = 0
     while (max_pages == 0 or pages_processed < max_pages) and url:
-        response = requests.get(
+        response = _transport.get(
             url,
             headers=headers,
             params=query_parameters,
@@ -4,14 +4,13 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import requests
 from typing import Union, List
 from knack.log import get_logger
 
 from azure.cli.core.azclierror import AzureResponseError, BadRequestError
 from azure.cli.core.util import should_disable_connection_verify
 from azext_iot.constants import CENTRAL_ENDPOINT
-from azext_iot.central.services import _utility
+from azext_iot.central.services import _utility, _transport
 from azext_iot.central.models.enum import (
     Role,
     ApiVersion,
@@ -57,7 +56,7 @@ def _make_call(
     query_parameters = {}
     query_parameters["api-version"] = api_version
 
-    response = requests.request(
+    response = _transport.request(
         url=url,
         method=method.upper(),
         headers=headers,
@@ -44,6 +44,13 @@ def load_command_table(self, _):
         cmd_group.command("import", "iot_device_import")
         cmd_group.command("export", "iot_device_export")
 
+    with self.command_group(
+        "iot hub device-identity bulk", command_type=iothub_ops
+    ) as cmd_group:
+        cmd_group.command("create", "iot_device_bulk_create")
+        cmd_group.command("update", "iot_device_bulk_update")
+        cmd_group.command("delete", "iot_device_bulk_delete")
+
     with self.command_group(
         "iot hub device-identity children", command_type=iothub_ops
     ) as cmd_group:
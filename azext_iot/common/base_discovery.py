@@ -5,14 +5,18 @@
 # --------------------------------------------------------------------------------------------
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from azure.cli.core.azclierror import ResourceNotFoundError
 from azure.core.exceptions import HttpResponseError
 from knack.log import get_logger
+from azext_iot.common._azure import IOT_SERVICE_CS_TEMPLATE
+from azext_iot.common.discovery_cache import DiscoveryCache
 from azext_iot.common.shared import AuthenticationTypeDataplane
 from typing import Any, Dict, List
 from types import SimpleNamespace
 
 logger = get_logger(__name__)
+DISCOVERY_MAX_WORKERS = 8
 POLICY_ERROR_TEMPLATE = (
     "Unable to discover a priviledged policy for {0}: {1}, in subscription {2}. "
     "When interfacing with an {0}, the IoT extension requires any single policy with "
@@ -57,6 +61,9 @@ class BaseDiscovery(ABC):
     :ivar necessary_rights_set: Set of policy names needed for the Iot Extension to run
                                 commands against the DPS instance.
     :vartype necessary_rights_set: Set[str]
+
+    :ivar cache: Opt-in on-disk cache of discovered targets, None when not enabled.
+    :vartype cache: DiscoveryCache
     """
     def __init__(self, cmd, necessary_rights_set: set = None, resource_type: str = None):
         self.cmd = cmd
@@ -65,6 +72,7 @@ class BaseDiscovery(ABC):
         self.resource_type = resource_type
         self.track2 = False
         self.necessary_rights_set = necessary_rights_set
+        self.cache = DiscoveryCache.from_cli_ctx(getattr(cmd, "cli_ctx", None))
 
     @abstractmethod
     def _initialize_client(self):
@@ -268,6 +276,10 @@ class BaseDiscovery(ABC):
         resource and return the first usable policy (the first policy that the IoT
         extension can use).
 
+        When the discovery cache is enabled, the resource group and policy name of a
+        resource found before are reused, and the policy keys as well if caching them
+        was opted in to.
+
         Raises ResourceNotFoundError if no resource is found.
 
         :param resource_name: Resource Name
@@ -289,71 +301,185 @@ class BaseDiscovery(ABC):
             return self.get_target_by_cstring(connection_string=cstring)
 
         resource_group_name = resource_group_name or kwargs.get("rg")
+        if self.cache:
+            target = self._get_cached_target(resource_name, resource_group_name, **kwargs)
+            if target:
+                return target
+
         resource = self.find_resource(resource_name=resource_name, rg=resource_group_name)
+        return self._get_target_from_resource(resource, resource_name=resource_name, **kwargs)
+
+    def get_targets(self, resource_group_name: str = None, **kwargs) -> List[Dict[str, str]]:
+        """
+        Returns a list of targets (dicts representing a resource's connection string parts)
+        that are usable by the extension within the subscription (and resource group if
+        provided).
+
+        Targets are built from the listed resources on a pool of up to DISCOVERY_MAX_WORKERS
+        threads, in the order the resources were listed. Resources that cannot be accessed
+        are skipped with a warning.
+
+        :param rg: Resource Group
+        :type rg: str
 
+        :return: Resources
+        :rtype: list[dict]
+        """
+        resources = self.get_resources(rg=resource_group_name)
+        if not resources:
+            return []
+
+        def _get_target(resource):
+            try:
+                return self._get_target_from_resource(resource, **kwargs)
+            except (HttpResponseError, ResourceNotFoundError) as e:
+                logger.warning("Could not access %s. %s", resource.name, e)
+
+        workers = min(DISCOVERY_MAX_WORKERS, len(resources))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="discovery") as executor:
+            targets = list(executor.map(_get_target, resources))
+
+        return [target for target in targets if target]
+
+    def _get_target_from_resource(self, resource, resource_name: str = None, **kwargs) -> Dict[str, str]:
+        """Builds the target of a resource that was already found, finding its policy if needed."""
+        resource_name = resource_name or resource.name
         key_type = kwargs.get("key_type", "primary")
+        rg = resource.additional_properties.get("resourcegroup")
 
         # Azure AD auth path
         auth_type = kwargs.get("auth_type", AuthenticationTypeDataplane.key.value)
         if auth_type == AuthenticationTypeDataplane.login.value:
             logger.info("Using AAD access token for %s interaction.", self.resource_type)
-            policy = SimpleNamespace()
-            policy.key_name = AuthenticationTypeDataplane.login.value
-            policy.primary_key = AuthenticationTypeDataplane.login.value
-            policy.secondary_key = AuthenticationTypeDataplane.login.value
-
-            return self._build_target(
+            target = self._build_target(
                 resource=resource,
-                policy=policy,
+                policy=_get_login_policy(),
                 key_type="primary",
                 **kwargs
             )
+            self._cache_target(resource_name, rg, target)
+            return target
 
         policy_name = kwargs.get("policy_name", "auto")
-        rg = resource.additional_properties.get("resourcegroup")
 
         resource_policy = self.find_policy(
             resource_name=resource.name, rg=rg, policy_name=policy_name,
         )
 
-        return self._build_target(
+        target = self._build_target(
             resource=resource,
             policy=resource_policy,
             key_type=key_type,
             **kwargs
         )
-
-    def get_targets(self, resource_group_name: str = None, **kwargs) -> List[Dict[str, str]]:
-        """
-        Returns a list of targets (dicts representing a resource's connection string parts)
-        that are usable by the extension within the subscription (and resource group if
-        provided).
-
-        :param rg: Resource Group
-        :type rg: str
-
-        :return: Resources
-        :rtype: list[dict]
-        """
-        targets = []
-        resources = self.get_resources(rg=resource_group_name)
-        if resources:
-            for resource in resources:
-                try:
-                    targets.append(
-                        self.get_target(
-                            resource_name=resource.name,
-                            resource_group_name=resource.additional_properties.get("resourcegroup"),
-                            **kwargs
-                        )
-                    )
-                except (HttpResponseError, ResourceNotFoundError) as e:
-                    logger.warning("Could not access %s. %s", resource.name, e)
-
-        return targets
+        # only auto discovered policies are reused for later auto discovery
+        self._cache_target(
+            resource_name, rg, target, resource_policy if policy_name.lower() == "auto" else None
+        )
+        return target
 
     @abstractmethod
     def _build_target(self, resource, policy, key_type=None, **kwargs):
         """Returns a dictionary representing the resource connection string parts to
         be used by the IoT extension."""
         pass
+
+    def _get_cache_key(self, resource_name: str) -> str:
+        self._initialize_client()
+        return DiscoveryCache.get_key(self.sub_id, self.resource_type, resource_name)
+
+    def _get_cached_target(
+        self, resource_name: str, resource_group_name: str = None, **kwargs
+    ) -> Dict[str, str]:
+        """Returns the target rebuilt from the discovery cache, or None on a cache miss."""
+        cache_key = self._get_cache_key(resource_name)
+        entry = self.cache.get(cache_key)
+        if not entry:
+            return None
+
+        rg = entry["resourceGroup"]
+        cached_target = entry["target"]
+        if resource_group_name and resource_group_name.lower() != (rg or "").lower():
+            return None
+        if kwargs.get("include_events") and "events" not in cached_target:
+            return None
+
+        key_type = kwargs.get("key_type", "primary")
+        auth_type = kwargs.get("auth_type", AuthenticationTypeDataplane.key.value)
+        if auth_type == AuthenticationTypeDataplane.login.value:
+            policy = _get_login_policy()
+            key_type = "primary"
+        else:
+            policy_name = kwargs.get("policy_name", "auto")
+            cached_policy = entry.get("policy")
+            keys = entry.get("keys")
+            auto_policy = policy_name.lower() == "auto"
+            if auto_policy and cached_policy:
+                policy_name = cached_policy
+
+            if keys and policy_name.lower() == (cached_policy or "").lower():
+                policy = SimpleNamespace(
+                    key_name=cached_policy, primary_key=keys["primary"], secondary_key=keys["secondary"]
+                )
+            else:
+                try:
+                    policy = self.find_policy(resource_name=resource_name, rg=rg, policy_name=policy_name)
+                except Exception as e:
+                    # the cached resource or policy is gone, rediscover it
+                    logger.debug("Unable to get the policy of cached %s %s. %s", self.resource_type, resource_name, e)
+                    self.cache.invalidate(cache_key)
+                    return None
+                if auto_policy and not cached_policy:
+                    self._cache_target(resource_name, rg, cached_target, policy)
+
+        logger.info("Using cached discovery of %s %s.", self.resource_type, resource_name)
+        target = {key: value for key, value in cached_target.items() if key != "events"}
+        if kwargs.get("include_events"):
+            target["events"] = cached_target["events"]
+        target["cs"] = IOT_SERVICE_CS_TEMPLATE.format(
+            target["entity"],
+            policy.key_name,
+            policy.primary_key if key_type == "primary" else policy.secondary_key,
+        )
+        target["policy"] = policy.key_name
+        target["primarykey"] = policy.primary_key
+        target["secondarykey"] = policy.secondary_key
+        target["cmd"] = self.cmd
+        return target
+
+    def _cache_target(self, resource_name: str, rg: str, target: Dict[str, str], policy=None):
+        """Caches the non secret parts of a target, plus the policy keys if opted in to."""
+        if not self.cache:
+            return
+
+        cache_key = self._get_cache_key(resource_name)
+        previous = self.cache.get(cache_key) or {}
+        entry = {
+            "resourceGroup": rg,
+            "target": {
+                key: value for key, value in target.items()
+                if key not in ("cs", "policy", "primarykey", "secondarykey", "cmd")
+            },
+        }
+        if policy:
+            entry["policy"] = policy.key_name
+            entry["keys"] = {"primary": policy.primary_key, "secondary": policy.secondary_key}
+        elif previous.get("policy"):
+            # keep the policy discovered by an earlier key based command
+            entry["policy"] = previous["policy"]
+            if "keys" in previous:
+                entry["keys"] = previous["keys"]
+
+        previous_target = previous.get("target", {})
+        if "events" not in entry["target"] and "events" in previous_target:
+            if previous_target.get("entity") == entry["target"].get("entity"):
+                entry["target"]["events"] = previous_target["events"]
+        self.cache.put(cache_key, entry)
+
+
+def _get_login_policy() -> SimpleNamespace:
+    policy = SimpleNamespace()
+    policy.key_name = AuthenticationTypeDataplane.login.value
+    policy.primary_key = AuthenticationTypeDataplane.login.value
+    policy.secondary_key = AuthenticationTypeDataplane.login.value
+    return policy
@@ -0,0 +1,159 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+discovery_cache: Opt-in on-disk cache of resources found by IoT Hub and DPS discovery.
+
+The cache is enabled by setting a TTL in seconds, either with
+`az config set iot.discovery_cache_ttl=3600` or the AZURE_IOT_DISCOVERY_CACHE_TTL
+environment variable. Policy keys are only written to disk after an explicit
+`az config set iot.discovery_cache_keys=true` (AZURE_IOT_DISCOVERY_CACHE_KEYS).
+"""
+
+import json
+import os
+
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+from knack.log import get_logger
+from azure.cli.core._environment import get_config_dir
+
+logger = get_logger(__name__)
+
+DISCOVERY_CACHE_FILE = "iot_discovery_cache.json"
+DISCOVERY_CACHE_SECTION = "iot"
+DISCOVERY_CACHE_TTL_OPTION = "discovery_cache_ttl"
+DISCOVERY_CACHE_KEYS_OPTION = "discovery_cache_keys"
+DISCOVERY_CACHE_VERSION = 1
+
+
+class DiscoveryCache(object):
+    """
+    Resource name -> (resource group, policy name, target without secrets) cache, keyed by
+    subscription and resource type and persisted as JSON in the CLI config directory.
+
+    Every write rereads the file and replaces it atomically, so concurrent invocations
+    at worst lose each other's entries. Writes within a process are serialized, as
+    targets may be discovered on several threads. The file is only readable by its owner.
+
+    :ivar ttl: Seconds an entry is used for after it was written.
+    :vartype ttl: float
+
+    :ivar store_keys: Whether the keys of the discovered policy are cached as well.
+    :vartype store_keys: bool
+    """
+    def __init__(self, ttl: float, store_keys: bool = False, path: str = None):
+        self.ttl = ttl
+        self.store_keys = store_keys
+        self.path = path or get_discovery_cache_path()
+        self._lock = Lock()
+
+    @classmethod
+    def from_cli_ctx(cls, cli_ctx):
+        """Returns the cache configured for the CLI, or None when it is not enabled."""
+        config = getattr(cli_ctx, "config", None)
+        if config is None:
+            return None
+        try:
+            ttl = float(config.get(DISCOVERY_CACHE_SECTION, DISCOVERY_CACHE_TTL_OPTION, fallback=0) or 0)
+            store_keys = config.getboolean(DISCOVERY_CACHE_SECTION, DISCOVERY_CACHE_KEYS_OPTION, fallback=False)
+        except ValueError as e:
+            logger.warning("Ignoring the invalid IoT discovery cache configuration. %s", e)
+            return None
+        if ttl <= 0:
+            return None
+        return cls(ttl=ttl, store_keys=store_keys)
+
+    @staticmethod
+    def get_key(subscription: str, resource_type: str, resource_name: str) -> str:
+        return "{}/{}/{}".format(subscription, resource_type, resource_name).lower()
+
+    def get(self, key: str) -> dict:
+        """Returns the entry of a key unless it has expired."""
+        entry = self._read().get(key)
+        if not entry or entry.get("expiresOn", 0) <= time():
+            return None
+        if not self.store_keys:
+            # keys cached while opted in are not used once opted out
+            entry.pop("keys", None)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        entry = dict(entry, expiresOn=time() + self.ttl)
+        if not self.store_keys:
+            entry.pop("keys", None)
+
+        with self._lock:
+            entries = self._read()
+            entries[key] = entry
+            now = time()
+            self._write({k: v for k, v in entries.items() if v.get("expiresOn", 0) > now})
+
+    def invalidate(self, key: str):
+        with self._lock:
+            entries = self._read()
+            if entries.pop(key, None) is not None:
+                logger.info("Invalidated cached discovery of %s.", key)
+                self._write(entries)
+
+    def _read(self) -> dict:
+        return _read_entries(self.path)
+
+    def _write(self, entries: dict):
+        _write_entries(self.path, entries)
+
+
+def get_discovery_cache_path() -> str:
+    return os.path.join(get_config_dir(), DISCOVERY_CACHE_FILE)
+
+
+def invalidate_discovery_cache_host(host_name: str, path: str = None):
+    """
+    Drops every cached resource with the given host name, e.g. after the host rejected the
+    credentials of a cached target. Does nothing when there is no cache.
+    """
+    path = path or get_discovery_cache_path()
+    if not host_name or not os.path.exists(path):
+        return
+    entries = _read_entries(path)
+    remaining = {
+        key: entry for key, entry in entries.items()
+        if entry.get("target", {}).get("entity", "").lower() != host_name.lower()
+    }
+    if len(remaining) != len(entries):
+        logger.info("Invalidated cached discovery of %s.", host_name)
+        _write_entries(path, remaining)
+
+
+def _read_entries(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.debug("Ignoring unreadable discovery cache %s. %s", path, e)
+        return {}
+    if not isinstance(content, dict) or content.get("version") != DISCOVERY_CACHE_VERSION:
+        return {}
+    return content.get("entries") or {}
+
+
+def _write_entries(path: str, entries: dict):
+    directory = os.path.dirname(path)
+    temp_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # NamedTemporaryFile is created readable by its owner only
+        with NamedTemporaryFile("w", dir=directory, prefix=".iot_discovery", delete=False, encoding="utf-8") as f:
+            temp_path = f.name
+            json.dump({"version": DISCOVERY_CACHE_VERSION, "entries": entries}, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.debug("Unable to write discovery cache %s. %s", path, e)
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -12,6 +12,7 @@ sas_token_auth: Module containing Shared Access Signature token class.
 from base64 import b64encode, b64decode
 from hashlib import sha256
 from hmac import HMAC
+from threading import Lock
 from time import time
 try:
     from urllib import (urlencode, quote_plus)
@@ -19,6 +20,62 @@ except ImportError:
     from urllib.parse import (urlencode, quote_plus)
 from msrest.authentication import Authentication
 
+# Fraction of a token lifetime after which a cached token is no longer handed out
+SAS_TOKEN_REUSE_FRACTION = 0.5
+SAS_TOKEN_CACHE_SIZE = 1024
+
+
+class SasTokenCache(object):
+    """
+    Thread safe cache of generated Shared Access Signature tokens.
+
+    Tokens are keyed by (uri, policy, key, expiry) and reused until reuse_fraction of their
+    lifetime has passed, so every token handed out is valid for at least the remaining
+    (1 - reuse_fraction) of the requested expiry.
+
+    Args:
+        reuse_fraction (float): Fraction of the token lifetime during which it is reused.
+        max_size (int): Maximum number of tokens held, the oldest is dropped first.
+    """
+    def __init__(self, reuse_fraction=SAS_TOKEN_REUSE_FRACTION, max_size=SAS_TOKEN_CACHE_SIZE):
+        self.reuse_fraction = reuse_fraction
+        self.max_size = max_size
+        self._tokens = {}
+        self._lock = Lock()
+
+    def get_token(self, uri, policy, key, expiry, generate):
+        """
+        Get a cached token, or one created by generate(ttl) with ttl the absolute expiry.
+
+        Returns:
+            result (str): SAS token as string literal.
+        """
+        cache_key = (uri, policy, key, expiry)
+        now = time()
+        with self._lock:
+            cached = self._tokens.get(cache_key)
+            if cached and now < cached[1] + expiry * self.reuse_fraction:
+                return cached[0]
+
+            token = generate(int(now + expiry))
+            self._tokens.pop(cache_key, None)
+            if len(self._tokens) >= self.max_size:
+                self._tokens.pop(next(iter(self._tokens)))
+            self._tokens[cache_key] = (token, now)
+            return token
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+_token_cache = SasTokenCache()
+
+
+def get_sas_token_cache():
+    """Get the SAS token cache shared by the process."""
+    return _token_cache
+
 
 class SasTokenAuthentication(Authentication):
     """
@@ -68,6 +125,8 @@ class SasTokenAuthentication(Authentication):
         """
         Create a shared access signature token as a string literal.
 
+        Relative tokens are shared through the process SAS token cache, see SasTokenCache.
+
         Args:
             absolute (bool): In general the sas token ttl is generated relative to 'now' (UTC) + expiry.
                 Set to true to generate a sas token with no relative start.
@@ -75,8 +134,12 @@ class SasTokenAuthentication(Authentication):
         Returns:
             result (str): SAS token as string literal.
         """
+        if absolute:
+            return self._sign(int(self.expiry))
+        return _token_cache.get_token(self.uri, self.policy, self.key, self.expiry, self._sign)
+
+    def _sign(self, ttl):
         encoded_uri = quote_plus(self.uri)
-        ttl = int(self.expiry) if absolute else int(time() + self.expiry)
         sign_key = '%s\n%d' % (encoded_uri, ttl)
         signature = b64encode(HMAC(b64decode(self.key), sign_key.encode('utf-8'), sha256).digest())
 
@@ -41,6 +41,9 @@ IOTDPS_RESOURCE_ID = "https://azure-devices-provisioning.net"
 DIGITALTWINS_RESOURCE_ID = "https://digitaltwins.azure.net"
 DEVICETWIN_POLLING_INTERVAL_SEC = 10
 DEVICETWIN_MONITOR_TIME_SEC = 15
+# Service limit for device identities per bulk registry request
+BULK_REGISTRY_MAX_DEVICES = 100
+BULK_REGISTRY_DEFAULT_WORKERS = 4
 # (Lib name, minimum version (including), maximum version (excluding))
 EVENT_LIB = ("uamqp", "1.2", "1.3")
 PNP_DTDLV2_COMPONENT_MARKER = "__t"
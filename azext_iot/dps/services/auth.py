@@ -4,18 +4,28 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import time
 import base64
 import hmac
 import hashlib
 import urllib
 
+from functools import partial
+from azext_iot.common.sas_token_auth import get_sas_token_cache
+
+DPS_SAS_TOKEN_EXPIRY = 21600
+DPS_SAS_POLICY = "registration"
+
 
 def get_dps_sas_auth_header(
     scope_id, device_id, key,
 ):
     sr = "{}%2Fregistrations%2F{}".format(scope_id, device_id)
-    expires = int(time.time() + 21600)
+    return get_sas_token_cache().get_token(
+        sr, DPS_SAS_POLICY, key, DPS_SAS_TOKEN_EXPIRY, partial(_sign, sr, key)
+    )
+
+
+def _sign(sr, key, expires):
     registration_id = f"{sr}\n{str(expires)}"
     secret = base64.b64decode(key)
     signature = base64.b64encode(
@@ -24,5 +34,5 @@ def get_dps_sas_auth_header(
         ).digest()
     )
     quote_signature = urllib.parse.quote(signature, "~()*!.'")
-    token = f"SharedAccessSignature sr={sr}&sig={quote_signature}&se={str(expires)}&skn=registration"
+    token = f"SharedAccessSignature sr={sr}&sig={quote_signature}&se={str(expires)}&skn={DPS_SAS_POLICY}"
     return token
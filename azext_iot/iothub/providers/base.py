@@ -27,5 +27,5 @@ class IoTHubProvider(object):
         )
         self.resolver = SdkResolver(self.target)
 
-    def get_sdk(self, sdk_type):
-        return self.resolver.get_sdk(sdk_type)
+    def get_sdk(self, sdk_type, retries=None):
+        return self.resolver.get_sdk(sdk_type, retries=retries)
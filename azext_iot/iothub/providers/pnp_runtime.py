@@ -37,7 +37,9 @@ class PnPRuntimeProvider(IoTHubProvider):
         response_timeout=None,
     ):
         # Prevent msrest locking up shell
-        self.runtime_sdk.config.retry_policy.retries = 1
+        runtime_sdk: DigitalTwinOperations = self.get_sdk(
+            SdkType.service_sdk, retries=1
+        ).digital_twin
 
         try:
             if payload:
@@ -48,7 +50,7 @@ class PnPRuntimeProvider(IoTHubProvider):
                 "response_timeout_in_seconds": response_timeout,
             }
             response = (
-                self.runtime_sdk.invoke_component_command(
+                runtime_sdk.invoke_component_command(
                     id=device_id,
                     command_name=command_name,
                     payload=payload,
@@ -58,7 +60,7 @@ class PnPRuntimeProvider(IoTHubProvider):
                     **api_timeout_kwargs,
                 ).response
                 if component_path
-                else self.runtime_sdk.invoke_root_level_command(
+                else runtime_sdk.invoke_root_level_command(
                     id=device_id,
                     command_name=command_name,
                     payload=payload,
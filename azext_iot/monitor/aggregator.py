@@ -0,0 +1,170 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+
+from datetime import datetime, timezone
+from time import time
+
+AGGREGATE_GROUP_BY = ("module", "component")
+
+
+class _FieldAccumulator:
+    __slots__ = ("count", "min", "max", "total", "last")
+
+    def __init__(self, value):
+        self.count = 1
+        self.min = value
+        self.max = value
+        self.total = value
+        self.last = value
+
+    def add(self, value):
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.total += value
+        self.last = value
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count,
+            "last": self.last,
+        }
+
+
+class _GroupAccumulator:
+    __slots__ = ("events", "fields")
+
+    def __init__(self):
+        self.events = 0
+        self.fields = {}
+
+
+class TelemetryAggregator:
+    """
+    Rolls parsed events up into tumbling windows per device.
+
+    Every numeric field of a JSON payload, nested fields named by their dotted path, is
+    reduced to count, min, max, mean and last for the window, so memory only grows with the
+    number of devices and fields, never with the number of events. Windows are aligned to
+    multiples of the window length since the epoch, so rollups of separate runs line up.
+    At the end of each window one row per device (and module and/or component, see group_by)
+    is passed to emit and the window starts over empty.
+    """
+
+    def __init__(self, window: float, emit, group_by: list = None):
+        self.window = window
+        self.emit = emit
+        self.group_by = set(group_by or [])
+        self._groups = {}
+        self._timer = None
+        self._window_start = self._get_window_start(time())
+
+    def add(self, result: dict):
+        """Adds a parsed event, as returned by ~azext_iot.monitor.parsers.CommonParser."""
+        event = result.get("event") or {}
+        key = (
+            event.get("origin") or "",
+            (event.get("module") or "") if "module" in self.group_by else None,
+            (event.get("component") or "") if "component" in self.group_by else None,
+        )
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _GroupAccumulator()
+        group.events += 1
+
+        payload = event.get("payload")
+        if isinstance(payload, str):
+            # payloads are only decoded by the parser when the content type is JSON
+            try:
+                payload = json.loads(payload)
+            except ValueError:
+                return
+        if not isinstance(payload, dict):
+            return
+
+        fields = group.fields
+        for name, value in _iter_numeric_fields(payload):
+            accumulator = fields.get(name)
+            if accumulator is None:
+                fields[name] = _FieldAccumulator(value)
+            else:
+                accumulator.add(value)
+
+    def start(self, loop):
+        delay = self._window_start + self.window - time()
+        self._timer = loop.call_later(max(delay, 0), self._tick, loop)
+
+    def stop(self):
+        """Emits the rollups of the current, partial, window."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.flush()
+
+    def flush(self, full_window: bool = False):
+        """
+        Emits the rollups of the current window and starts the next one.
+
+        :param full_window: The current window has ended, even if the clock says otherwise.
+        """
+        now = time()
+        window_end = self._window_start + self.window
+        if not full_window:
+            window_end = min(now, window_end)
+        groups = self._groups
+        self._groups = {}
+        for key in sorted(groups):
+            self.emit(self._build_row(key, groups[key], self._window_start, window_end))
+        window_start = self._get_window_start(now)
+        if full_window:
+            # the loop clock may fire the timer just before the wall clock reaches the end
+            # of the window, which must not be emitted twice
+            window_start = max(window_start, window_end)
+        self._window_start = window_start
+
+    def _tick(self, loop):
+        self.flush(full_window=True)
+        self.start(loop)
+
+    def _get_window_start(self, now: float) -> float:
+        return now - now % self.window
+
+    def _build_row(self, key, group: _GroupAccumulator, window_start: float, window_end: float) -> dict:
+        device_id, module_id, component = key
+        row = {
+            "windowStart": _format_time(window_start),
+            "windowEnd": _format_time(window_end),
+            "deviceId": device_id,
+        }
+        if module_id is not None:
+            row["moduleId"] = module_id
+        if component is not None:
+            row["component"] = component
+        row["events"] = group.events
+        row["fields"] = {
+            name: accumulator.summary() for name, accumulator in sorted(group.fields.items())
+        }
+        return row
+
+
+def _iter_numeric_fields(payload: dict, prefix: str = ""):
+    for name, value in payload.items():
+        # bool is a subclass of int, but is not a measurement
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield prefix + name, value
+        elif isinstance(value, dict):
+            yield from _iter_numeric_fields(value, "{}{}.".format(prefix, name))
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
@@ -4,15 +4,51 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import asyncio
 import uamqp
 import urllib
 
+from functools import partial
+from time import time
 from azext_iot.monitor.models.target import Target
 
 DEBUG = False
 
+# seconds a token handed to a new auth container must at least remain valid
+TOKEN_MIN_LIFETIME = 60
 
-async def convert_token_to_target(tokens) -> Target:
+
+class RefreshableSASTokenAsync(uamqp.authentication.SASTokenAsync):
+    """
+    Async CBS authentication with a SAS token issued by a service, rather than generated
+    from a shared access key.
+
+    uamqp asks for a new token shortly before the current one expires. get_token(expires_after)
+    is called on the default executor to fetch one, and must return a (token, expiry) tuple for
+    a token that expires after expires_after, both expiries in seconds since epoch.
+    """
+
+    def __init__(self, audience, uri, token, expires_at, get_token, **kwargs):
+        super(RefreshableSASTokenAsync, self).__init__(
+            audience=audience, uri=uri, token=token, expires_at=expires_at, **kwargs
+        )
+        self._get_token = get_token
+
+    async def update_token(self):
+        token, expires_at = await asyncio.get_event_loop().run_in_executor(
+            None, self._get_token, self.expires_at
+        )
+        self.expires_at = float(expires_at)
+        self._prev_token = self.token
+        self.token = self._encode(token)
+
+
+async def convert_token_to_target(tokens, get_token=None) -> Target:
+    """
+    :param get_token: Optional callable, get_token(hostname, path, expires_after), returning a
+        new (token, expiry) tuple for the event hub. When set, tokens are refreshed before they
+        expire and the target can build new auth containers to reconnect.
+    """
     token_expiry = tokens["expiry"]
     event_hub_token = tokens["eventhubSasToken"]
 
@@ -28,9 +64,17 @@ async def convert_token_to_target(tokens) -> Target:
     partition_count = meta_data[b"partition_count"]
     partitions = [str(i) for i in range(int(partition_count))]
 
-    auth = _build_auth_container_from_token(hostname, path, sas_token, token_expiry)
+    if not get_token:
+        auth = _build_auth_container_from_token(hostname, path, sas_token, token_expiry)
+        return Target(hostname=hostname, path=path, partitions=partitions, auth=auth)
 
-    return Target(hostname=hostname, path=path, partitions=partitions, auth=auth)
+    get_hub_token = partial(get_token, hostname, path)
+    auth = _build_refreshable_auth_container(hostname, path, sas_token, token_expiry, get_hub_token)
+    target = Target(hostname=hostname, path=path, partitions=partitions, auth=auth)
+    target.add_auth_factory(
+        partial(_build_refreshable_auth_container_from_source, hostname, path, get_hub_token)
+    )
+    return target
 
 
 async def query_meta_data(address, path, auth):
@@ -67,3 +111,16 @@ def _build_auth_container_from_token(hostname, path, token, expiry):
     return uamqp.authentication.SASTokenAsync(
         audience=sas_uri, uri=sas_uri, expires_at=expiry, token=token
     )
+
+
+def _build_refreshable_auth_container(hostname, path, token, expiry, get_token):
+    sas_uri = "sb://{}/{}".format(hostname, path)
+    return RefreshableSASTokenAsync(
+        audience=sas_uri, uri=sas_uri, expires_at=float(expiry), token=token, get_token=get_token
+    )
+
+
+def _build_refreshable_auth_container_from_source(hostname, path, get_token):
+    # a reconnecting receiver needs a token that will not expire while it authenticates
+    token, expiry = get_token(time() + TOKEN_MIN_LIFETIME)
+    return _build_refreshable_auth_container(hostname, path, token, expiry, get_token)
@@ -4,13 +4,18 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 import asyncio
+import threading
+import urllib
 
 from typing import List
-
+from knack.log import get_logger
+from azure.cli.core.azclierror import CLIInternalError
 from azext_iot.common._azure import get_iot_central_tokens
 from azext_iot.monitor.models.target import Target
 from azext_iot.monitor.builders._common import convert_token_to_target
 
+logger = get_logger(__name__)
+
 
 def build_central_event_hub_targets(
     cmd, app_id, aad_token, central_dns_suffix
@@ -27,6 +32,57 @@ async def _build_central_event_hub_targets_async(
     cmd, app_id, aad_token, central_dns_suffix
 ):
     all_tokens = get_iot_central_tokens(cmd, app_id, aad_token, central_dns_suffix)
-    targets = [await convert_token_to_target(token) for token in all_tokens.values()]
+    token_source = EventHubTokenSource(
+        cmd, app_id, aad_token, central_dns_suffix, tokens=all_tokens
+    )
+    targets = [
+        await convert_token_to_target(token, get_token=token_source.get_token)
+        for token in all_tokens.values()
+    ]
 
     return targets
+
+
+class EventHubTokenSource:
+    """
+    Event hub SAS tokens of an IoT Central app, shared by all receivers of the app.
+
+    Tokens for every event hub of the app are issued together, so the first receiver that
+    needs a fresh token fetches a new set and the other receivers reuse it.
+    """
+
+    def __init__(self, cmd, app_id, aad_token, central_dns_suffix, tokens: dict = None):
+        self._cmd = cmd
+        self._app_id = app_id
+        self._aad_token = aad_token
+        self._central_dns_suffix = central_dns_suffix
+        self._tokens = tokens or {}
+        self._lock = threading.Lock()
+
+    def get_token(self, hostname: str, path: str, expires_after: float = 0) -> tuple:
+        """
+        Returns a (token, expiry) tuple for the event hub, with an expiry later than expires_after.
+        """
+        with self._lock:
+            token = self._find_token(hostname, path)
+            if not token or float(token[1]) <= expires_after:
+                logger.info("Fetching new event hub tokens for app %s", self._app_id)
+                self._tokens = get_iot_central_tokens(
+                    self._cmd, self._app_id, self._aad_token, self._central_dns_suffix
+                )
+                token = self._find_token(hostname, path)
+            if not token:
+                raise CLIInternalError(
+                    "No event hub token issued for {}/{}.".format(hostname, path)
+                )
+            return token
+
+    def _find_token(self, hostname: str, path: str) -> tuple:
+        for tokens in self._tokens.values():
+            event_hub_token = tokens["eventhubSasToken"]
+            if (
+                event_hub_token["entityPath"] == path
+                and urllib.parse.urlparse(event_hub_token["hostname"]).hostname == hostname
+            ):
+                return event_hub_token["sasToken"], tokens["expiry"]
+        return None
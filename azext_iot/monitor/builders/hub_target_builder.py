@@ -7,6 +7,7 @@
 import asyncio
 import uamqp
 
+from functools import partial
 from azext_iot.common.sas_token_auth import SasTokenAuthentication
 from azext_iot.common.utility import parse_entity, unicode_binary_map, url_encode_str
 from azext_iot.monitor.builders._common import query_meta_data
@@ -95,4 +96,6 @@ class EventTargetBuilder:
         partitions = target["events"]["partition_ids"]
         auth = self._build_auth_container(target)
 
-        return Target(hostname=endpoint, path=path, partitions=partitions, auth=auth)
+        result = Target(hostname=endpoint, path=path, partitions=partitions, auth=auth)
+        result.add_auth_factory(partial(self._build_auth_container, target))
+        return result
@@ -4,7 +4,17 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from azext_iot.monitor.central_validator.validate_schema import validate
+from azext_iot.monitor.central_validator.validate_schema import validate, compile_validator
 from azext_iot.monitor.central_validator.utils import extract_schema_type
+from azext_iot.monitor.central_validator.validation_plan import (
+    ValidationPlan,
+    get_validation_plan,
+)
 
-__all__ = ["validate", "extract_schema_type"]
+__all__ = [
+    "validate",
+    "compile_validator",
+    "extract_schema_type",
+    "ValidationPlan",
+    "get_validation_plan",
+]
@@ -3,6 +3,8 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
+import functools
+
 from azext_iot.common.utility import ISO8601Validator
 from azext_iot.monitor.central_validator import utils
 from azext_iot.monitor.central_validator.validators import enum, geopoint, obj, vector
@@ -49,3 +51,55 @@ def validate(schema, value):
         return False
 
     return validate_function(schema, value)
+
+
+# primitive types validated with a plain isinstance check
+primitive_type_factory = {
+    "boolean": bool,
+    "double": (float, int),
+    "float": (float, int),
+    "integer": int,
+    "long": (float, int),
+    "string": str,
+}
+
+# complex types whose validators can be resolved ahead of time from the schema
+compile_function_factory = {
+    "vector": vector.compile,
+    "Enum": enum.compile,
+    "Object": obj.compile,
+}
+
+
+def compile_validator(schema):
+    """
+    Returns a function equivalent to validate(schema, value), with the schema type and
+    any nested Enum / Object validators resolved once up front.
+    """
+    schema_type = utils.extract_schema_type(schema)
+    validate_function = validation_function_factory.get(schema_type)
+
+    # no or invalid schema type detected, only None is valid
+    if not validate_function:
+        return _is_none
+
+    primitive_type = primitive_type_factory.get(schema_type)
+    if primitive_type:
+        return lambda value: value is None or isinstance(value, primitive_type)
+
+    compile_function = compile_function_factory.get(schema_type)
+    if compile_function:
+        try:
+            validate_function = compile_function(schema)
+        except Exception:
+            # malformed schema, defer to the regular path to handle it per value
+            return lambda value: validate(schema, value)
+    else:
+        validate_function = functools.partial(validate_function, schema)
+
+    # if theres nothing to validate, then its valid
+    return lambda value: value is None or validate_function(value)
+
+
+def _is_none(value):
+    return value is None
@@ -0,0 +1,77 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import weakref
+
+from azext_iot.central.models import BaseTemplate
+from azext_iot.monitor.central_validator import utils
+from azext_iot.monitor.central_validator.validate_schema import compile_validator
+
+# template -> ValidationPlan, dropped along with the template
+_validation_plans = weakref.WeakKeyDictionary()
+
+
+class ValidationPlan:
+    """
+    Device template compiled for telemetry validation.
+
+    For every component and interface of the template, maps each schema name to a
+    (schema type, validator) pair, where validator(value) is equivalent to
+    validate(schema, value). Lookups without a component / interface identifier resolve
+    to the first interface that defines the name, same as Template.get_schema.
+    """
+
+    def __init__(self, template: BaseTemplate):
+        self.interfaces = self._compile_entities(getattr(template, "interfaces", None))
+        self.components = self._compile_entities(template.components)
+        self._interface_fields = self._merge_entities(self.interfaces)
+        self._component_fields = self._merge_entities(self.components)
+
+    def get_fields(self, is_component=False, identifier="") -> dict:
+        if identifier:
+            entities = self.components if is_component else self.interfaces
+            return entities.get(identifier, {})
+
+        return self._component_fields if is_component else self._interface_fields
+
+    def _compile_entities(self, entities: dict) -> dict:
+        return {
+            entity_name: {
+                name: _compile_entry(schema)
+                for name, schema in entity_schemas.items()
+                # empty schemas are reported as name misses by Template.get_schema
+                if schema
+            }
+            for entity_name, entity_schemas in (entities or {}).items()
+        }
+
+    def _merge_entities(self, entities: dict) -> dict:
+        fields = {}
+        for entity_fields in entities.values():
+            for name, entry in entity_fields.items():
+                fields.setdefault(name, entry)
+        return fields
+
+
+def get_validation_plan(template: BaseTemplate) -> ValidationPlan:
+    """Returns the validation plan of template, compiling it on first use."""
+    plan = _validation_plans.get(template)
+    if plan is None:
+        plan = _validation_plans[template] = ValidationPlan(template)
+    return plan
+
+
+def _compile_entry(schema) -> tuple:
+    try:
+        return utils.extract_schema_type(schema), compile_validator(schema)
+    except Exception:
+        # malformed schema, treat it like a schema without a type so a single bad entry
+        # does not fail validation of the whole template
+        return None, _is_valid
+
+
+def _is_valid(value):
+    return True
@@ -15,3 +15,11 @@ def validate(schema, value):
     allowed_values = [item["enumValue"] for item in enum_values if "enumValue" in item]
 
     return value in allowed_values
+
+
+def compile(schema: dict):
+    # resolve the allowed values once, instead of on every validated value
+    enum_values = schema.get("schema", {}).get("enumValues", [])
+    allowed_values = [item["enumValue"] for item in enum_values if "enumValue" in item]
+
+    return lambda value: value in allowed_values
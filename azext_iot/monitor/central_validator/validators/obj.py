@@ -25,3 +25,24 @@ def validate(schema: dict, value: dict):
             return False
 
     return True
+
+
+def compile(schema: dict):
+    # compile every field's validator once, nested objects included
+    fields = schema.get("schema", {}).get("fields", [])
+    field_validators = {
+        field["name"]: validate_schema.compile_validator(field) for field in fields
+    }
+
+    def _validate(value: dict):
+        if not isinstance(value, dict):
+            return False
+
+        for key, val in value.items():
+            field_validator = field_validators.get(key)
+            if not field_validator or not field_validator(val):
+                return False
+
+        return True
+
+    return _validate
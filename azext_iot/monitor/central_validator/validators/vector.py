@@ -4,6 +4,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+VECTOR_KEYS = frozenset(["x", "y", "z"])
+
 
 def validate(schema, value: dict):
     required_keys = set(["x", "y", "z"])
@@ -20,3 +22,16 @@ def validate(schema, value: dict):
             return False
 
     return True
+
+
+def compile(schema):
+    # vectors have a fixed shape, there is nothing to resolve from the schema
+    return _validate_vector
+
+
+def _validate_vector(value) -> bool:
+    return (
+        isinstance(value, dict)
+        and value.keys() == VECTOR_KEYS
+        and all(isinstance(val, (float, int)) for val in value.values())
+    )
@@ -0,0 +1,107 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import re
+
+from time import monotonic
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+OFFSET_IDENTIFIER = b"x-opt-offset"
+SEQUENCE_NUMBER_IDENTIFIER = b"x-opt-sequence-number"
+ENQUEUED_TIME_IDENTIFIER = b"x-opt-enqueued-time"
+
+
+class CheckpointStore:
+    """
+    File backed store of the last event seen per Event Hub partition.
+
+    Checkpoints are kept in memory as events arrive and written to disk at most once per
+    flush interval. Each partition is stored in its own file under
+    <checkpoint_dir>/<event hub>/<consumer group>/<partition>.json so independent monitors
+    sharing a directory never write to the same file.
+    """
+
+    def __init__(self, checkpoint_dir: str, flush_interval: float = 5):
+        self.checkpoint_dir = checkpoint_dir
+        self.flush_interval = flush_interval
+        self._checkpoints = {}
+        self._dirty = set()
+        self._last_flush = monotonic()
+
+    def get_checkpoint(self, target, partition) -> dict:
+        key = self._get_key(target, partition)
+        if key not in self._checkpoints:
+            self._checkpoints[key] = self._load(key)
+        return self._checkpoints[key]
+
+    def update_checkpoint(self, target, partition, message):
+        checkpoint = get_message_checkpoint(message)
+        if checkpoint:
+            self.set_checkpoint(target, partition, checkpoint)
+
+    def set_checkpoint(self, target, partition, checkpoint: dict):
+        key = self._get_key(target, partition)
+        self._checkpoints[key] = checkpoint
+        self._dirty.add(key)
+
+        if monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        for key in list(self._dirty):
+            self._save(key, self._checkpoints[key])
+            self._dirty.discard(key)
+        self._last_flush = monotonic()
+
+    def _get_key(self, target, partition):
+        return (
+            _sanitize("{}_{}".format(target.hostname, target.path)),
+            _sanitize(target.consumer_group or "$Default"),
+            _sanitize(str(partition)),
+        )
+
+    def _get_path(self, key):
+        return os.path.join(self.checkpoint_dir, *key[:-1], "{}.json".format(key[-1]))
+
+    def _load(self, key):
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint file %s: %s", path, e)
+            return None
+
+    def _save(self, key, checkpoint):
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = "{}.tmp".format(path)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, path)
+
+
+def get_message_checkpoint(message) -> dict:
+    """Returns the checkpoint of a message, or None if it has no offset."""
+    annotations = message.annotations or {}
+    offset = annotations.get(OFFSET_IDENTIFIER)
+    if offset is None:
+        return None
+    return {
+        "offset": str(offset, "utf8") if isinstance(offset, bytes) else str(offset),
+        "sequenceNumber": annotations.get(SEQUENCE_NUMBER_IDENTIFIER),
+        "enqueuedTime": annotations.get(ENQUEUED_TIME_IDENTIFIER),
+    }
+
+
+def _sanitize(value: str) -> str:
+    return re.sub(r"[^\w.\-]", "_", value)
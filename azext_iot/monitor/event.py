@@ -4,10 +4,13 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import asyncio
 import json
+import sys
 import uamqp
 import yaml
 
+from time import time
 from typing import Tuple, Union
 from uuid import uuid4
 from knack.log import get_logger
@@ -15,10 +18,14 @@ from azext_iot.constants import USER_AGENT
 from azext_iot.common.shared import AuthenticationTypeDataplane
 from azext_iot.common.utility import process_json_arg
 from azext_iot.monitor.builders.hub_target_builder import AmqpBuilder
-from uamqp.authentication import JWTTokenAuth
+from azext_iot.monitor.feedback import FeedbackCorrelator, get_feedback_records
+from azext_iot.monitor.utility import get_loop
+from uamqp.authentication import JWTTokenAsync, JWTTokenAuth
 
 # To provide amqp frame trace
 DEBUG = False
+FEEDBACK_BATCH_SIZE = 100
+FEEDBACK_RECEIVE_TIMEOUT_MS = 1000
 logger = get_logger(__name__)
 
 
@@ -91,31 +98,31 @@ def send_c2d_message(
     return target_msg_id, errors
 
 
-def monitor_feedback(target, device_id, wait_on_id=None, token_duration=3600):
-    def handle_msg(msg):
-        payload = next(msg.get_data())
-        if isinstance(payload, bytes):
-            payload = str(payload, "utf8")
-        # assume json [] based on spec
-        payload = json.loads(payload)
-        for p in payload:
-            if (
-                device_id
-                and p.get("deviceId")
-                and p["deviceId"].lower() != device_id.lower()
-            ):
-                return None
-            print(yaml.dump({"feedback": p}, default_flow_style=False), flush=True)
-            if wait_on_id:
-                msg_id = p["originalMessageId"]
-                if msg_id == wait_on_id:
-                    return msg_id
-        return None
+def monitor_feedback(
+    target, device_id, wait_on_id=None, token_duration=3600, wait_timeout=None, sent_time=None
+):
+    """
+    Prints C2D feedback records, optionally filtered on a device, until the feedback of every
+    message in wait_on_id (a message id or a list of message ids) has arrived or timed out.
+    When waiting on messages, returns a summary of their delivery status and latency.
+    Delivery latency is only known when sent_time, the time the messages were sent in seconds
+    since the epoch, is given.
+    """
+    wait_on_ids = [wait_on_id] if isinstance(wait_on_id, str) else list(wait_on_id or [])
+    loop = get_loop()
+    correlator = FeedbackCorrelator(timeout=wait_timeout, loop=loop)
+    for message_id in wait_on_ids:
+        correlator.add(message_id, sent_time=sent_time)
+
+    def on_feedback(record):
+        if (
+            device_id
+            and record.get("deviceId")
+            and record["deviceId"].lower() != device_id.lower()
+        ):
+            return
+        print(yaml.dump({"feedback": record}, default_flow_style=False), flush=True)
 
-    operation = "/messages/servicebound/feedback"
-    endpoint_target, token_auth = _get_endpoint_and_token_auth(
-        target=target, operation=operation
-    )
     device_filter_txt = None
     if device_id:
         device_filter_txt = " filtering on device: {},".format(device_id)
@@ -124,24 +131,78 @@ def monitor_feedback(target, device_id, wait_on_id=None, token_duration=3600):
         f"Starting C2D feedback monitor,{device_filter_txt if device_filter_txt else ''} use ctrl-c to stop..."
     )
 
-    try:
-        client = uamqp.ReceiveClient(
-            source=endpoint_target,
-            auth=token_auth,
-            client_name=_get_container_id(),
-            debug=DEBUG,
+    receive = loop.create_task(
+        receive_feedback(
+            target=target,
+            correlator=correlator,
+            on_feedback=on_feedback,
+            until_complete=bool(wait_on_ids),
         )
-        message_generator = client.receive_messages_iter()
-        for msg in message_generator:
-            match = handle_msg(msg)
-            if match:
-                logger.info("Requested message Id has been matched...")
-                msg.accept()
-                return match
+    )
+    try:
+        loop.run_until_complete(receive)
+    except KeyboardInterrupt:
+        # let the receiver close its connection
+        receive.cancel()
+        try:
+            loop.run_until_complete(receive)
+        except asyncio.CancelledError:
+            pass
     except uamqp.errors.AMQPConnectionError:
         logger.debug("AMQPS connection has expired...")
+
+    if not wait_on_ids:
+        return None
+    if len(wait_on_ids) > 1 or correlator.expired:
+        print(correlator.format_text_summary(), end="", file=sys.stderr, flush=True)
+    return correlator.summary()
+
+
+async def receive_feedback(
+    target,
+    correlator: FeedbackCorrelator,
+    on_feedback=None,
+    until_complete=False,
+    batch_size=FEEDBACK_BATCH_SIZE,
+):
+    """
+    Receives C2D feedback messages in batches, passing every record of every message to
+    on_feedback and the records of each message to the correlator as one batch.
+
+    :param until_complete: Stop once the correlator has no outstanding messages, otherwise
+        keep receiving until cancelled.
+    """
+    operation = "/messages/servicebound/feedback"
+    endpoint_target, token_auth = _get_endpoint_and_token_auth(
+        target=target, operation=operation, asynchronous=True
+    )
+    client = uamqp.ReceiveClientAsync(
+        source=endpoint_target,
+        auth=token_auth,
+        client_name=_get_container_id(),
+        debug=DEBUG,
+        prefetch=batch_size,
+    )
+    try:
+        while not (until_complete and not correlator.outstanding):
+            # the receive timeout wakes the loop up to expire waiters past their deadline
+            messages = await client.receive_message_batch_async(
+                max_batch_size=batch_size, timeout=FEEDBACK_RECEIVE_TIMEOUT_MS
+            )
+            received_time = time()
+            for message in messages:
+                records = get_feedback_records(message)
+                if on_feedback:
+                    for record in records:
+                        on_feedback(record)
+                for record in correlator.process_feedback(records, received_time):
+                    logger.info(
+                        "Requested message Id %s has been matched...",
+                        record.get("originalMessageId"),
+                    )
+            correlator.expire()
     finally:
-        client.close()
+        await client.close_async()
 
 
 def _get_container_id():
@@ -149,10 +210,9 @@ def _get_container_id():
 
 
 def _get_endpoint_and_token_auth(
-    target: dict, operation: str
+    target: dict, operation: str, asynchronous: bool = False
 ) -> Tuple[str, Union[JWTTokenAuth, None]]:
     from azext_iot.constants import IOTHUB_RESOURCE_ID
-    from time import time
     from collections import namedtuple
 
     AccessToken = namedtuple("AccessToken", ["token", "expires_on"])
@@ -164,17 +224,29 @@ def _get_endpoint_and_token_auth(
         access_token = AccessToken(f"{creds[0]} {creds[1]}", time() + 3599)
         return access_token
 
+    async def token_provider_async():
+        return await get_loop().run_in_executor(None, token_provider)
+
     endpoint_with_op = None
     jwt_token_auth = None
     if target["policy"] == AuthenticationTypeDataplane.login.value:
         endpoint_with_op = f"amqps://{target['entity']}{operation}"
-        jwt_token_auth = JWTTokenAuth(
-            audience=IOTHUB_RESOURCE_ID,
-            uri=endpoint_with_op,
-            get_token=token_provider,
-            token_type=b"Bearer",
-        )
-        jwt_token_auth.update_token()  # Work-around for uamqp error.
+        if asynchronous:
+            # the async client requests a token itself when it connects
+            jwt_token_auth = JWTTokenAsync(
+                audience=IOTHUB_RESOURCE_ID,
+                uri=endpoint_with_op,
+                get_token=token_provider_async,
+                token_type=b"Bearer",
+            )
+        else:
+            jwt_token_auth = JWTTokenAuth(
+                audience=IOTHUB_RESOURCE_ID,
+                uri=endpoint_with_op,
+                get_token=token_provider,
+                token_type=b"Bearer",
+            )
+            jwt_token_auth.update_token()  # Work-around for uamqp error.
     else:
         endpoint_with_op = f"amqps://{AmqpBuilder.build_iothub_amqp_endpoint_from_target(target)}{operation}"
 
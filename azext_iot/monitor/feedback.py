@@ -0,0 +1,164 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import heapq
+import json
+
+from datetime import datetime, timezone
+from time import time
+from azext_iot.monitor.stats import Histogram
+from azext_iot.monitor.utility import get_loop
+
+FEEDBACK_MESSAGE_ID = "originalMessageId"
+FEEDBACK_STATUS_CODE = "statusCode"
+FEEDBACK_ENQUEUED_TIME = "enqueuedTimeUtc"
+
+
+class _Waiter:
+    __slots__ = ("future", "sent_time", "wait_time")
+
+    def __init__(self, future: asyncio.Future, sent_time: float, wait_time: float):
+        self.future = future
+        self.sent_time = sent_time
+        self.wait_time = wait_time
+
+
+class FeedbackCorrelator:
+    """
+    Correlates cloud-to-device (C2D) feedback records with the ids of messages waiting on them.
+
+    Any number of message ids can be outstanding at once. Each gets a future that completes
+    with its feedback record as soon as the record arrives, or with None once its deadline
+    passes. A count per feedback status is kept along with two histograms:
+
+    - latency_ms: delivery latency, from the time the message was sent to the enqueued time of
+      its feedback record. Only recorded for messages added with their sent time.
+    - wait_ms: time from when the message was added, i.e. the monitor started waiting on it,
+      until its feedback record was received.
+    """
+
+    def __init__(self, timeout: float = None, loop: asyncio.AbstractEventLoop = None):
+        """
+        :param timeout: Default seconds to wait on the feedback of a message. None waits forever.
+        """
+        self.timeout = timeout
+        self.loop = loop or get_loop()
+        self.completed = 0
+        self.expired = 0
+        self.status_codes = {}
+        self.latency_ms = Histogram()
+        self.wait_ms = Histogram()
+        self._waiters = {}
+        self._deadlines = []
+
+    def add(self, message_id: str, sent_time: float = None, timeout: float = None) -> asyncio.Future:
+        """
+        Waits on the feedback of a message, returning a future of its feedback record.
+
+        :param sent_time: Time the message was sent, in seconds since the epoch. Its delivery
+            latency is only recorded when known. The timeout counts from the sent time, or from
+            now without one.
+        """
+        waiter = self._waiters.get(message_id)
+        if waiter:
+            return waiter.future
+
+        wait_time = time()
+        waiter = self._waiters[message_id] = _Waiter(self.loop.create_future(), sent_time, wait_time)
+        timeout = timeout if timeout is not None else self.timeout
+        if timeout is not None:
+            heapq.heappush(self._deadlines, ((sent_time or wait_time) + timeout, message_id))
+        return waiter.future
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._waiters)
+
+    def process_feedback(self, records: list, received_time: float = None) -> list:
+        """
+        Completes the waiters of a batch of feedback records, returning the records that matched.
+        """
+        received_time = received_time or time()
+        matched = []
+        for record in records:
+            waiter = self._waiters.pop(record.get(FEEDBACK_MESSAGE_ID), None)
+            if waiter is None:
+                continue
+
+            status_code = record.get(FEEDBACK_STATUS_CODE) or "Unknown"
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+            self.wait_ms.record((received_time - waiter.wait_time) * 1000)
+            if waiter.sent_time is not None:
+                feedback_time = _parse_feedback_time(record.get(FEEDBACK_ENQUEUED_TIME)) or received_time
+                self.latency_ms.record((feedback_time - waiter.sent_time) * 1000)
+            self.completed += 1
+            if not waiter.future.done():
+                waiter.future.set_result(record)
+            matched.append(record)
+        return matched
+
+    def expire(self, now: float = None) -> int:
+        """Stops waiting on messages past their deadline, returning how many expired."""
+        now = now or time()
+        expired = 0
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, message_id = heapq.heappop(self._deadlines)
+            waiter = self._waiters.pop(message_id, None)
+            if waiter is None:
+                continue
+            expired += 1
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+        self.expired += expired
+        return expired
+
+    def summary(self) -> dict:
+        return {
+            "completed": self.completed,
+            "expired": self.expired,
+            "outstanding": self.outstanding,
+            "statusCodes": dict(sorted(self.status_codes.items())),
+            "latencyMs": self.latency_ms.summary(),
+            "waitMs": self.wait_ms.summary(),
+        }
+
+    def format_text_summary(self) -> str:
+        summary = self.summary()
+        line = "[feedback] {} completed, {} expired, {} outstanding".format(
+            summary["completed"], summary["expired"], summary["outstanding"]
+        )
+        # without sent times, only the wait since the monitor started is known
+        latency, label = summary["latencyMs"], "latency"
+        if not latency["count"]:
+            latency, label = summary["waitMs"], "waited since monitor start"
+        if latency["count"]:
+            line += ", {} p50={}ms p90={}ms p99={}ms max={}ms".format(
+                label, latency["p50"], latency["p90"], latency["p99"], latency["max"]
+            )
+        lines = [line]
+        for status_code, count in summary["statusCodes"].items():
+            lines.append("[feedback]   {}: {}".format(status_code, count))
+        return "\n".join(lines) + "\n"
+
+
+def get_feedback_records(message) -> list:
+    """Returns the feedback records of a feedback message, a JSON array as per the IoT Hub spec."""
+    payload = b"".join(message.get_data())
+    records = json.loads(payload)
+    return records if isinstance(records, list) else [records]
+
+
+def _parse_feedback_time(value: str) -> float:
+    # e.g. 2021-03-09T01:02:03.1234567Z, with up to 7 fractional digits
+    if not value:
+        return None
+    try:
+        seconds, _, fraction = value.rstrip("Z").partition(".")
+        parsed = datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+        return parsed.timestamp() + (float("0." + fraction) if fraction.isdigit() else 0)
+    except ValueError:
+        return None
@@ -4,10 +4,9 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-import csv
 import sys
 
-from typing import List
+from functools import partial
 from knack.log import get_logger
 
 from azext_iot.monitor.utility import stop_monitor, get_loop
@@ -18,7 +17,9 @@ from azext_iot.central.providers import (
 from azext_iot.monitor.handlers import CommonHandler
 from azext_iot.monitor.models.arguments import CentralHandlerArguments
 from azext_iot.monitor.parsers.central_parser import CentralParser
-from azext_iot.monitor.parsers.issue import Issue
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+from azext_iot.monitor.issue_summary import IssueSummary, ISSUE_SUMMARY_TOP_ROLLUPS
+from azext_iot.monitor.template_resolver import CentralTemplateResolver
 
 logger = get_logger(__name__)
 
@@ -40,9 +41,16 @@ class CentralHandler(CommonHandler):
 
         self._central_handler_args = central_handler_args
 
-        self._messages = []
-        self._issues: List[Issue] = []
+        # counters and rollups only, so memory stays flat however long validation runs
+        self._summary = IssueSummary(
+            spool=central_handler_args.style.lower() in ["json", "csv"]
+        )
         self._central_dns_suffix = central_dns_suffix
+        self._template_resolver = CentralTemplateResolver(
+            central_device_provider=central_device_provider,
+            central_template_provider=central_template_provider,
+            central_dns_suffix=central_dns_suffix,
+        )
 
         if self._central_handler_args.duration:
             loop = get_loop()
@@ -51,37 +59,72 @@ class CentralHandler(CommonHandler):
                 self._central_handler_args.duration + 5, self._quit_duration_exceeded
             )
 
+    def warm_up_template_cache(self):
+        """
+        Bulk loads device templates for every device in the app, unless only a single
+        device is being validated.
+        """
+        device_id = self._common_handler_args.device_id
+        if device_id and "*" not in device_id and "?" not in device_id:
+            return
+        print("Loading device templates...", flush=True)
+        try:
+            self._template_resolver.warm_up()
+        except Exception as e:
+            logger.warning(
+                "Unable to preload device templates, they will be fetched as devices send messages: %s",
+                e,
+            )
+
     def validate_message(self, message):
+        if not self._should_process_message(message):
+            return
+
+        # fetching an unknown device's template must not hold up other messages, so
+        # validation of the message is deferred until the template has been resolved
+        device_id = _get_device_id(message)
+        if not self._template_resolver.is_resolved(device_id):
+            self._template_resolver.resolve(
+                device_id, partial(self._validate_message, message)
+            )
+            return
+
+        self._validate_message(message)
+
+    async def drain(self):
+        """Waits until messages deferred on template lookups have been validated."""
+        await self._template_resolver.drain()
+
+    def shutdown(self):
+        """Stops pending template lookups and removes the issue spool, once results are printed."""
+        self._template_resolver.shutdown()
+        self._summary.close()
+
+    def _validate_message(self, message):
         parser = CentralParser(
             message=message,
             common_parser_args=self._common_handler_args.common_parser_args,
             central_device_provider=self._central_device_provider,
             central_template_provider=self._central_template_provider,
             central_dns_suffix=self._central_dns_suffix,
+            template_resolver=self._template_resolver,
         )
 
-        if not self._should_process_device(parser.device_id):
-            return
-
-        if not self._should_process_module(parser.module_id):
-            return
-
-        parsed_message = parser.parse_message()
+        parser.parse_message()
 
-        self._messages.append(parsed_message)
-        n_messages = len(self._messages)
+        n_messages = self._summary.add_message()
 
         issues = parser.issues_handler.get_issues_with_minimum_severity(
             self._central_handler_args.minimum_severity
         )
 
-        self._issues.extend(issues)
-
         self._print_progress_update(n_messages)
 
         if self._central_handler_args.style == "scroll" and issues:
             [issue.log() for issue in issues]
 
+        self._summary.add_issues(issues)
+
         if (
             self._central_handler_args.max_messages
             and n_messages >= self._central_handler_args.max_messages
@@ -122,39 +165,64 @@ class CentralHandler(CommonHandler):
             print("Processed {} messages...".format(n_messages), flush=True)
 
     def _print_results(self):
-        n_messages = len(self._messages)
+        n_messages = self._summary.message_count
 
-        if not self._issues:
+        if not self._summary.issue_count:
             print("No errors detected after parsing {} message(s).".format(n_messages))
             return
 
         if self._central_handler_args.style.lower() == "scroll":
+            self._handle_scroll_summary()
             return
 
         print("Processing and displaying results.")
 
-        issues = [issue.json_repr() for issue in self._issues]
-
         if self._central_handler_args.style.lower() == "json":
-            self._handle_json_summary(issues)
+            self._handle_json_summary()
             return
 
         if self._central_handler_args.style.lower() == "csv":
-            self._handle_csv_summary(issues)
+            self._handle_csv_summary()
             return
 
-    def _handle_json_summary(self, issues: List[Issue]):
-        import json
+    def _handle_scroll_summary(self):
+        summary = self._summary.summary()
+        print(
+            "Found {} issue(s) after parsing {} message(s): {}.".format(
+                summary["issues"],
+                summary["messages"],
+                ", ".join(
+                    "{} {}".format(count, severity)
+                    for severity, count in summary["severities"].items()
+                ),
+            )
+        )
+        for rollup in summary["rollups"][:ISSUE_SUMMARY_TOP_ROLLUPS]:
+            print(
+                "[{}] [DeviceId: {}] [TemplateId: {}] {} x {}".format(
+                    rollup["severity"].upper(),
+                    rollup["device_id"],
+                    rollup["template_id"],
+                    rollup["count"],
+                    rollup["issue_type"],
+                )
+            )
+        print("Example issue(s):")
+        for issue in summary["sample"]:
+            print(
+                "[{}] [DeviceId: {}] {}\n    Message: {}".format(
+                    issue["severity"].upper(),
+                    issue["device_id"],
+                    issue["details"],
+                    issue["message"],
+                )
+            )
 
-        output = json.dumps(issues, indent=4)
-        print(output)
+    def _handle_json_summary(self):
+        self._summary.write_json(sys.stdout)
 
-    def _handle_csv_summary(self, issues: List[Issue]):
-        fieldnames = ["severity", "details", "message", "device_id", "template_id"]
-        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
-        writer.writeheader()
-        for issue in issues:
-            writer.writerow(issue)
+    def _handle_csv_summary(self):
+        self._summary.write_csv(sys.stdout)
 
     def _quit_messages_exceeded(self):
         message = "Successfully parsed {} message(s).".format(
@@ -171,3 +239,11 @@ class CentralHandler(CommonHandler):
         print(message, flush=True)
         self._print_results()
         stop_monitor()
+
+
+def _get_device_id(message) -> str:
+    # same fallback as CommonParser, an unknown device resolves to a template error
+    try:
+        return str(message.annotations.get(DEVICE_ID_IDENTIFIER), "utf8")
+    except Exception:
+        return ""
@@ -8,33 +8,91 @@ import json
 import re
 import yaml
 
+from functools import lru_cache
+from azext_iot.monitor.aggregator import TelemetryAggregator
 from azext_iot.monitor.base_classes import AbstractBaseEventsHandler
-from azext_iot.monitor.parsers.common_parser import CommonParser
+from azext_iot.monitor.parsers.common_parser import (
+    CommonParser,
+    DEVICE_ID_IDENTIFIER,
+    MODULE_ID_IDENTIFIER,
+    INTERFACE_NAME_IDENTIFIER_V1,
+    INTERFACE_NAME_IDENTIFIER_V2,
+)
 from azext_iot.monitor.models.arguments import CommonHandlerArguments
+from azext_iot.monitor.sampling import DeviceSampler
+from azext_iot.monitor.sink import NdjsonSink
 
 
 class CommonHandler(AbstractBaseEventsHandler):
-    def __init__(self, common_handler_args: CommonHandlerArguments):
+    def __init__(self, common_handler_args: CommonHandlerArguments, sink: NdjsonSink = None):
         super(CommonHandler, self).__init__()
         self._common_handler_args = common_handler_args
+        self._sink = sink
+
+        # Filters are resolved once against the raw annotation bytes so that messages
+        # which are filtered out never pay for a parser.
+        self._device_id_filter = _build_id_filter(common_handler_args.device_id)
+        self._module_id_filter = _build_id_filter(common_handler_args.module_id)
+        self._interface_name_filter = common_handler_args.interface_name.encode("utf8")
+        self._devices_filter = frozenset(
+            device_id.encode("utf8") for device_id in common_handler_args.devices
+        )
+
+        self.aggregator = None
+        if common_handler_args.aggregate_window:
+            self.aggregator = TelemetryAggregator(
+                window=common_handler_args.aggregate_window,
+                emit=self.output_message,
+                group_by=common_handler_args.aggregate_by,
+            )
+
+        self.sampler = None
+        if common_handler_args.sample_every or common_handler_args.sample_rate:
+            self.sampler = DeviceSampler(
+                every=common_handler_args.sample_every,
+                rate=common_handler_args.sample_rate,
+            )
 
     def parse_message(self, message):
+        result = self.process_message(message)
+        if result is not None:
+            self.emit_message(result)
+
+    def emit_message(self, result):
+        """
+        Outputs a parsed event, or when aggregating, adds it to the rollups of the current window.
+        """
+        if self.aggregator:
+            self.aggregator.add(result)
+            return
+        self.output_message(result)
+
+    def process_message(self, message):
+        """
+        Filters, samples and parses a message, returning None if it is filtered out or
+        suppressed. The sampler is the only handler state it touches and it is thread safe,
+        so this is safe to run on a worker thread.
+        """
+        if not self._should_process_message(message, check_interface=True):
+            return None
+
+        if self.sampler and not self.sampler.should_sample(
+            _get_annotation_bytes(message.annotations or {}, DEVICE_ID_IDENTIFIER)
+        ):
+            return None
+
         parser = CommonParser(
             message=message,
             common_parser_args=self._common_handler_args.common_parser_args,
         )
 
-        if not self._should_process_device(parser.device_id):
-            return
-
-        if not self._should_process_interface(parser.interface_name):
-            return
+        return parser.parse_message()
 
-        if not self._should_process_module(parser.module_id):
+    def output_message(self, result):
+        if self._sink:
+            self._sink.write(result)
             return
 
-        result = parser.parse_message()
-
         if self._common_handler_args.output.lower() == "json":
             dump = json.dumps(result, indent=4)
         else:
@@ -42,6 +100,33 @@ class CommonHandler(AbstractBaseEventsHandler):
 
         print(dump, flush=True)
 
+    def _should_process_message(self, message, check_interface=False):
+        """
+        Applies the device, module and (optionally) interface filters directly against the
+        raw message annotations, before any parsing takes place.
+        """
+        annotations = message.annotations or {}
+
+        device_id = _get_annotation_bytes(annotations, DEVICE_ID_IDENTIFIER)
+        if self._devices_filter and device_id not in self._devices_filter:
+            return False
+        if self._device_id_filter and not self._device_id_filter(device_id):
+            return False
+
+        if self._module_id_filter and not self._module_id_filter(
+            _get_annotation_bytes(annotations, MODULE_ID_IDENTIFIER)
+        ):
+            return False
+
+        if check_interface and self._interface_name_filter:
+            interface_name = _get_annotation_bytes(
+                annotations, INTERFACE_NAME_IDENTIFIER_V1
+            ) or _get_annotation_bytes(annotations, INTERFACE_NAME_IDENTIFIER_V2)
+            if interface_name != self._interface_name_filter:
+                return False
+
+        return True
+
     def _should_process_device(self, device_id):
         expected_device_id = self._common_handler_args.device_id
         expected_devices = self._common_handler_args.devices
@@ -56,11 +141,7 @@ class CommonHandler(AbstractBaseEventsHandler):
     def _perform_id_match(self, expected_id, actual_id):
         if expected_id and expected_id != actual_id:
             if "*" in expected_id or "?" in expected_id:
-                regex = (
-                    re.escape(expected_id).replace("\\*", ".*").replace("\\?", ".")
-                    + "$"
-                )
-                if not re.match(regex, actual_id):
+                if not _compile_id_pattern(expected_id).match(actual_id):
                     return False
             else:
                 return False
@@ -79,3 +160,30 @@ class CommonHandler(AbstractBaseEventsHandler):
     def _should_process_module(self, module_id):
         expected_module_id = self._common_handler_args.module_id
         return self._perform_id_match(expected_module_id, module_id)
+
+
+@lru_cache(maxsize=None)
+def _compile_id_pattern(expected_id: str):
+    return re.compile(
+        re.escape(expected_id).replace("\\*", ".*").replace("\\?", ".") + "$"
+    )
+
+
+def _build_id_filter(expected_id: str):
+    """
+    Returns a predicate over raw (utf8 encoded) id bytes, or None if no filter is set.
+    """
+    if not expected_id:
+        return None
+
+    if "*" in expected_id or "?" in expected_id:
+        pattern = _compile_id_pattern(expected_id).pattern.encode("utf8")
+        return re.compile(pattern).match
+
+    return expected_id.encode("utf8").__eq__
+
+
+def _get_annotation_bytes(annotations: dict, key: bytes) -> bytes:
+    # mirrors CommonParser, which treats missing or non binary annotations as empty
+    value = annotations.get(key)
+    return value if isinstance(value, bytes) else b""
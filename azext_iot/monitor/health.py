@@ -0,0 +1,159 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import random
+import uamqp
+
+from time import time
+from azext_iot.monitor.stats import _format_partition_key
+
+RECONNECT_INITIAL_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+RECONNECT_MULTIPLIER = 2
+RECONNECT_JITTER = 0.5
+
+PARTITION_CONNECTING = "connecting"
+PARTITION_RECEIVING = "receiving"
+PARTITION_RECONNECTING = "reconnecting"
+PARTITION_CLOSED = "closed"
+PARTITION_FAILED = "failed"
+
+
+class ReconnectPolicy:
+    """
+    When and how quickly a partition receiver reconnects after losing its link or connection.
+
+    Delays grow exponentially from initial_delay up to max_delay, and each delay is shortened
+    by a random fraction of up to jitter so that partitions dropped together by the same
+    outage do not all reconnect at the same moment. max_attempts limits consecutive failed
+    attempts; the count starts over once a reconnected receiver gets a message.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        initial_delay: float = RECONNECT_INITIAL_DELAY,
+        max_delay: float = RECONNECT_MAX_DELAY,
+        multiplier: float = RECONNECT_MULTIPLIER,
+        jitter: float = RECONNECT_JITTER,
+    ):
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self._error_policy = uamqp.errors.ErrorPolicy()
+
+    def get_delay(self, attempt: int) -> float:
+        """Seconds to wait before the given attempt, the first attempt being 1."""
+        delay = min(self.initial_delay * self.multiplier ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """Whether to make the given attempt after error."""
+        return attempt <= self.max_attempts and self.is_retriable(error)
+
+    def is_retriable(self, error: Exception) -> bool:
+        # errors uamqp itself would never retry, such as unauthorized access, a missing
+        # consumer group or another receiver taking over the partition, are not retried
+        if isinstance(error, uamqp.errors.LinkRedirect):
+            return False
+        if isinstance(error, uamqp.errors.LinkDetach):
+            return self._error_policy.on_link_error(error).retry
+        if isinstance(error, uamqp.errors.ConnectionClose):
+            return self._error_policy.on_connection_error(error).retry
+        return isinstance(
+            error, (uamqp.errors.AMQPConnectionError, uamqp.errors.TokenExpired)
+        )
+
+
+class _PartitionHealth:
+    def __init__(self):
+        self.state = PARTITION_CONNECTING
+        self.connects = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_error_time = None
+
+    def summary(self) -> dict:
+        return {
+            "state": self.state,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+            "lastError": self.last_error,
+            "lastErrorTime": self.last_error_time,
+        }
+
+
+class MonitorHealth:
+    """
+    Connection health counters per partition receiver, keyed like ~azext_iot.monitor.stats.MonitorStats
+    by (event hub path, partition id).
+    """
+
+    def __init__(self):
+        self._partitions = {}
+
+    def connected(self, key):
+        health = self._get_health(key)
+        health.state = PARTITION_RECEIVING
+        health.connects += 1
+
+    def disconnected(self, key, error: Exception):
+        health = self._record_error(key, error)
+        health.state = PARTITION_RECONNECTING
+        health.reconnects += 1
+
+    def failed(self, key, error: Exception):
+        self._record_error(key, error).state = PARTITION_FAILED
+
+    def closed(self, key):
+        health = self._get_health(key)
+        if health.state != PARTITION_FAILED:
+            health.state = PARTITION_CLOSED
+
+    @property
+    def reconnects(self) -> int:
+        return sum(health.reconnects for health in self._partitions.values())
+
+    def summary(self) -> dict:
+        partitions = {
+            _format_partition_key(key, self._partitions): health.summary()
+            for key, health in sorted(self._partitions.items())
+        }
+        return {
+            "connects": sum(health.connects for health in self._partitions.values()),
+            "reconnects": self.reconnects,
+            "errors": sum(health.errors for health in self._partitions.values()),
+            "partitions": partitions,
+        }
+
+    def format_text_summary(self) -> str:
+        lines = []
+        for partition, health in self.summary()["partitions"].items():
+            if not health["reconnects"] and health["state"] != PARTITION_FAILED:
+                continue
+            lines.append(
+                "[health] partition {}: {}, {} reconnects, last error: {}".format(
+                    partition, health["state"], health["reconnects"], health["lastError"]
+                )
+            )
+        return "".join(line + "\n" for line in lines)
+
+    def _record_error(self, key, error: Exception) -> _PartitionHealth:
+        health = self._get_health(key)
+        health.errors += 1
+        health.last_error = str(error)
+        health.last_error_time = round(time(), 3)
+        return health
+
+    def _get_health(self, key) -> _PartitionHealth:
+        health = self._partitions.get(key)
+        if health is None:
+            health = self._partitions[key] = _PartitionHealth()
+        return health
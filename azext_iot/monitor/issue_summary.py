@@ -0,0 +1,149 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import csv
+import json
+import random
+import re
+import tempfile
+import textwrap
+
+from typing import List
+from azext_iot.monitor.parsers.issue import Issue
+
+ISSUE_SAMPLE_SIZE = 5
+ISSUE_SUMMARY_TOP_ROLLUPS = 20
+ISSUE_CSV_FIELDNAMES = ["severity", "details", "message", "device_id", "template_id"]
+
+_QUOTED_VALUE_REGEX = re.compile(r"'[^']*'")
+_FIRST_SENTENCE_REGEX = re.compile(r"\.(\s|$)")
+
+
+class IssueSummary:
+    """
+    Bounded memory summary of the issues found while validating messages.
+
+    Keeps a message counter, issue counts per severity, a rollup count per
+    (device, template, issue type) and a fixed size reservoir sample of example issues.
+    When spooling, every issue is also appended to a temporary file as it is found, so the
+    full list can be written out at the end without ever being held in memory.
+    """
+
+    def __init__(self, spool: bool = False, sample_size: int = ISSUE_SAMPLE_SIZE):
+        self.message_count = 0
+        self.issue_count = 0
+        self.severity_counts = {}
+        self.rollups = {}
+        self.sample = []
+        self._sample_size = sample_size
+        self._random = random.Random()
+        self._spool = (
+            tempfile.TemporaryFile(mode="w+", encoding="utf-8") if spool else None
+        )
+
+    def add_message(self) -> int:
+        self.message_count += 1
+        return self.message_count
+
+    def add_issues(self, issues: List[Issue]):
+        for issue in issues:
+            self.issue_count += 1
+            self.severity_counts[issue.severity] = (
+                self.severity_counts.get(issue.severity, 0) + 1
+            )
+
+            key = (
+                issue.device_id,
+                getattr(issue, "template_id", "Unknown"),
+                get_issue_type(issue.details),
+            )
+            rollup = self.rollups.get(key)
+            if rollup is None:
+                rollup = self.rollups[key] = {"severity": issue.severity, "count": 0}
+            rollup["count"] += 1
+
+            issue_repr = _get_issue_repr(issue)
+
+            # reservoir sampling, every issue seen so far is equally likely to be kept
+            if len(self.sample) < self._sample_size:
+                self.sample.append(issue_repr)
+            else:
+                index = self._random.randrange(self.issue_count)
+                if index < self._sample_size:
+                    self.sample[index] = issue_repr
+
+            if self._spool:
+                self._spool.write(json.dumps(issue_repr) + "\n")
+
+    def iter_issues(self):
+        """Yields every spooled issue, in the order it was found."""
+        if not self._spool:
+            return
+        self._spool.flush()
+        self._spool.seek(0)
+        for line in self._spool:
+            yield json.loads(line)
+        self._spool.seek(0, 2)
+
+    def write_json(self, stream):
+        # matches json.dumps(issues, indent=4) without materializing the list
+        stream.write("[")
+        separator = "\n"
+        for issue in self.iter_issues():
+            stream.write(separator)
+            stream.write(textwrap.indent(json.dumps(issue, indent=4), " " * 4))
+            separator = ",\n"
+        stream.write("\n]\n" if separator != "\n" else "]\n")
+
+    def write_csv(self, stream):
+        writer = csv.DictWriter(stream, fieldnames=ISSUE_CSV_FIELDNAMES)
+        writer.writeheader()
+        for issue in self.iter_issues():
+            writer.writerow(issue)
+
+    def summary(self) -> dict:
+        rollups = sorted(
+            self.rollups.items(), key=lambda item: item[1]["count"], reverse=True
+        )
+        return {
+            "messages": self.message_count,
+            "issues": self.issue_count,
+            "severities": {
+                severity.name: count for severity, count in self.severity_counts.items()
+            },
+            "rollups": [
+                {
+                    "device_id": device_id,
+                    "template_id": template_id,
+                    "issue_type": issue_type,
+                    "severity": rollup["severity"].name,
+                    "count": rollup["count"],
+                }
+                for (device_id, template_id, issue_type), rollup in rollups
+            ],
+            "sample": list(self.sample),
+        }
+
+    def close(self):
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+
+
+def get_issue_type(details: str) -> str:
+    """
+    Reduces issue details to a stable issue type: the first sentence, with quoted
+    values (field names, values sent by the device, ...) blanked out.
+    """
+    details = _QUOTED_VALUE_REGEX.sub("''", details or "")
+    return _FIRST_SENTENCE_REGEX.split(details, maxsplit=1)[0].strip()
+
+
+def _get_issue_repr(issue: Issue) -> dict:
+    # same shape as Issue.json_repr, without modifying the issue
+    issue_repr = dict(vars(issue))
+    issue_repr["severity"] = issue.severity.name
+    return issue_repr
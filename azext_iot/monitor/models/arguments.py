@@ -4,6 +4,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from azure.cli.core.azclierror import InvalidArgumentValueError
 from azure.cli.core.commands import AzCliCommand
 from azext_iot.common.utility import init_monitoring
 from azext_iot.monitor.models.enum import Severity
@@ -18,6 +19,8 @@ class TelemetryArguments:
         enqueued_time: int,
         repair: bool,
         yes: bool,
+        record: str = None,
+        max_reconnects: int = None,
     ):
         (enqueued_time, unique_properties, timeout_ms, output) = init_monitoring(
             cmd=cmd,
@@ -31,6 +34,11 @@ class TelemetryArguments:
         self.timeout = timeout_ms
         self.properties = unique_properties
         self.enqueued_time = enqueued_time
+        self.record = record
+
+        if max_reconnects is not None and max_reconnects < 0:
+            raise InvalidArgumentValueError("Max reconnects cannot be negative.")
+        self.max_reconnects = max_reconnects
 
 
 class CommonParserArguments:
@@ -50,6 +58,10 @@ class CommonHandlerArguments:
         device_id="",
         interface_name="",
         module_id="",
+        aggregate_window: int = None,
+        aggregate_by: list = None,
+        sample_every: int = None,
+        sample_rate: float = None,
     ):
         self.output = output
         self.devices = devices or []
@@ -57,6 +69,10 @@ class CommonHandlerArguments:
         self.interface_name = interface_name or ""
         self.module_id = module_id or ""
         self.common_parser_args = common_parser_args
+        self.aggregate_window = aggregate_window
+        self.aggregate_by = aggregate_by or []
+        self.sample_every = sample_every
+        self.sample_rate = sample_rate
 
 
 class CentralHandlerArguments:
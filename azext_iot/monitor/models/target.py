@@ -18,6 +18,20 @@ class Target:
         self.auth = auth
         self.partitions = partitions
         self.consumer_group = None
+        self.auth_factory = None
 
     def add_consumer_group(self, consumer_group: str):
         self.consumer_group = consumer_group
+
+    def add_auth_factory(self, auth_factory):
+        """
+        :param auth_factory: A callable returning a new auth container for this target.
+            Auth containers are bound to the connection they were first used on, so a
+            receiver that reconnects needs a new one.
+        """
+        self.auth_factory = auth_factory
+
+    def build_auth(self):
+        if self.auth_factory:
+            return self.auth_factory()
+        return self.auth
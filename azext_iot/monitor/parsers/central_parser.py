@@ -11,10 +11,11 @@ from uamqp.message import Message
 from azext_iot.central.providers import CentralDeviceProvider
 from azext_iot.central.providers import CentralDeviceTemplateProvider
 from azext_iot.monitor.parsers import strings
-from azext_iot.monitor.central_validator import validate, extract_schema_type
+from azext_iot.monitor.central_validator import get_validation_plan
 from azext_iot.monitor.models.arguments import CommonParserArguments
 from azext_iot.monitor.models.enum import Severity
 from azext_iot.monitor.parsers.common_parser import CommonParser
+from azext_iot.monitor.template_resolver import CentralTemplateResolver
 from azext_iot.constants import CENTRAL_ENDPOINT
 from azext_iot.central.models.v1 import TemplateV1
 
@@ -27,6 +28,7 @@ class CentralParser(CommonParser):
         central_device_provider: CentralDeviceProvider,
         central_template_provider: CentralDeviceTemplateProvider,
         central_dns_suffix=CENTRAL_ENDPOINT,
+        template_resolver: CentralTemplateResolver = None,
     ):
         super(CentralParser, self).__init__(
             message=message, common_parser_args=common_parser_args
@@ -34,6 +36,7 @@ class CentralParser(CommonParser):
         self._central_device_provider = central_device_provider
         self._central_template_provider = central_template_provider
         self._central_dns_suffix = central_dns_suffix
+        self._template_resolver = template_resolver
         self._template_id = None
 
     def _add_central_issue(self, severity: Severity, details: str):
@@ -119,12 +122,17 @@ class CentralParser(CommonParser):
 
     def _get_template(self):
         try:
-            device = self._central_device_provider.get_device(
-                self.device_id, central_dns_suffix=self._central_dns_suffix
-            )
-            template = self._central_template_provider.get_device_template(
-                device.template, central_dns_suffix=self._central_dns_suffix
-            )
+            if self._template_resolver and self._template_resolver.is_resolved(
+                self.device_id
+            ):
+                template = self._template_resolver.get_template(self.device_id)
+            else:
+                device = self._central_device_provider.get_device(
+                    self.device_id, central_dns_suffix=self._central_dns_suffix
+                )
+                template = self._central_template_provider.get_device_template(
+                    device.template, central_dns_suffix=self._central_dns_suffix
+                )
             self._template_id = template.id
             return template
         except Exception as e:
@@ -137,17 +145,16 @@ class CentralParser(CommonParser):
     def _validate_payload(
         self, payload: dict, template: TemplateV1, is_component: bool
     ):
+        fields = get_validation_plan(template).get_fields(
+            is_component=is_component, identifier=self.component_name
+        )
         name_miss = []
         for telemetry_name, telemetry in payload.items():
-            schema = template.get_schema(
-                name=telemetry_name,
-                identifier=self.component_name,
-                is_component=is_component,
-            )
-            if not schema:
+            field = fields.get(telemetry_name)
+            if not field:
                 name_miss.append(telemetry_name)
             else:
-                self._process_telemetry(telemetry_name, schema, telemetry)
+                self._process_telemetry(telemetry_name, field, telemetry)
 
         if name_miss:
             if is_component:
@@ -161,10 +168,9 @@ class CentralParser(CommonParser):
                 )
             self._add_central_issue(severity=Severity.warning, details=details)
 
-    def _process_telemetry(self, telemetry_name: str, schema, telemetry):
-        expected_type = extract_schema_type(schema)
-        is_payload_valid = validate(schema, telemetry)
-        if expected_type and not is_payload_valid:
+    def _process_telemetry(self, telemetry_name: str, field: tuple, telemetry):
+        expected_type, validate = field
+        if expected_type and not validate(telemetry):
             details = strings.invalid_primitive_schema_mismatch_template(
                 telemetry_name, expected_type, telemetry
             )
@@ -9,9 +9,9 @@ import re
 
 from uamqp.message import Message
 
-from azext_iot.common.utility import parse_entity, unicode_binary_map
 from azext_iot.monitor.base_classes import AbstractBaseParser
 from azext_iot.monitor.parsers import strings
+from azext_iot.monitor.parsers.message_view import MessageView, SYSTEM_PROPERTY_NAMES
 from azext_iot.monitor.models.arguments import CommonParserArguments
 from azext_iot.monitor.models.enum import Severity
 from azext_iot.monitor.parsers.issue import IssueHandler
@@ -21,6 +21,9 @@ MODULE_ID_IDENTIFIER = b"iothub-connection-module-id"
 INTERFACE_NAME_IDENTIFIER_V1 = b"iothub-interface-name"
 INTERFACE_NAME_IDENTIFIER_V2 = b"dt-dataschema"
 COMPONENT_NAME_IDENTIFIER = b"dt-subject"
+ESCAPED_NEWLINE_REGEX = re.compile(r"(\\r\\n)+|\\r+|\\n+")
+# system properties needed to parse the payload, when system properties are not requested
+CONTENT_PROPERTY_NAMES = ("content_encoding", "content_type")
 
 
 class CommonParser(AbstractBaseParser):
@@ -28,6 +31,7 @@ class CommonParser(AbstractBaseParser):
         self.issues_handler = IssueHandler()
         self._common_parser_args = common_parser_args
         self._message = message
+        self._message_view = MessageView(message)
         self.device_id = ""  # need to default
         self.device_id = self._parse_device_id(message)
         self.module_id = self._parse_module_id(message)
@@ -53,7 +57,11 @@ class CommonParser(AbstractBaseParser):
         if not properties:
             properties = []  # guard against None being passed in
 
-        system_properties = self._parse_system_properties(message)
+        include_system_properties = "sys" in properties or "all" in properties
+        system_properties = self._parse_system_properties(
+            self._message_view,
+            SYSTEM_PROPERTY_NAMES if include_system_properties else CONTENT_PROPERTY_NAMES,
+        )
 
         self._parse_content_encoding(message, system_properties)
 
@@ -63,14 +71,16 @@ class CommonParser(AbstractBaseParser):
             event["properties"] = {}
 
         if "anno" in properties or "all" in properties:
-            annotations = self._parse_annotations(message)
+            annotations = self._parse_annotations(self._message_view)
             event["annotations"] = annotations
 
-        if system_properties and ("sys" in properties or "all" in properties):
+        if system_properties and include_system_properties:
             event["properties"]["system"] = system_properties
 
         if "app" in properties or "all" in properties:
-            application_properties = self._parse_application_properties(message)
+            application_properties = self._parse_application_properties(
+                self._message_view
+            )
             event["properties"]["application"] = application_properties
 
         payload = self._parse_payload(message, content_type)
@@ -125,9 +135,11 @@ class CommonParser(AbstractBaseParser):
         except Exception:
             return ""
 
-    def _parse_system_properties(self, message: Message):
+    def _parse_system_properties(
+        self, message_view: MessageView, names=SYSTEM_PROPERTY_NAMES
+    ):
         try:
-            return unicode_binary_map(parse_entity(message.properties, True))
+            return message_view.get_system_properties(names)
         except Exception:
             details = strings.invalid_system_properties()
             self._add_issue(severity=Severity.warning, details=details)
@@ -173,17 +185,17 @@ class CommonParser(AbstractBaseParser):
 
         return actual_content_type
 
-    def _parse_annotations(self, message: Message):
+    def _parse_annotations(self, message_view: MessageView):
         try:
-            return unicode_binary_map(message.annotations)
+            return message_view.annotations
         except Exception:
             details = strings.invalid_annotations()
             self._add_issue(severity=Severity.warning, details=details)
             return {}
 
-    def _parse_application_properties(self, message: Message):
+    def _parse_application_properties(self, message_view: MessageView):
         try:
-            return unicode_binary_map(message.application_properties)
+            return message_view.application_properties
         except Exception:
             details = strings.invalid_application_properties()
             self._add_issue(severity=Severity.warning, details=details)
@@ -204,8 +216,7 @@ class CommonParser(AbstractBaseParser):
     def _try_parse_json(self, payload):
         result = payload
         try:
-            regex = r"(\\r\\n)+|\\r+|\\n+"
-            payload_no_white_space = re.compile(regex).sub("", payload)
+            payload_no_white_space = ESCAPED_NEWLINE_REGEX.sub("", payload)
             result = json.loads(payload_no_white_space)
         except Exception:
             details = strings.invalid_json()
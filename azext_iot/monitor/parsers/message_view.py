@@ -0,0 +1,83 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+from uamqp.message import Message
+from azext_iot.common.utility import unicode_binary_map
+
+# public fields of ~uamqp.message.MessageProperties, in the order parse_entity lists them
+SYSTEM_PROPERTY_NAMES = (
+    "absolute_expiry_time",
+    "content_encoding",
+    "content_type",
+    "correlation_id",
+    "creation_time",
+    "group_id",
+    "group_sequence",
+    "message_id",
+    "reply_to",
+    "reply_to_group_id",
+    "subject",
+    "to",
+    "user_id",
+)
+
+_UNSET = object()
+
+
+class MessageView:
+    """
+    Lazily decoded view of a ~uamqp.message.Message.
+
+    Replaces reflecting over the whole message with parse_entity: each field is only read and
+    decoded from bytes to str when it is asked for, and the decoded value is cached for the
+    lifetime of the view. Decoding errors are raised to the caller on every access.
+    """
+
+    __slots__ = (
+        "message",
+        "_annotations",
+        "_application_properties",
+        "_system_properties",
+    )
+
+    def __init__(self, message: Message):
+        self.message = message
+        self._annotations = _UNSET
+        self._application_properties = _UNSET
+        self._system_properties = {}
+
+    @property
+    def annotations(self) -> dict:
+        """Decoded message annotations."""
+        if self._annotations is _UNSET:
+            self._annotations = unicode_binary_map(self.message.annotations)
+        return self._annotations
+
+    @property
+    def application_properties(self) -> dict:
+        """Decoded application properties."""
+        if self._application_properties is _UNSET:
+            self._application_properties = unicode_binary_map(
+                self.message.application_properties
+            )
+        return self._application_properties
+
+    def get_system_properties(self, names=SYSTEM_PROPERTY_NAMES) -> dict:
+        """
+        Decoded system properties (~uamqp.message.MessageProperties) limited to names,
+        leaving out empty values, same as unicode_binary_map(parse_entity(properties, True)).
+        """
+        result = {}
+        for name in names:
+            value = self._system_properties.get(name, _UNSET)
+            if value is _UNSET:
+                value = getattr(self.message.properties, name, None)
+                if isinstance(value, bytes):
+                    value = str(value, "utf8")
+                self._system_properties[name] = value
+            if value:
+                result[name] = value
+        return result
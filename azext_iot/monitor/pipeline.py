@@ -0,0 +1,120 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+PIPELINE_DEFAULT_WORKERS = 4
+PIPELINE_DEFAULT_QUEUE_SIZE = 256
+
+
+class MessagePipeline:
+    """
+    Moves message processing off the receive loop onto a pool of worker threads.
+
+    process(message) runs on the pool and should hold the expensive, side effect free work
+    such as decoding, parsing and validation. Its result is passed to emit(result) on the
+    event loop, so output is never interleaved. A None result is not emitted.
+
+    Each partition receiver opens its own lane. Messages put on a lane are submitted to the
+    pool right away but emitted strictly in the order they were put, so ordering within a
+    partition is kept while partitions progress independently. A lane holds at most
+    queue_size messages in flight; once full, put waits, which stops the receiver from taking
+    further messages off the AMQP link until the lane catches up.
+    """
+
+    def __init__(
+        self,
+        process,
+        emit,
+        workers: int = PIPELINE_DEFAULT_WORKERS,
+        queue_size: int = PIPELINE_DEFAULT_QUEUE_SIZE,
+    ):
+        self.process = process
+        self.emit = emit
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="monitor-pipeline"
+        )
+
+    def open_lane(self, on_processed=None) -> "PipelineLane":
+        """
+        :param on_processed: Optional callback, invoked on the event loop with the time in
+            seconds each message spent in process.
+        """
+        return PipelineLane(self, on_processed=on_processed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class PipelineLane:
+    def __init__(self, pipeline: MessagePipeline, on_processed=None):
+        self._pipeline = pipeline
+        self._on_processed = on_processed
+        self._loop = asyncio.get_event_loop()
+        self._queue = asyncio.Queue(maxsize=pipeline.queue_size)
+        self._error = None
+        self._consumer = self._loop.create_task(self._consume())
+
+    async def put(self, message, on_emitted=None):
+        """
+        Submits a message for processing, waiting while the lane is full.
+
+        :param on_emitted: Optional callback, invoked on the event loop once the result
+            of this message has been emitted.
+        """
+        self._raise_on_error()
+        future = self._loop.run_in_executor(
+            self._pipeline._executor, self._process, message
+        )
+        await self._queue.put((future, on_emitted))
+
+    async def close(self):
+        """Waits for all messages put on the lane to be emitted."""
+        if not self._consumer.done():
+            await self._queue.put(None)
+            await asyncio.wait([self._consumer])
+        self._raise_on_error()
+
+    def cancel(self):
+        """Stops emitting without waiting for messages in flight."""
+        if not self._consumer.done():
+            self._consumer.cancel()
+
+    async def _consume(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            future, on_emitted = item
+            try:
+                result, elapsed = await future
+                if self._on_processed:
+                    self._on_processed(elapsed)
+                if result is not None:
+                    self._pipeline.emit(result)
+                if on_emitted:
+                    on_emitted()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error = e
+                # unblock any pending put, the receiver fails on its next call
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                return
+
+    def _process(self, message):
+        start = perf_counter()
+        result = self._pipeline.process(message)
+        return result, perf_counter() - start
+
+    def _raise_on_error(self):
+        if self._error:
+            raise self._error
@@ -0,0 +1,254 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import struct
+import time
+
+from typing import Iterator, Tuple
+from uamqp.message import Message, MessageProperties
+from uamqp.constants import MessageBodyType
+from azext_iot.monitor.utility import get_loop
+
+RECORDING_MAGIC = b"AZIOTREC"
+RECORDING_VERSION = 1
+
+# properties of ~uamqp.message.MessageProperties kept in a recording
+MESSAGE_PROPERTY_NAMES = [
+    "message_id",
+    "user_id",
+    "to",
+    "subject",
+    "reply_to",
+    "correlation_id",
+    "content_type",
+    "content_encoding",
+    "absolute_expiry_time",
+    "creation_time",
+    "group_id",
+    "group_sequence",
+    "reply_to_group_id",
+]
+
+# let the event loop run callbacks (e.g. resolved device templates) every so many messages
+REPLAY_YIELD_INTERVAL = 100
+
+_LENGTH = struct.Struct(">I")
+_INT = struct.Struct(">q")
+_FLOAT = struct.Struct(">d")
+
+
+class MessageRecorder:
+    """
+    Records raw monitor messages to a file, for replay with replay_recording.
+
+    The file starts with RECORDING_MAGIC and a version byte, followed by one length prefixed
+    record per message: the time it was received, the body data sections, annotations,
+    properties and application properties, in a compact tagged binary encoding that keeps
+    bytes and str values apart.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._file.write(RECORDING_MAGIC + bytes([RECORDING_VERSION]))
+        self.message_count = 0
+
+    def record(self, message: Message):
+        record = bytearray()
+        _encode(
+            [
+                time.time(),
+                _get_body(message),
+                message.annotations,
+                _get_properties(message.properties),
+                message.application_properties,
+            ],
+            record,
+        )
+        self._file.write(_LENGTH.pack(len(record)))
+        self._file.write(record)
+        self.message_count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_recording(path: str) -> Iterator[Tuple[float, Message]]:
+    """Yields (received time, message) for every message in a recording."""
+    with open(path, "rb") as f:
+        header = f.read(len(RECORDING_MAGIC) + 1)
+        if header[: len(RECORDING_MAGIC)] != RECORDING_MAGIC:
+            raise ValueError("'{}' is not a monitor recording.".format(path))
+        if header[-1] != RECORDING_VERSION:
+            raise ValueError(
+                "Unsupported monitor recording version {}.".format(header[-1])
+            )
+
+        while True:
+            length = f.read(_LENGTH.size)
+            if len(length) < _LENGTH.size:
+                # end of file, or a record cut short by an interrupted recording
+                return
+            data = f.read(_LENGTH.unpack(length)[0])
+            try:
+                record, _ = _decode(memoryview(data), 0)
+            except (IndexError, struct.error):
+                return
+            received, body, annotations, properties, application_properties = record
+            yield received, Message(
+                body=body or [],
+                body_type=MessageBodyType.Data,
+                annotations=annotations,
+                properties=MessageProperties(**properties) if properties else None,
+                application_properties=application_properties,
+            )
+
+
+async def replay_recording_async(
+    path: str, on_message_received, original_timing: bool = False, drain=None
+) -> dict:
+    """
+    Feeds every message of a recording to on_message_received, as fast as possible or
+    spaced out as they were originally received.
+
+    :param drain: Coroutine function awaited once every message was fed, for handlers that
+        defer messages, e.g. CentralHandler.drain.
+    """
+    count = 0
+    first_received = None
+    start = time.perf_counter()
+    for received, message in read_recording(path):
+        if original_timing:
+            if first_received is None:
+                first_received = received
+            delay = (received - first_received) - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % REPLAY_YIELD_INTERVAL == 0:
+            await asyncio.sleep(0)
+        on_message_received(message)
+        count += 1
+
+    # run anything the last messages scheduled on the loop
+    await asyncio.sleep(0)
+    if drain:
+        await drain()
+    elapsed = time.perf_counter() - start
+    return {
+        "messages": count,
+        "seconds": elapsed,
+        "messagesPerSecond": count / elapsed if elapsed else 0.0,
+    }
+
+
+def replay_recording(
+    path: str, on_message_received, original_timing: bool = False, drain=None
+) -> dict:
+    """
+    Replays a recording through a handler callback, e.g. CommonHandler.parse_message or
+    CentralHandler.validate_message with CentralHandler.drain, and returns the message count
+    and throughput.
+    """
+    return get_loop().run_until_complete(
+        replay_recording_async(path, on_message_received, original_timing, drain)
+    )
+
+
+def _get_body(message: Message) -> list:
+    data = message.get_data()
+    if data is None:
+        return []
+    if isinstance(data, (bytes, bytearray)):
+        return [bytes(data)]
+    return [bytes(section) for section in data]
+
+
+def _get_properties(properties: MessageProperties) -> dict:
+    if not properties:
+        return None
+    result = {}
+    for name in MESSAGE_PROPERTY_NAMES:
+        value = getattr(properties, name, None)
+        if value is not None:
+            result[name] = value
+    return result
+
+
+def _encode(value, out: bytearray):
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int) and -(2 ** 63) <= value < 2 ** 63:
+        out += b"i"
+        out += _INT.pack(value)
+    elif isinstance(value, float):
+        out += b"d"
+        out += _FLOAT.pack(value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out += b"b"
+        out += _LENGTH.pack(len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += b"l"
+        out += _LENGTH.pack(len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += b"m"
+        out += _LENGTH.pack(len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        # str, and anything without a richer encoding (uuids, AMQP types, big ints)
+        encoded = str(value).encode("utf8")
+        out += b"s"
+        out += _LENGTH.pack(len(encoded))
+        out += encoded
+
+
+def _decode(data: memoryview, offset: int):
+    tag = data[offset]
+    offset += 1
+    if tag == 0x4E:  # N
+        return None, offset
+    if tag == 0x54:  # T
+        return True, offset
+    if tag == 0x46:  # F
+        return False, offset
+    if tag == 0x69:  # i
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == 0x64:  # d
+        return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+
+    length = _LENGTH.unpack_from(data, offset)[0]
+    offset += _LENGTH.size
+    if tag == 0x62:  # b
+        if offset + length > len(data):
+            raise IndexError("Truncated record.")
+        return bytes(data[offset:offset + length]), offset + length
+    if tag == 0x73:  # s
+        if offset + length > len(data):
+            raise IndexError("Truncated record.")
+        return str(data[offset:offset + length], "utf8"), offset + length
+    if tag == 0x6C:  # l
+        items = []
+        for _ in range(length):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == 0x6D:  # m
+        items = {}
+        for _ in range(length):
+            key, offset = _decode(data, offset)
+            items[key], offset = _decode(data, offset)
+        return items, offset
+
+    raise ValueError("Unknown value tag {} in monitor recording.".format(tag))
@@ -0,0 +1,134 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import sys
+
+from threading import Lock
+from time import monotonic
+
+SAMPLING_DEFAULT_INTERVAL = 10
+SAMPLING_TOP_DEVICES = 5
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class DeviceSampler:
+    """
+    Limits the events output per device, either to one in every N events (every) or to at
+    most N events per second (rate).
+
+    The rate is enforced with a token bucket per device that holds up to one second of
+    events, so a device is allowed short bursts but never more than rate events on average.
+    Decisions only need the raw device id annotation, so suppressed events are dropped
+    before their payload is decoded. Suppressed events are counted per device and reported
+    to stderr every interval seconds, and once more when the sampler is stopped.
+
+    Sampling may be decided on several threads at once (see ~azext_iot.monitor.pipeline).
+    """
+
+    def __init__(
+        self,
+        every: int = None,
+        rate: float = None,
+        interval: float = SAMPLING_DEFAULT_INTERVAL,
+        stream=None,
+    ):
+        self.every = every
+        self.rate = rate
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.total_suppressed = 0
+        self._lock = Lock()
+        self._counts = {}
+        self._buckets = {}
+        self._timer = None
+        self._reset()
+
+    def should_sample(self, device_id: bytes) -> bool:
+        """Whether to output the next event of the device, counting it as suppressed if not."""
+        with self._lock:
+            if self.every:
+                sampled = self._sample_every(device_id)
+            else:
+                sampled = self._sample_rate(device_id)
+            if not sampled:
+                self._suppressed[device_id] = self._suppressed.get(device_id, 0) + 1
+                self.total_suppressed += 1
+            return sampled
+
+    def start(self, loop):
+        self._timer = loop.call_later(self.interval, self._tick, loop)
+
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.report()
+        if self.total_suppressed:
+            self.stream.write(
+                "[sampling] suppressed {} events in total\n".format(self.total_suppressed)
+            )
+            self.stream.flush()
+
+    def report(self):
+        with self._lock:
+            suppressed = self._suppressed
+            elapsed = max(monotonic() - self._window_start, 1e-6)
+            self._reset()
+        if not suppressed:
+            return
+        self.stream.write(_format_text_report(suppressed, elapsed))
+        self.stream.flush()
+
+    def _sample_every(self, device_id: bytes) -> bool:
+        # the first event of each device is always output
+        count = self._counts.get(device_id, 0)
+        self._counts[device_id] = count + 1
+        return count % self.every == 0
+
+    def _sample_rate(self, device_id: bytes) -> bool:
+        now = monotonic()
+        capacity = max(self.rate, 1)
+        bucket = self._buckets.get(device_id)
+        if bucket is None:
+            bucket = self._buckets[device_id] = _TokenBucket(capacity, now)
+        else:
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def _tick(self, loop):
+        self.report()
+        self.start(loop)
+
+    def _reset(self):
+        self._window_start = monotonic()
+        self._suppressed = {}
+
+
+def _format_text_report(suppressed: dict, elapsed: float) -> str:
+    busiest = sorted(suppressed.items(), key=lambda item: item[1], reverse=True)
+    lines = [
+        "[sampling] {:.1f}s: suppressed {} events from {} devices".format(
+            elapsed, sum(suppressed.values()), len(suppressed)
+        )
+    ]
+    for device_id, count in busiest[:SAMPLING_TOP_DEVICES]:
+        lines.append(
+            "[sampling]   device {}: {} suppressed".format(
+                str(device_id, "utf8", "replace") or "<unknown>", count
+            )
+        )
+    return "\n".join(lines) + "\n"
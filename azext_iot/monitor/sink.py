@@ -0,0 +1,131 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import json
+import os
+import sys
+
+from time import monotonic
+
+NDJSON_FLUSH_SIZE = 64 * 1024
+NDJSON_FLUSH_INTERVAL = 1.0
+NDJSON_BACKUP_COUNT = 5
+
+
+class NdjsonSink:
+    """
+    Buffered writer of compact, newline delimited JSON events.
+
+    Events are serialized to a single line and buffered in memory. The buffer is written
+    out once it holds flush_size characters or flush_interval seconds after the first
+    unflushed event, whichever comes first. When output_file is set, events are appended
+    to that file, which is rotated to <output_file>.1 ... <output_file>.<backup_count>
+    once it would grow past max_file_size bytes. Otherwise events are written to stdout.
+    """
+
+    def __init__(
+        self,
+        output_file: str = None,
+        max_file_size: int = None,
+        backup_count: int = NDJSON_BACKUP_COUNT,
+        flush_size: int = NDJSON_FLUSH_SIZE,
+        flush_interval: float = NDJSON_FLUSH_INTERVAL,
+    ):
+        self.output_file = output_file
+        self.max_file_size = max_file_size
+        self.backup_count = backup_count
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = monotonic()
+        self._flush_handle = None
+        self._stream = None
+        self._file_size = 0
+
+    def write(self, event: dict):
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+
+        if (
+            self._buffered >= self.flush_size
+            or monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def flush(self):
+        self._last_flush = monotonic()
+        if not self._buffer:
+            return
+
+        data = "".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+
+        if not self.output_file:
+            sys.stdout.write(data)
+            sys.stdout.flush()
+            return
+
+        encoded = data.encode("utf-8")
+        if self._stream is None:
+            self._open()
+        elif (
+            self.max_file_size
+            and self._file_size
+            and self._file_size + len(encoded) > self.max_file_size
+        ):
+            self._rotate()
+
+        self._stream.write(encoded)
+        self._stream.flush()
+        self._file_size += len(encoded)
+
+    def close(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.flush()
+        if self._stream:
+            self._stream.close()
+            self._stream = None
+
+    def _schedule_flush(self):
+        # the size and time checks in write only run when events arrive, so while
+        # monitoring also make sure a quiet stream does not hold events back.
+        if self._flush_handle:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(self.flush_interval, self._timed_flush)
+
+    def _timed_flush(self):
+        self._flush_handle = None
+        self.flush()
+
+    def _open(self):
+        directory = os.path.dirname(self.output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._stream = open(self.output_file, "ab")
+        self._file_size = self._stream.tell()
+
+    def _rotate(self):
+        self._stream.close()
+        if self.backup_count:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = "{}.{}".format(self.output_file, index)
+                if os.path.exists(source):
+                    os.replace(source, "{}.{}".format(self.output_file, index + 1))
+            os.replace(self.output_file, "{}.1".format(self.output_file))
+        self._stream = open(self.output_file, "wb")
+        self._file_size = 0
@@ -0,0 +1,279 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import sys
+
+from time import monotonic, time
+from azext_iot.monitor.checkpoint import ENQUEUED_TIME_IDENTIFIER
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+
+STATS_DEFAULT_INTERVAL = 10
+STATS_TOP_DEVICES = 5
+STATS_PERCENTILES = (50, 90, 99)
+
+# values below 2^5 are counted exactly, every power of two above is split into 2^4 linear
+# sub-buckets, i.e. values are recorded to within 1/16th of their true value
+HISTOGRAM_SUB_BUCKET_BITS = 5
+HISTOGRAM_SUB_BUCKETS = 1 << HISTOGRAM_SUB_BUCKET_BITS
+HISTOGRAM_HALF_SUB_BUCKETS = HISTOGRAM_SUB_BUCKETS >> 1
+
+
+class Histogram:
+    """
+    Compact log-linear histogram of non-negative integers, in the style of HdrHistogram.
+
+    Values below 32 are counted exactly. Larger values share a bucket with values that differ
+    by less than 1/16th of their magnitude, so a histogram spanning microseconds to hours
+    needs only a few hundred (sparsely allocated) buckets.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value: int):
+        value = max(int(value), 0)
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> int:
+        if not self.count:
+            return None
+        threshold = max(self.count * percentile / 100, 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        result = {"count": self.count, "min": self.min, "max": self.max}
+        for percentile in STATS_PERCENTILES:
+            result["p{}".format(percentile)] = self.percentile(percentile)
+        return result
+
+
+class _Counters:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.latency_ms = Histogram()
+
+    def summary(self, elapsed: float) -> dict:
+        return {
+            "messages": self.messages,
+            "messagesPerSec": round(self.messages / elapsed, 2),
+            "bytesPerSec": round(self.bytes / elapsed, 2),
+            "latencyMs": self.latency_ms.summary(),
+        }
+
+
+class MonitorStats:
+    """
+    Live throughput and end to end latency statistics for the event monitor.
+
+    Tracks messages/sec, bytes/sec and a histogram of latency (local receive time minus the
+    x-opt-enqueued-time annotation) per partition and per device, as well as a histogram
+    of the time spent handling each message. Counters cover one reporting interval and are
+    reset after every report. Reports are written to stderr so they never mix with events
+    written to stdout, either as a short text summary or as one JSON object per line.
+    """
+
+    def __init__(self, interval: float = STATS_DEFAULT_INTERVAL, output: str = "text", stream=None):
+        self.interval = interval
+        self.output = output
+        self.stream = stream or sys.stderr
+        self.total_messages = 0
+        # optional ~azext_iot.monitor.health.MonitorHealth, reported alongside the statistics
+        self.health = None
+        self._timer = None
+        self._reset()
+
+    def record_message(self, partition, message):
+        device_id, size, latency = get_message_metrics(message)
+        self.record_metrics(partition, device_id, size, latency)
+
+    def record_metrics(self, partition, device_id: str, size: int, latency: float = None):
+        """
+        Records a message from its already extracted metrics, see get_message_metrics.
+        Used when messages were received in another process.
+        """
+        for counters in (
+            self._get_counters(self._partitions, partition),
+            self._get_counters(self._devices, device_id),
+        ):
+            counters.messages += 1
+            counters.bytes += size
+            if latency is not None:
+                counters.latency_ms.record(latency)
+        self.total_messages += 1
+
+    def record_parse_time(self, seconds: float, count: int = 1):
+        per_message = seconds * 1000000 / count
+        for _ in range(count):
+            self._parse_time_us.record(per_message)
+
+    def start(self, loop):
+        self._timer = loop.call_later(self.interval, self._tick, loop)
+
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.report()
+
+    def report(self):
+        summary = self.summary()
+        if self.output == "json":
+            self.stream.write(json.dumps(summary, separators=(",", ":")) + "\n")
+        else:
+            self.stream.write(_format_text_summary(summary))
+            if self.health:
+                self.stream.write(self.health.format_text_summary())
+        self.stream.flush()
+        self._reset()
+
+    def summary(self) -> dict:
+        elapsed = max(monotonic() - self._window_start, 1e-6)
+        partitions = {
+            _format_partition_key(key, self._partitions): counters.summary(elapsed)
+            for key, counters in sorted(self._partitions.items())
+        }
+        devices = {
+            device_id: counters.summary(elapsed)
+            for device_id, counters in sorted(self._devices.items())
+        }
+        messages = sum(counters.messages for counters in self._partitions.values())
+        summary = {
+            "intervalSec": round(elapsed, 3),
+            "messages": messages,
+            "totalMessages": self.total_messages,
+            "messagesPerSec": round(messages / elapsed, 2),
+            "bytesPerSec": round(
+                sum(counters.bytes for counters in self._partitions.values()) / elapsed, 2
+            ),
+            "parseTimeUs": self._parse_time_us.summary(),
+            "partitions": partitions,
+            "devices": devices,
+        }
+        if self.health:
+            summary["health"] = self.health.summary()
+        return summary
+
+    def _tick(self, loop):
+        self.report()
+        self.start(loop)
+
+    def _reset(self):
+        self._window_start = monotonic()
+        self._partitions = {}
+        self._devices = {}
+        self._parse_time_us = Histogram()
+
+    def _get_counters(self, collection: dict, key) -> _Counters:
+        counters = collection.get(key)
+        if counters is None:
+            counters = collection[key] = _Counters()
+        return counters
+
+
+def _bucket_index(value: int) -> int:
+    if value < HISTOGRAM_SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - HISTOGRAM_SUB_BUCKET_BITS
+    return shift * HISTOGRAM_HALF_SUB_BUCKETS + (value >> shift)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    if index < HISTOGRAM_SUB_BUCKETS:
+        return index
+    shift = index // HISTOGRAM_HALF_SUB_BUCKETS - 1
+    mantissa = index - shift * HISTOGRAM_HALF_SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+def get_message_metrics(message) -> tuple:
+    """
+    Returns the (device id, body size, end to end latency in ms) recorded for a message.
+    Latency is None when the message has no enqueued time.
+    """
+    annotations = message.annotations or {}
+    device_id = annotations.get(DEVICE_ID_IDENTIFIER)
+    device_id = str(device_id, "utf8") if isinstance(device_id, bytes) else ""
+
+    enqueued_time = annotations.get(ENQUEUED_TIME_IDENTIFIER)
+    latency = None
+    if isinstance(enqueued_time, int):
+        latency = time() * 1000 - enqueued_time
+    return device_id, _get_body_size(message), latency
+
+
+def _get_body_size(message) -> int:
+    try:
+        return sum(len(data) for data in message.get_data())
+    except Exception:
+        return 0
+
+
+def _format_partition_key(key, partitions: dict) -> str:
+    # partitions are keyed by (event hub path, partition id); the path only matters
+    # when monitoring more than one event hub
+    path, partition = key
+    if len({p for p, _ in partitions}) > 1:
+        return "{}/{}".format(path, partition)
+    return str(partition)
+
+
+def _format_latency(latency: dict) -> str:
+    if not latency["count"]:
+        return "latency n/a"
+    return "latency p50={}ms p99={}ms max={}ms".format(
+        latency["p50"], latency["p99"], latency["max"]
+    )
+
+
+def _format_text_summary(summary: dict) -> str:
+    lines = [
+        "[stats] {:.1f}s: {} msgs ({:.1f} msg/s, {:.1f} KB/s), parse p50={}us p99={}us".format(
+            summary["intervalSec"],
+            summary["messages"],
+            summary["messagesPerSec"],
+            summary["bytesPerSec"] / 1024,
+            summary["parseTimeUs"]["p50"],
+            summary["parseTimeUs"]["p99"],
+        )
+    ]
+    for partition, stats in summary["partitions"].items():
+        lines.append(
+            "[stats]   partition {}: {:.1f} msg/s, {:.1f} KB/s, {}".format(
+                partition,
+                stats["messagesPerSec"],
+                stats["bytesPerSec"] / 1024,
+                _format_latency(stats["latencyMs"]),
+            )
+        )
+    busiest = sorted(
+        summary["devices"].items(), key=lambda item: item[1]["messages"], reverse=True
+    )
+    for device_id, stats in busiest[:STATS_TOP_DEVICES]:
+        lines.append(
+            "[stats]   device {}: {:.1f} msg/s, {:.1f} KB/s, {}".format(
+                device_id or "<unknown>",
+                stats["messagesPerSec"],
+                stats["bytesPerSec"] / 1024,
+                _format_latency(stats["latencyMs"]),
+            )
+        )
+    return "\n".join(lines) + "\n"
@@ -8,11 +8,18 @@ import asyncio
 import sys
 import uamqp
 
+from functools import partial
+from time import perf_counter
 from uuid import uuid4
 from knack.log import get_logger
 from typing import List
 from azext_iot.constants import VERSION, USER_AGENT
+from azext_iot.monitor.checkpoint import CheckpointStore, get_message_checkpoint
+from azext_iot.monitor.health import MonitorHealth, ReconnectPolicy
 from azext_iot.monitor.models.target import Target
+from azext_iot.monitor.pipeline import MessagePipeline, PipelineLane
+from azext_iot.monitor.recording import MessageRecorder
+from azext_iot.monitor.stats import MonitorStats
 from azext_iot.monitor.utility import get_loop
 
 logger = get_logger(__name__)
@@ -25,6 +32,14 @@ def start_single_monitor(
     on_start_string: str,
     on_message_received,
     timeout=0,
+    checkpoint_store: CheckpointStore = None,
+    prefetch: int = None,
+    batch_size: int = None,
+    on_batch_received=None,
+    pipeline: MessagePipeline = None,
+    stats: MonitorStats = None,
+    recorder: MessageRecorder = None,
+    reconnect: ReconnectPolicy = None,
 ):
     """
     :param on_message_received:
@@ -37,6 +52,14 @@ def start_single_monitor(
         on_start_string=on_start_string,
         on_message_received=on_message_received,
         timeout=timeout,
+        checkpoint_store=checkpoint_store,
+        prefetch=prefetch,
+        batch_size=batch_size,
+        on_batch_received=on_batch_received,
+        pipeline=pipeline,
+        stats=stats,
+        recorder=recorder,
+        reconnect=reconnect,
     )
 
 
@@ -46,18 +69,66 @@ def start_multiple_monitors(
     enqueued_time_utc,
     on_message_received,
     timeout=0,
+    checkpoint_store: CheckpointStore = None,
+    prefetch: int = None,
+    batch_size: int = None,
+    on_batch_received=None,
+    pipeline: MessagePipeline = None,
+    stats: MonitorStats = None,
+    recorder: MessageRecorder = None,
+    reconnect: ReconnectPolicy = None,
 ):
     """
     :param on_message_received:
         A callback to process messages as they arrive from the service.
         It takes a single argument, a ~uamqp.message.Message object.
+    :param checkpoint_store:
+        Optional store of the last event seen per partition. Partitions with a checkpoint
+        resume after the stored offset instead of from enqueued_time_utc.
+    :param prefetch:
+        Link credit for each partition receiver. If not set the uamqp default is used.
+    :param batch_size:
+        If set, messages are received in batches of up to batch_size messages (which must not
+        exceed prefetch) instead of one at a time.
+    :param on_batch_received:
+        A callback to process a batch of messages, used instead of on_message_received
+        when batch_size is set. It takes a single argument, a list of ~uamqp.message.Message objects.
+    :param pipeline:
+        Optional ~azext_iot.monitor.pipeline.MessagePipeline. When set, messages are handed to the
+        pipeline instead of on_message_received/on_batch_received, and checkpoints are only
+        updated once a message has been emitted.
+    :param stats:
+        Optional ~azext_iot.monitor.stats.MonitorStats. When set, throughput, latency and handling
+        time are recorded for every message and reported every stats.interval seconds and when
+        the monitor stops.
+    :param recorder:
+        Optional ~azext_iot.monitor.recording.MessageRecorder. When set, every message is
+        recorded as it is received, for offline replay.
+    :param reconnect:
+        Optional ~azext_iot.monitor.health.ReconnectPolicy. When set, a partition receiver that
+        loses its link or connection reconnects with a fresh auth container and resumes after
+        the last message it received, instead of stopping the monitor. Connection health is
+        reported with stats, or on stderr when the monitor stops if there are no stats.
     """
+    health = MonitorHealth() if reconnect else None
+    if stats:
+        stats.health = health
+
     coroutines = [
         _initiate_event_monitor(
             target=target,
             enqueued_time_utc=enqueued_time_utc,
             on_message_received=on_message_received,
             timeout=timeout,
+            checkpoint_store=checkpoint_store,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            on_batch_received=on_batch_received,
+            pipeline=pipeline,
+            stats=stats,
+            recorder=recorder,
+            reconnect=reconnect,
+            health=health,
         )
         for target in targets
     ]
@@ -68,7 +139,10 @@ def start_multiple_monitors(
     result = None
 
     try:
-        print(on_start_string, flush=True)
+        if on_start_string:
+            print(on_start_string, flush=True)
+        if stats:
+            stats.start(loop)
         future.add_done_callback(lambda _: _stop_and_suppress_eloop(loop))
         result = loop.run_until_complete(future)
     except KeyboardInterrupt:
@@ -87,6 +161,12 @@ def start_multiple_monitors(
         except RuntimeError:
             pass  # no running loop anymore
     finally:
+        if checkpoint_store:
+            checkpoint_store.flush()
+        if stats:
+            stats.stop()
+        elif health and health.reconnects:
+            print(health.format_text_summary(), end="", file=sys.stderr, flush=True)
         if result:
             errors = result[0]
             if errors and errors[0]:
@@ -95,7 +175,19 @@ def start_multiple_monitors(
 
 
 async def _initiate_event_monitor(
-    target: Target, enqueued_time_utc, on_message_received, timeout=0
+    target: Target,
+    enqueued_time_utc,
+    on_message_received,
+    timeout=0,
+    checkpoint_store: CheckpointStore = None,
+    prefetch: int = None,
+    batch_size: int = None,
+    on_batch_received=None,
+    pipeline: MessagePipeline = None,
+    stats: MonitorStats = None,
+    recorder: MessageRecorder = None,
+    reconnect: ReconnectPolicy = None,
+    health: MonitorHealth = None,
 ):
     if not target.partitions:
         logger.debug("No Event Hub partitions found to listen on.")
@@ -119,6 +211,15 @@ async def _initiate_event_monitor(
                     enqueued_time_utc=enqueued_time_utc,
                     on_message_received=on_message_received,
                     timeout=timeout,
+                    checkpoint_store=checkpoint_store,
+                    prefetch=prefetch,
+                    batch_size=batch_size,
+                    on_batch_received=on_batch_received,
+                    pipeline=pipeline,
+                    stats=stats,
+                    recorder=recorder,
+                    reconnect=reconnect,
+                    health=health,
                 )
             )
         return await asyncio.gather(*coroutines, return_exceptions=True)
@@ -131,42 +232,187 @@ async def _monitor_events(
     enqueued_time_utc,
     on_message_received,
     timeout=0,
+    checkpoint_store: CheckpointStore = None,
+    prefetch: int = None,
+    batch_size: int = None,
+    on_batch_received=None,
+    pipeline: MessagePipeline = None,
+    stats: MonitorStats = None,
+    recorder: MessageRecorder = None,
+    reconnect: ReconnectPolicy = None,
+    health: MonitorHealth = None,
+):
+    checkpoint = (
+        checkpoint_store.get_checkpoint(target, partition) if checkpoint_store else None
+    )
+    if checkpoint:
+        logger.info(
+            "Resuming partition %s after offset %s", partition, checkpoint.get("offset")
+        )
+
+    lane = None
+    if pipeline:
+        lane = pipeline.open_lane(on_processed=stats.record_parse_time if stats else None)
+    stats_key = (target.path, partition)
+    position = _PartitionPosition(checkpoint)
+    auth = target.auth
+    attempt = 0
+
+    try:
+        while True:
+            try:
+                await _receive_events(
+                    target=target,
+                    auth=auth,
+                    # reconnecting receivers open a connection of their own, the shared
+                    # connection may be the one that was lost
+                    connection=connection if not position.reconnects else None,
+                    partition=partition,
+                    enqueued_time_utc=enqueued_time_utc,
+                    position=position,
+                    on_message_received=on_message_received,
+                    timeout=timeout,
+                    checkpoint_store=checkpoint_store,
+                    prefetch=prefetch,
+                    batch_size=batch_size,
+                    on_batch_received=on_batch_received,
+                    lane=lane,
+                    stats=stats,
+                    recorder=recorder,
+                    health=health,
+                )
+                break
+            except (uamqp.errors.AMQPConnectionError, uamqp.errors.TokenExpired) as e:
+                if position.received:
+                    attempt = 0
+                attempt += 1
+                if not reconnect or not reconnect.should_retry(e, attempt):
+                    if health:
+                        health.failed(stats_key, e)
+                    if isinstance(e, uamqp.errors.LinkDetach):
+                        if isinstance(e.description, bytes):
+                            e.description = str(e.description, "utf8")
+                        raise RuntimeError(e.description)
+                    raise
+                delay = reconnect.get_delay(attempt)
+                logger.warning(
+                    "Lost connection on partition %s (%s), reconnecting in %.1fs", partition, e, delay
+                )
+                if health:
+                    health.disconnected(stats_key, e)
+                position.reconnects += 1
+                await asyncio.sleep(delay)
+                auth = target.build_auth()
+
+        if lane:
+            await lane.close()
+    finally:
+        if lane:
+            lane.cancel()
+        if health:
+            health.closed(stats_key)
+        logger.info("Closed monitor on partition %s", partition)
+
+
+async def _receive_events(
+    target: Target,
+    auth,
+    connection,
+    partition,
+    enqueued_time_utc,
+    position: "_PartitionPosition",
+    on_message_received,
+    timeout=0,
+    checkpoint_store: CheckpointStore = None,
+    prefetch: int = None,
+    batch_size: int = None,
+    on_batch_received=None,
+    lane: PipelineLane = None,
+    stats: MonitorStats = None,
+    recorder: MessageRecorder = None,
+    health: MonitorHealth = None,
 ):
     source = uamqp.address.Source(
         "amqps://{}/{}/ConsumerGroups/{}/Partitions/{}".format(
             target.hostname, target.path, target.consumer_group, partition
         )
     )
-    source.set_filter(
-        bytes(
-            "amqp.annotation.x-opt-enqueuedtimeutc > " + str(enqueued_time_utc), "utf8"
-        )
-    )
+    source.set_filter(_build_event_filter(enqueued_time_utc, position.get_checkpoint()))
 
     exp_cancelled = False
     receive_client = uamqp.ReceiveClientAsync(
         source,
-        auth=target.auth,
+        auth=auth,
         timeout=timeout,
-        prefetch=0,
+        prefetch=prefetch or batch_size or 0,
         client_name=_get_container_id(),
         debug=DEBUG,
     )
+    position.received = False
+    stats_key = (target.path, partition)
 
     try:
         if connection:
             await receive_client.open_async(connection=connection)
+        elif position.reconnects:
+            await receive_client.open_async()
+        if health:
+            health.connected(stats_key)
 
-        async for msg in receive_client.receive_messages_iter_async():
-            on_message_received(msg)
+        if batch_size:
+            while True:
+                batch = await receive_client.receive_message_batch_async(
+                    max_batch_size=batch_size, timeout=timeout
+                )
+                if not batch:
+                    break
+                position.update(batch[-1])
+                if stats:
+                    for msg in batch:
+                        stats.record_message(stats_key, msg)
+                if recorder:
+                    for msg in batch:
+                        recorder.record(msg)
+                if lane:
+                    for msg in batch[:-1]:
+                        await lane.put(msg)
+                    await lane.put(
+                        batch[-1],
+                        _get_checkpoint_callback(checkpoint_store, target, partition, batch[-1]),
+                    )
+                    continue
+                start = perf_counter()
+                if on_batch_received:
+                    on_batch_received(batch)
+                else:
+                    for msg in batch:
+                        on_message_received(msg)
+                if stats:
+                    stats.record_parse_time(perf_counter() - start, len(batch))
+                if checkpoint_store:
+                    checkpoint_store.update_checkpoint(target, partition, batch[-1])
+        else:
+            async for msg in receive_client.receive_messages_iter_async():
+                position.update(msg)
+                if stats:
+                    stats.record_message(stats_key, msg)
+                if recorder:
+                    recorder.record(msg)
+                if lane:
+                    await lane.put(
+                        msg, _get_checkpoint_callback(checkpoint_store, target, partition, msg)
+                    )
+                    continue
+                start = perf_counter()
+                on_message_received(msg)
+                if stats:
+                    stats.record_parse_time(perf_counter() - start)
+                if checkpoint_store:
+                    checkpoint_store.update_checkpoint(target, partition, msg)
 
     except asyncio.CancelledError:
         exp_cancelled = True
         await receive_client.close_async()
-    except uamqp.errors.LinkDetach as ld:
-        if isinstance(ld.description, bytes):
-            ld.description = str(ld.description, "utf8")
-        raise RuntimeError(ld.description)
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt, closing monitor on partition %s", partition)
         exp_cancelled = True
@@ -175,7 +421,42 @@ async def _monitor_events(
     finally:
         if not exp_cancelled:
             await receive_client.close_async()
-        logger.info("Closed monitor on partition %s", partition)
+
+
+class _PartitionPosition:
+    """The last message received on a partition, to resume after when reconnecting."""
+
+    def __init__(self, checkpoint: dict = None):
+        self.checkpoint = checkpoint
+        self.message = None
+        self.received = False
+        self.reconnects = 0
+
+    def update(self, message):
+        self.message = message
+        self.received = True
+
+    def get_checkpoint(self) -> dict:
+        if self.message is not None:
+            self.checkpoint = get_message_checkpoint(self.message) or self.checkpoint
+            self.message = None
+        return self.checkpoint
+
+
+def _build_event_filter(enqueued_time_utc, checkpoint: dict = None) -> bytes:
+    if checkpoint and checkpoint.get("offset"):
+        return bytes(
+            "amqp.annotation.x-opt-offset > '{}'".format(checkpoint["offset"]), "utf8"
+        )
+    return bytes(
+        "amqp.annotation.x-opt-enqueuedtimeutc > " + str(enqueued_time_utc), "utf8"
+    )
+
+
+def _get_checkpoint_callback(checkpoint_store: CheckpointStore, target: Target, partition, message):
+    if not checkpoint_store:
+        return None
+    return partial(checkpoint_store.update_checkpoint, target, partition, message)
 
 
 def _stop_and_suppress_eloop(loop):
@@ -0,0 +1,163 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+from knack.log import get_logger
+from azext_iot.central.providers import (
+    CentralDeviceProvider,
+    CentralDeviceTemplateProvider,
+)
+from azext_iot.constants import CENTRAL_ENDPOINT
+
+logger = get_logger(__name__)
+
+TEMPLATE_RESOLVER_WORKERS = 4
+# failed lookups are retried by the first message of the device after this many seconds
+TEMPLATE_RESOLVER_RETRY_SECONDS = 10
+
+
+class CentralTemplateResolver:
+    """
+    Resolves the device template of the device that sent a message without blocking the
+    event loop.
+
+    warm_up bulk loads every device template and device of the app through the paged list
+    APIs, so most devices are resolved before the first message arrives. Devices not seen
+    during warm up are resolved on a small thread pool: resolve holds on to the callback of
+    every message from that device and runs them in order, on the event loop, once the
+    device and its template have been fetched. Messages from other devices keep flowing
+    while a lookup is in flight. A failed lookup is reported for the messages of the device
+    until TEMPLATE_RESOLVER_RETRY_SECONDS have passed, then looked up again.
+    """
+
+    def __init__(
+        self,
+        central_device_provider: CentralDeviceProvider,
+        central_template_provider: CentralDeviceTemplateProvider,
+        central_dns_suffix=CENTRAL_ENDPOINT,
+        workers: int = TEMPLATE_RESOLVER_WORKERS,
+    ):
+        self._central_device_provider = central_device_provider
+        self._central_template_provider = central_template_provider
+        self._central_dns_suffix = central_dns_suffix
+        self._workers = workers
+        self._executor = None
+        # device id -> (template, error)
+        self._resolved = {}
+        # device id -> callbacks waiting on the device's template
+        self._pending = {}
+        # device id -> lookup in flight
+        self._lookups = {}
+        # device id -> time a failed lookup is retried after
+        self._retry_after = {}
+
+    def warm_up(self):
+        templates = {
+            template.id: template
+            for template in self._central_template_provider.cache_device_templates(
+                central_dns_suffix=self._central_dns_suffix
+            )
+        }
+        devices = self._central_device_provider.list_devices(
+            central_dns_suffix=self._central_dns_suffix
+        )
+        for device in devices:
+            template = templates.get(device.template)
+            if template:
+                self._resolved[device.id] = (template, None)
+
+        logger.info(
+            "Resolved device templates for %s of %s devices",
+            len(self._resolved),
+            len(devices),
+        )
+
+    def is_resolved(self, device_id: str) -> bool:
+        if device_id not in self._resolved:
+            return False
+        retry_after = self._retry_after.get(device_id)
+        if retry_after is not None and monotonic() >= retry_after:
+            # the error may have been transient, e.g. throttling
+            del self._resolved[device_id]
+            del self._retry_after[device_id]
+            return False
+        return True
+
+    def get_template(self, device_id: str):
+        """
+        Returns the template of a resolved device, raising the error seen while resolving it
+        if there was one.
+        """
+        template, error = self._resolved[device_id]
+        if error:
+            raise error
+        return template
+
+    def resolve(self, device_id: str, callback):
+        """
+        Runs callback once the template of device_id is known. Must be called from the
+        event loop.
+        """
+        if self.is_resolved(device_id):
+            callback()
+            return
+
+        waiting = self._pending.get(device_id)
+        if waiting is not None:
+            waiting.append(callback)
+            return
+
+        self._pending[device_id] = [callback]
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="template-resolver"
+            )
+        loop = asyncio.get_event_loop()
+        lookup = self._lookups[device_id] = loop.run_in_executor(
+            self._executor, self._fetch_template, device_id
+        )
+        lookup.add_done_callback(lambda f: self._on_lookup_done(device_id, f))
+
+    async def drain(self):
+        """Waits until the callbacks of every pending lookup have run."""
+        while self._lookups:
+            await asyncio.wait(list(self._lookups.values()))
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+    def _fetch_template(self, device_id: str):
+        try:
+            device = self._central_device_provider.get_device(
+                device_id, central_dns_suffix=self._central_dns_suffix
+            )
+            template = self._central_template_provider.get_device_template(
+                device.template, central_dns_suffix=self._central_dns_suffix
+            )
+            return template, None
+        except Exception as e:
+            return None, e
+
+    def _on_lookup_done(self, device_id: str, lookup: asyncio.Future):
+        if lookup.cancelled():
+            # shutting down, nothing is waiting on the messages anymore
+            self._lookups.pop(device_id, None)
+            self._pending.pop(device_id, None)
+            return
+        self._on_resolved(device_id, lookup.result())
+
+    def _on_resolved(self, device_id: str, result):
+        self._lookups.pop(device_id, None)
+        self._resolved[device_id] = result
+        _, error = result
+        if error:
+            self._retry_after[device_id] = monotonic() + TEMPLATE_RESOLVER_RETRY_SECONDS
+        for callback in self._pending.pop(device_id, []):
+            callback()
@@ -0,0 +1,371 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import multiprocessing
+import signal
+import sys
+
+from queue import Empty
+from knack.log import get_logger
+from typing import List
+from azext_iot.monitor.checkpoint import CheckpointStore, get_message_checkpoint
+from azext_iot.monitor.health import MonitorHealth, ReconnectPolicy
+from azext_iot.monitor.models.arguments import CommonHandlerArguments
+from azext_iot.monitor.models.target import Target
+from azext_iot.monitor.stats import MonitorStats, get_message_metrics
+from azext_iot.monitor.utility import get_loop
+
+logger = get_logger(__name__)
+
+# units (a message or a batch worth of results) waiting to be merged, across all workers
+WORKER_QUEUE_SIZE = 1024
+WORKER_POLL_INTERVAL = 0.1
+
+_EVENT = "event"
+_STATS = "stats"
+_PARSE_TIME = "parse"
+_CHECKPOINT = "checkpoint"
+_HEALTH = "health"
+_ERROR = "error"
+_DONE = "done"
+
+
+class WorkerSpec:
+    """
+    Everything a worker process needs to monitor its share of partitions.
+    Only holds picklable values, the AMQP auth is rebuilt by the worker.
+    """
+
+    def __init__(
+        self,
+        target_config: dict,
+        consumer_group: str,
+        partitions: list,
+        checkpoints: dict,
+        enqueued_time_utc,
+        handler_args: CommonHandlerArguments,
+        timeout=0,
+        prefetch: int = None,
+        batch_size: int = None,
+        collect_stats: bool = False,
+        collect_checkpoints: bool = False,
+        reconnect: ReconnectPolicy = None,
+    ):
+        self.target_config = target_config
+        self.consumer_group = consumer_group
+        self.partitions = partitions
+        self.checkpoints = checkpoints
+        self.enqueued_time_utc = enqueued_time_utc
+        self.handler_args = handler_args
+        self.timeout = timeout
+        self.prefetch = prefetch
+        self.batch_size = batch_size
+        self.collect_stats = collect_stats
+        self.collect_checkpoints = collect_checkpoints
+        self.reconnect = reconnect
+
+
+def shard_partitions(partitions: list, workers: int) -> List[list]:
+    """
+    Deals partitions out round robin to at most workers shards, leaving no shard empty.
+    """
+    if not partitions:
+        return []
+    workers = max(min(workers, len(partitions)), 1)
+    return [list(partitions[index::workers]) for index in range(workers)]
+
+
+def start_worker_monitors(
+    target_config: dict,
+    target: Target,
+    workers: int,
+    enqueued_time_utc,
+    on_start_string: str,
+    handler_args: CommonHandlerArguments,
+    emit,
+    timeout=0,
+    checkpoint_store: CheckpointStore = None,
+    prefetch: int = None,
+    batch_size: int = None,
+    stats: MonitorStats = None,
+    reconnect: ReconnectPolicy = None,
+):
+    """
+    Monitors target with its partitions sharded across worker processes.
+
+    Each worker runs its own _initiate_event_monitor over its shard, filtering and parsing
+    events with a ~azext_iot.monitor.handlers.CommonHandler built from handler_args. Results
+    are sent back to this process and merged: emit(result) is called for every parsed event,
+    in order per partition, and checkpoints and statistics are kept in the single
+    checkpoint_store and stats of this process. With reconnect set, workers reconnect lost
+    partition receivers and the connection health of all workers is merged into one
+    ~azext_iot.monitor.health.MonitorHealth.
+
+    :param target_config:
+        The IoT Hub target the Target was built from, including its "events" endpoint.
+    :param emit:
+        A callback to output a parsed event. It takes a single argument, the parsed event.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue(maxsize=WORKER_QUEUE_SIZE)
+    processes = []
+    for index, partitions in enumerate(shard_partitions(target.partitions, workers)):
+        spec = WorkerSpec(
+            target_config=_get_worker_target_config(target_config),
+            consumer_group=target.consumer_group,
+            partitions=partitions,
+            checkpoints={
+                partition: checkpoint_store.get_checkpoint(target, partition)
+                for partition in partitions
+            } if checkpoint_store else {},
+            enqueued_time_utc=enqueued_time_utc,
+            handler_args=handler_args,
+            timeout=timeout,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            collect_stats=bool(stats),
+            collect_checkpoints=bool(checkpoint_store),
+            reconnect=reconnect,
+        )
+        processes.append(
+            context.Process(
+                target=run_worker,
+                args=(spec, queue),
+                name="monitor-worker-{}".format(index),
+                daemon=True,
+            )
+        )
+
+    if not processes:
+        logger.debug("No Event Hub partitions found to listen on.")
+        return
+
+    health = MonitorHealth() if reconnect else None
+    if stats:
+        stats.health = health
+
+    loop = get_loop()
+    merge = loop.create_task(
+        merge_worker_results(
+            queue=queue,
+            processes=processes,
+            emit=emit,
+            target=target,
+            checkpoint_store=checkpoint_store,
+            stats=stats,
+            health=health,
+        )
+    )
+    errors = []
+    try:
+        for process in processes:
+            process.start()
+        if on_start_string:
+            print(on_start_string, flush=True)
+        if stats:
+            stats.start(loop)
+        errors = loop.run_until_complete(merge)
+    except KeyboardInterrupt:
+        print("Stopping event monitor...", flush=True)
+        merge.cancel()
+        loop.run_until_complete(asyncio.gather(merge, return_exceptions=True))
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        if checkpoint_store:
+            checkpoint_store.flush()
+        if stats:
+            stats.stop()
+        elif health and health.reconnects:
+            print(health.format_text_summary(), end="", file=sys.stderr, flush=True)
+
+    if errors:
+        logger.debug(errors)
+        raise RuntimeError(errors[0])
+
+
+async def merge_worker_results(
+    queue,
+    processes: list,
+    emit,
+    target: Target,
+    checkpoint_store: CheckpointStore = None,
+    stats: MonitorStats = None,
+    health: MonitorHealth = None,
+) -> List[str]:
+    """
+    Applies the results sent by worker processes until every worker is done,
+    returning the errors the workers reported.
+    """
+    loop = asyncio.get_event_loop()
+    errors = []
+    running = len(processes)
+    while running:
+        # the executor keeps the loop free for the stats timer while waiting
+        unit = await loop.run_in_executor(None, _receive, queue)
+        if unit is None:
+            if not any(process.is_alive() for process in processes):
+                errors.extend(
+                    "Monitor worker {} exited with code {}".format(process.name, process.exitcode)
+                    for process in processes
+                    if process.exitcode
+                )
+                break
+            continue
+
+        for item in unit:
+            kind = item[0]
+            if kind == _EVENT:
+                emit(item[1])
+            elif kind == _STATS:
+                stats.record_metrics(*item[1:])
+            elif kind == _PARSE_TIME:
+                stats.record_parse_time(*item[1:])
+            elif kind == _CHECKPOINT:
+                checkpoint_store.set_checkpoint(target, *item[1:])
+            elif kind == _HEALTH:
+                getattr(health, item[1])(*item[2:])
+            elif kind == _ERROR:
+                errors.append(item[1])
+            elif kind == _DONE:
+                running -= 1
+    return errors
+
+
+def run_worker(spec: WorkerSpec, queue):
+    """Entry point of a worker process."""
+    from azext_iot.monitor.builders.hub_target_builder import EventTargetBuilder
+    from azext_iot.monitor.handlers import CommonHandler
+    from azext_iot.monitor.telemetry import _initiate_event_monitor
+
+    # ctrl-c reaches the whole process group, the parent stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    handler = CommonHandler(spec.handler_args)
+    channel = WorkerChannel(
+        queue=queue,
+        handler=handler,
+        checkpoints=spec.checkpoints,
+        collect_checkpoints=spec.collect_checkpoints,
+    )
+    errors = []
+    try:
+        target = EventTargetBuilder().build_iot_hub_target(spec.target_config)
+        target.partitions = spec.partitions
+        target.add_consumer_group(spec.consumer_group)
+
+        if handler.sampler:
+            handler.sampler.start(get_loop())
+        result = get_loop().run_until_complete(
+            _initiate_event_monitor(
+                target=target,
+                enqueued_time_utc=spec.enqueued_time_utc,
+                on_message_received=channel.on_message_received,
+                timeout=spec.timeout,
+                checkpoint_store=channel,
+                prefetch=spec.prefetch,
+                batch_size=spec.batch_size,
+                on_batch_received=channel.on_batch_received,
+                stats=channel if spec.collect_stats else None,
+                reconnect=spec.reconnect,
+                health=channel if spec.reconnect else None,
+            )
+        )
+        errors = [str(error) for error in result or [] if isinstance(error, Exception)]
+    except Exception as e:
+        errors = [str(e)]
+
+    if handler.sampler:
+        handler.sampler.stop()
+    channel.flush()
+    queue.put([(_ERROR, error) for error in errors] + [(_DONE,)])
+
+
+class WorkerChannel:
+    """
+    Worker side stand in for the handler output, checkpoint store, stats and health of a monitor.
+
+    Parsed events, statistics and checkpoints are buffered in the order the monitor produces
+    them and sent to the parent as one unit per message or batch, when the monitor updates
+    the checkpoint of a partition. The parent applies a unit in order, so a checkpoint
+    never gets ahead of the events it covers.
+    """
+
+    def __init__(
+        self, queue, handler, checkpoints: dict = None, collect_checkpoints: bool = False
+    ):
+        self._queue = queue
+        self._handler = handler
+        self._checkpoints = checkpoints or {}
+        self._collect_checkpoints = collect_checkpoints
+        self._items = []
+
+    def on_message_received(self, message):
+        result = self._handler.process_message(message)
+        if result is not None:
+            self._items.append((_EVENT, result))
+
+    def on_batch_received(self, messages):
+        for message in messages:
+            self.on_message_received(message)
+
+    def get_checkpoint(self, target, partition) -> dict:
+        return self._checkpoints.get(partition)
+
+    def update_checkpoint(self, target, partition, message):
+        if self._collect_checkpoints:
+            checkpoint = get_message_checkpoint(message)
+            if checkpoint:
+                self._items.append((_CHECKPOINT, partition, checkpoint))
+        self.flush()
+
+    def record_message(self, partition, message):
+        self._items.append((_STATS, partition) + get_message_metrics(message))
+
+    def record_parse_time(self, seconds: float, count: int = 1):
+        self._items.append((_PARSE_TIME, seconds, count))
+
+    def connected(self, key):
+        self._send_health("connected", key)
+
+    def disconnected(self, key, error: Exception):
+        self._send_health("disconnected", key, str(error))
+
+    def failed(self, key, error: Exception):
+        self._send_health("failed", key, str(error))
+
+    def closed(self, key):
+        self._send_health("closed", key)
+
+    def flush(self):
+        if self._items:
+            self._queue.put(self._items)
+            self._items = []
+
+    def _send_health(self, method: str, *args):
+        # health changes are rare and should not wait for the next message
+        self._items.append((_HEALTH, method) + args)
+        self.flush()
+
+
+def _get_worker_target_config(target_config: dict) -> dict:
+    # the discovered target also holds the cli command, which cannot be sent to another process
+    return {
+        "policy": target_config["policy"],
+        "primarykey": target_config["primarykey"],
+        "events": dict(target_config["events"]),
+    }
+
+
+def _receive(queue):
+    try:
+        return queue.get(timeout=WORKER_POLL_INTERVAL)
+    except Empty:
+        return None
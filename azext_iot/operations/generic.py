@@ -10,29 +10,61 @@ from azext_iot.assets.user_messages import error_param_top_out_of_bounds
 
 def _execute_query(query_args, query_method, top=None):
     payload = []
-    headers = {"Cache-Control": "no-cache, must-revalidate"}
+    for page in _iterate_query(query_args, query_method, top):
+        payload.extend(page)
+    return payload
+
+
+def _iterate_query(query_args, query_method, top=None):
+    """
+    Yield query result pages as they arrive.
+
+    The next page is requested on a background thread while the current page is being consumed,
+    so at most two pages are held in memory at any time.
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
+    def _fetch(headers):
+        result = query_method(*query_args, custom_headers=headers, raw=True)
+        return result.response.json(), result.response.headers.get("x-ms-continuation")
+
+    headers = {"Cache-Control": "no-cache, must-revalidate"}
     if top:
         headers["x-ms-max-item-count"] = str(top)
 
-    result = query_method(*query_args, custom_headers=headers, raw=True)
-    token = result.response.headers.get("x-ms-continuation")
-
-    payload.extend(result.response.json())
-    while token:
-        # In case requested count is > service max page size
-        if top:
-            pl = len(payload)
-            if pl < top:
-                page = top - pl
-                headers["x-ms-max-item-count"] = str(page)
-            else:
-                break
-        headers["x-ms-continuation"] = token
-        result = query_method(*query_args, custom_headers=headers, raw=True)
-        token = result.response.headers.get("x-ms-continuation")
-        payload.extend(result.response.json())
-    return payload[:top] if top else payload
+    count = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        page, token = _fetch(headers)
+        while True:
+            if top:
+                page = page[:top - count]
+            count += len(page)
+
+            next_page = None
+            # In case requested count is > service max page size
+            if token and (not top or count < top):
+                headers = dict(headers)
+                if top:
+                    headers["x-ms-max-item-count"] = str(top - count)
+                headers["x-ms-continuation"] = token
+                next_page = executor.submit(_fetch, headers)
+
+            yield page
+
+            if not next_page:
+                return
+            page, token = next_page.result()
+
+
+def _stream_query(query_args, query_method, top=None, output=None):
+    """Write query results as newline delimited JSON, one page at a time."""
+    import sys
+    import json
+
+    output = output or sys.stdout
+    for page in _iterate_query(query_args, query_method, top):
+        output.write("".join(json.dumps(item) + "\n" for item in page))
+        output.flush()
 
 
 def _process_top(top, upper_limit=None):
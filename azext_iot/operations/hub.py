@@ -4,6 +4,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import sys
 from os.path import exists, basename
 from time import time, sleep
 from knack.log import get_logger
@@ -25,6 +26,8 @@ from azext_iot.constants import (
     TRACING_ALLOWED_FOR_LOCATION,
     TRACING_ALLOWED_FOR_SKU,
     IOTHUB_TRACK_2_SDK_MIN_VERSION,
+    BULK_REGISTRY_MAX_DEVICES,
+    BULK_REGISTRY_DEFAULT_WORKERS,
 )
 from azext_iot.common.sas_token_auth import SasTokenAuthentication
 from azext_iot.common.shared import (
@@ -51,7 +54,7 @@ from azext_iot.common.utility import (
     generate_key,
 )
 from azext_iot._factory import SdkResolver, CloudError
-from azext_iot.operations.generic import _execute_query, _process_top
+from azext_iot.operations.generic import _execute_query, _process_top, _stream_query
 import pprint
 
 logger = get_logger(__name__)
@@ -68,6 +71,7 @@ def iot_query(
     resource_group_name=None,
     login=None,
     auth_type_dataplane=None,
+    stream=False,
 ):
     top = _process_top(top)
     discovery = IotHubDiscovery(cmd)
@@ -84,6 +88,8 @@ def iot_query(
         query_args = [query_command]
         query_method = service_sdk.query.get_twins
 
+        if stream:
+            return _stream_query(query_args, query_method, top)
         return _execute_query(query_args, query_method, top)
     except CloudError as e:
         handle_service_exception(e)
@@ -315,6 +321,320 @@ def _create_self_signed_cert(subject, valid_days, output_path=None):
     return create_self_signed_certificate(subject, valid_days, output_path)
 
 
+# Device Bulk
+
+
+def iot_device_bulk_create(
+    cmd,
+    manifest,
+    hub_name=None,
+    report_file=None,
+    workers=BULK_REGISTRY_DEFAULT_WORKERS,
+    resource_group_name=None,
+    login=None,
+    auth_type_dataplane=None,
+):
+    return _iot_device_bulk(
+        cmd,
+        manifest=manifest,
+        import_mode="create",
+        hub_name=hub_name,
+        report_file=report_file,
+        workers=workers,
+        resource_group_name=resource_group_name,
+        login=login,
+        auth_type_dataplane=auth_type_dataplane,
+    )
+
+
+def iot_device_bulk_update(
+    cmd,
+    manifest,
+    hub_name=None,
+    report_file=None,
+    workers=BULK_REGISTRY_DEFAULT_WORKERS,
+    resource_group_name=None,
+    login=None,
+    auth_type_dataplane=None,
+):
+    return _iot_device_bulk(
+        cmd,
+        manifest=manifest,
+        import_mode="update",
+        hub_name=hub_name,
+        report_file=report_file,
+        workers=workers,
+        resource_group_name=resource_group_name,
+        login=login,
+        auth_type_dataplane=auth_type_dataplane,
+    )
+
+
+def iot_device_bulk_delete(
+    cmd,
+    manifest,
+    hub_name=None,
+    report_file=None,
+    workers=BULK_REGISTRY_DEFAULT_WORKERS,
+    resource_group_name=None,
+    login=None,
+    auth_type_dataplane=None,
+):
+    return _iot_device_bulk(
+        cmd,
+        manifest=manifest,
+        import_mode="delete",
+        hub_name=hub_name,
+        report_file=report_file,
+        workers=workers,
+        resource_group_name=resource_group_name,
+        login=login,
+        auth_type_dataplane=auth_type_dataplane,
+    )
+
+
+def _iot_device_bulk(
+    cmd,
+    manifest,
+    import_mode,
+    hub_name=None,
+    report_file=None,
+    workers=BULK_REGISTRY_DEFAULT_WORKERS,
+    resource_group_name=None,
+    login=None,
+    auth_type_dataplane=None,
+):
+    if not exists(manifest):
+        raise FileOperationError(
+            "Device manifest file '{}' does not exist.".format(manifest)
+        )
+    if workers is None or workers < 1:
+        raise InvalidArgumentValueError("The number of workers must be at least 1.")
+
+    discovery = IotHubDiscovery(cmd)
+    target = discovery.get_target(
+        resource_name=hub_name,
+        resource_group_name=resource_group_name,
+        login=login,
+        auth_type=auth_type_dataplane,
+    )
+    return _iot_device_bulk_operation(
+        target=target,
+        entries=_read_device_manifest(manifest),
+        import_mode=import_mode,
+        report_file=report_file,
+        workers=workers,
+    )
+
+
+def _read_device_manifest(manifest):
+    """
+    Lazily yield (line number, record) pairs from a CSV or JSON lines device manifest.
+    CSV manifests are detected by the .csv file extension; anything else is treated as JSON lines.
+    """
+    import csv
+    import json
+
+    with open(manifest, "r", encoding="utf-8-sig", newline="") as f:
+        if manifest.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, {
+                    k.strip(): v.strip() for k, v in record.items() if k and v
+                }
+            return
+
+        for line_num, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_num, e
+                continue
+            yield line_num, record
+
+
+def _assemble_bulk_device(record, import_mode):
+    from azext_iot.sdk.iothub.service.models import ExportImportDevice
+
+    if not isinstance(record, dict):
+        raise ValueError("Manifest entry must be a JSON object.")
+
+    device_id = record.get("deviceId")
+    if not device_id:
+        raise ValueError("Manifest entry is missing a deviceId.")
+
+    etag = record.get("etag")
+    if import_mode == "delete":
+        return ExportImportDevice(
+            id=device_id,
+            e_tag=etag,
+            import_mode="deleteIfMatchETag" if etag else "delete",
+        )
+
+    auth_method = record.get("authMethod", DeviceAuthType.shared_private_key.value)
+    is_thumbprint = auth_method in [
+        DeviceAuthType.x509_thumbprint.value,
+        DeviceAuthApiType.selfSigned.value,
+    ]
+    edge_enabled = record.get("edgeEnabled", False)
+    if isinstance(edge_enabled, str):
+        edge_enabled = edge_enabled.lower() == "true"
+    status = record.get("status") or EntityStatusType.enabled.value
+    valid_statuses = [status_type.value for status_type in EntityStatusType]
+    if not isinstance(status, str) or status.lower() not in valid_statuses:
+        raise ValueError(
+            "Manifest entry status must be one of: {}.".format(", ".join(valid_statuses))
+        )
+
+    device = _assemble_device(
+        is_update=import_mode == "update",
+        device_id=device_id,
+        auth_method=auth_method,
+        edge_enabled=edge_enabled,
+        pk=record.get("primaryThumbprint") if is_thumbprint else record.get("primaryKey"),
+        sk=record.get("secondaryThumbprint") if is_thumbprint else record.get("secondaryKey"),
+        status=status.lower(),
+        status_reason=record.get("statusReason"),
+        device_scope=record.get("deviceScope"),
+    )
+    authentication = device.authentication
+    auth_fields = ["authMethod", "primaryKey", "secondaryKey", "primaryThumbprint", "secondaryThumbprint"]
+    if import_mode == "update" and not any(record.get(field) for field in auth_fields):
+        # keep the current authentication of the device
+        authentication = None
+    if import_mode == "update" and etag:
+        import_mode = "updateIfMatchETag"
+
+    return ExportImportDevice(
+        id=device.device_id,
+        e_tag=etag,
+        import_mode=import_mode,
+        status=device.status,
+        status_reason=device.status_reason,
+        authentication=authentication,
+        capabilities=device.capabilities,
+        device_scope=device.device_scope,
+        parent_scopes=device.parent_scopes,
+    )
+
+
+def _iot_device_bulk_operation(
+    target,
+    entries,
+    import_mode,
+    report_file=None,
+    workers=BULK_REGISTRY_DEFAULT_WORKERS,
+):
+    """
+    Streams manifest entries to the bulk registry API in chunks of the service limit.
+    At most two chunks per worker are held in memory at any time.
+    """
+    import json
+    from threading import local
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    thread_state = local()
+
+    def _process_chunk(chunk):
+        service_sdk = getattr(thread_state, "service_sdk", None)
+        if not service_sdk:
+            service_sdk = SdkResolver(target=target).get_sdk(SdkType.service_sdk)
+            thread_state.service_sdk = service_sdk
+
+        try:
+            result = service_sdk.bulk_registry.update_registry(devices=chunk)
+        except CloudError as e:
+            logger.warning("Bulk registry request for %s devices failed: %s", len(chunk), e)
+            return [
+                _build_bulk_result(device.id, error_code="RequestFailed", error_status=str(e))
+                for device in chunk
+            ]
+
+        if not result.is_successful and not result.errors:
+            return [
+                _build_bulk_result(device.id, error_code="RequestFailed", error_status=None)
+                for device in chunk
+            ]
+
+        errors = {error.device_id: error for error in (result.errors or [])}
+        return [
+            _build_bulk_result(
+                device.id,
+                error_code=errors[device.id].error_code if device.id in errors else None,
+                error_status=errors[device.id].error_status if device.id in errors else None,
+            )
+            for device in chunk
+        ]
+
+    summary = {"total": 0, "succeeded": 0, "failed": 0}
+    failures = []
+    report = open(report_file, "w", encoding="utf-8") if report_file else None
+
+    def _record(results):
+        for result in results:
+            summary["total"] += 1
+            if result["succeeded"]:
+                summary["succeeded"] += 1
+            else:
+                summary["failed"] += 1
+                if not report:
+                    failures.append(result)
+            if report:
+                report.write(json.dumps(result) + "\n")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            chunk = []
+            for line_num, record in entries:
+                try:
+                    if isinstance(record, Exception):
+                        raise ValueError(record)
+                    chunk.append(_assemble_bulk_device(record, import_mode))
+                except ValueError as ve:
+                    device_id = record.get("deviceId") if isinstance(record, dict) else None
+                    logger.warning("Skipping manifest entry on line %s: %s", line_num, ve)
+                    _record([
+                        _build_bulk_result(
+                            device_id, error_code="InvalidManifestEntry", error_status=str(ve)
+                        )
+                    ])
+                    continue
+
+                if len(chunk) == BULK_REGISTRY_MAX_DEVICES:
+                    pending.add(executor.submit(_process_chunk, chunk))
+                    chunk = []
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _record(future.result())
+
+            if chunk:
+                pending.add(executor.submit(_process_chunk, chunk))
+            for future in wait(pending).done:
+                _record(future.result())
+    finally:
+        if report:
+            report.close()
+
+    if report_file:
+        summary["reportFile"] = report_file
+    else:
+        summary["failures"] = failures
+    return summary
+
+
+def _build_bulk_result(device_id, error_code=None, error_status=None):
+    result = {"deviceId": device_id, "succeeded": error_code is None}
+    if error_code:
+        result["errorCode"] = error_code
+        result["errorStatus"] = error_status
+    return result
+
+
 def update_iot_device_custom(
     instance,
     edge_enabled=None,
@@ -1885,10 +2205,8 @@ def iot_device_method(
         auth_type=auth_type_dataplane,
     )
     resolver = SdkResolver(target=target)
-    service_sdk = resolver.get_sdk(SdkType.service_sdk)
-
     # Prevent msrest locking up shell
-    service_sdk.config.retry_policy.retries = 1
+    service_sdk = resolver.get_sdk(SdkType.service_sdk, retries=1)
     try:
         if method_payload:
             method_payload = process_json_arg(
@@ -1948,10 +2266,8 @@ def iot_device_module_method(
         auth_type=auth_type_dataplane,
     )
     resolver = SdkResolver(target=target)
-    service_sdk = resolver.get_sdk(SdkType.service_sdk)
-
     # Prevent msrest locking up shell
-    service_sdk.config.retry_policy.retries = 1
+    service_sdk = resolver.get_sdk(SdkType.service_sdk, retries=1)
     try:
         if method_payload:
             method_payload = process_json_arg(
@@ -2519,6 +2835,7 @@ def iot_c2d_message_send(
 
     from azext_iot.monitor import event
 
+    sent_time = time()
     msg_id, errors = event.send_c2d_message(
         target=target,
         device_id=device_id,
@@ -2538,7 +2855,9 @@ def iot_c2d_message_send(
         )
 
     if wait_on_feedback:
-        _iot_hub_monitor_feedback(target=target, device_id=device_id, wait_on_id=msg_id)
+        _iot_hub_monitor_feedback(
+            target=target, device_id=device_id, wait_on_id=msg_id, sent_time=sent_time
+        )
 
 
 def iot_simulate_device(
@@ -2950,6 +3269,22 @@ def iot_hub_monitor_events(
     login=None,
     content_type=None,
     device_query=None,
+    checkpoint_dir=None,
+    prefetch=None,
+    batch_size=None,
+    ndjson=False,
+    ndjson_file=None,
+    ndjson_max_size=None,
+    parse_workers=None,
+    stats=None,
+    stats_interval=None,
+    record=None,
+    workers=None,
+    max_reconnects=None,
+    aggregate=None,
+    aggregate_by=None,
+    sample_every=None,
+    sample_rate=None,
 ):
     try:
         _iot_hub_monitor_events(
@@ -2968,6 +3303,22 @@ def iot_hub_monitor_events(
             login=login,
             content_type=content_type,
             device_query=device_query,
+            checkpoint_dir=checkpoint_dir,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            ndjson=ndjson,
+            ndjson_file=ndjson_file,
+            ndjson_max_size=ndjson_max_size,
+            parse_workers=parse_workers,
+            stats=stats,
+            stats_interval=stats_interval,
+            record=record,
+            workers=workers,
+            max_reconnects=max_reconnects,
+            aggregate=aggregate,
+            aggregate_by=aggregate_by,
+            sample_every=sample_every,
+            sample_rate=sample_rate,
         )
     except RuntimeError as e:
         raise CLIInternalError(e)
@@ -2983,9 +3334,18 @@ def iot_hub_monitor_feedback(
     resource_group_name=None,
     login=None,
     auth_type_dataplane=None,
+    wait_timeout=None,
 ):
     from azext_iot.common.deps import ensure_uamqp
 
+    if wait_timeout is not None:
+        if not wait_on_id:
+            raise RequiredArgumentMissingError(
+                "Please provide --wait-on-msg to wait on the feedback of messages."
+            )
+        if wait_timeout <= 0:
+            raise InvalidArgumentValueError("Wait timeout must be greater than 0.")
+
     config = cmd.cli_ctx.config
     ensure_uamqp(config, yes, repair)
 
@@ -2998,7 +3358,7 @@ def iot_hub_monitor_feedback(
     )
 
     return _iot_hub_monitor_feedback(
-        target=target, device_id=device_id, wait_on_id=wait_on_id
+        target=target, device_id=device_id, wait_on_id=wait_on_id, wait_timeout=wait_timeout
     )
 
 
@@ -3040,11 +3400,71 @@ def _iot_hub_monitor_events(
     login=None,
     content_type=None,
     device_query=None,
+    checkpoint_dir=None,
+    prefetch=None,
+    batch_size=None,
+    ndjson=False,
+    ndjson_file=None,
+    ndjson_max_size=None,
+    parse_workers=None,
+    stats=None,
+    stats_interval=None,
+    record=None,
+    workers=None,
+    max_reconnects=None,
+    aggregate=None,
+    aggregate_by=None,
+    sample_every=None,
+    sample_rate=None,
 ):
     (enqueued_time, properties, timeout, output) = init_monitoring(
         cmd, timeout, properties, enqueued_time, repair, yes
     )
 
+    if prefetch is not None and prefetch < 1:
+        raise InvalidArgumentValueError("Prefetch must be at least 1.")
+    if batch_size is not None:
+        if batch_size < 1:
+            raise InvalidArgumentValueError("Batch size must be at least 1.")
+        if prefetch and batch_size > prefetch:
+            raise InvalidArgumentValueError(
+                "Batch size cannot be greater than the prefetch link credit."
+            )
+    if ndjson_max_size is not None:
+        if not ndjson_file:
+            raise RequiredArgumentMissingError(
+                "Please provide --ndjson-file to write rotating NDJSON output."
+            )
+        if ndjson_max_size <= 0:
+            raise InvalidArgumentValueError("NDJSON max file size must be greater than 0.")
+    if parse_workers is not None and parse_workers < 1:
+        raise InvalidArgumentValueError("Parse workers must be at least 1.")
+    if stats_interval is not None and stats_interval <= 0:
+        raise InvalidArgumentValueError("Stats interval must be greater than 0.")
+    if workers is not None:
+        if workers < 1:
+            raise InvalidArgumentValueError("Workers must be at least 1.")
+        if parse_workers or record:
+            raise MutuallyExclusiveArgumentError(
+                "--workers cannot be combined with --parse-workers or --record."
+            )
+    if max_reconnects is not None and max_reconnects < 0:
+        raise InvalidArgumentValueError("Max reconnects cannot be negative.")
+    if aggregate is not None and aggregate <= 0:
+        raise InvalidArgumentValueError("Aggregate window must be greater than 0.")
+    if aggregate_by and not aggregate:
+        raise RequiredArgumentMissingError(
+            "Please provide --aggregate to group rollups by module or component."
+        )
+    if sample_every is not None and sample_every < 1:
+        raise InvalidArgumentValueError("Sample every must be at least 1.")
+    if sample_rate is not None and sample_rate <= 0:
+        raise InvalidArgumentValueError("Sample rate must be greater than 0.")
+    if sample_every and sample_rate:
+        raise MutuallyExclusiveArgumentError(
+            "Please provide either --sample-every or --sample-rate, not both."
+        )
+
     device_ids = {}
     if device_query:
         devices_result = iot_query(
@@ -3055,7 +3475,7 @@ def _iot_hub_monitor_events(
                 device_ids[device_result["deviceId"]] = True
 
     discovery = IotHubDiscovery(cmd)
-    target = discovery.get_target(
+    target_config = discovery.get_target(
         resource_name=hub_name,
         resource_group_name=resource_group_name,
         include_events=True,
@@ -3071,7 +3491,7 @@ def _iot_hub_monitor_events(
         CommonHandlerArguments,
     )
 
-    target = hub_target_builder.EventTargetBuilder().build_iot_hub_target(target)
+    target = hub_target_builder.EventTargetBuilder().build_iot_hub_target(target_config)
     target.add_consumer_group(consumer_group)
 
     on_start_string = generate_on_start_string(device_id=device_id)
@@ -3086,17 +3506,120 @@ def _iot_hub_monitor_events(
         device_id=device_id,
         interface_name=interface_name,
         module_id=module_id,
+        aggregate_window=aggregate,
+        aggregate_by=aggregate_by,
+        sample_every=sample_every,
+        sample_rate=sample_rate,
     )
 
-    handler = CommonHandler(handler_args)
+    sink = None
+    if ndjson or ndjson_file:
+        from azext_iot.monitor.sink import NdjsonSink
 
-    start_single_monitor(
-        target=target,
-        enqueued_time_utc=enqueued_time,
-        on_start_string=on_start_string,
-        on_message_received=handler.parse_message,
-        timeout=timeout,
-    )
+        sink = NdjsonSink(
+            output_file=ndjson_file,
+            max_file_size=int(ndjson_max_size * 1024 * 1024) if ndjson_max_size else None,
+        )
+        if not ndjson_file:
+            # keep stdout a clean event stream for downstream tools
+            print(on_start_string, file=sys.stderr, flush=True)
+            on_start_string = None
+
+    handler = CommonHandler(handler_args, sink=sink)
+
+    pipeline = None
+    if parse_workers:
+        from azext_iot.monitor.pipeline import MessagePipeline
+
+        pipeline = MessagePipeline(
+            process=handler.process_message,
+            emit=handler.emit_message,
+            workers=parse_workers,
+        )
+
+    checkpoint_store = None
+    if checkpoint_dir:
+        from azext_iot.monitor.checkpoint import CheckpointStore
+
+        checkpoint_store = CheckpointStore(checkpoint_dir)
+
+    monitor_stats = None
+    if stats or stats_interval:
+        from azext_iot.monitor.stats import MonitorStats, STATS_DEFAULT_INTERVAL
+
+        monitor_stats = MonitorStats(
+            interval=stats_interval or STATS_DEFAULT_INTERVAL, output=stats or "text"
+        )
+
+    recorder = None
+    if record:
+        from azext_iot.monitor.recording import MessageRecorder
+
+        recorder = MessageRecorder(record)
+
+    reconnect = None
+    if max_reconnects:
+        from azext_iot.monitor.health import ReconnectPolicy
+
+        reconnect = ReconnectPolicy(max_attempts=max_reconnects)
+
+    if handler.aggregator or handler.sampler:
+        from azext_iot.monitor.utility import get_loop
+
+        if handler.aggregator:
+            handler.aggregator.start(get_loop())
+        # worker processes sample, and report what they suppressed, on their own
+        if handler.sampler and not workers:
+            handler.sampler.start(get_loop())
+
+    try:
+        if workers:
+            from azext_iot.monitor.workers import start_worker_monitors
+
+            start_worker_monitors(
+                target_config=target_config,
+                target=target,
+                workers=workers,
+                enqueued_time_utc=enqueued_time,
+                on_start_string=on_start_string,
+                handler_args=handler_args,
+                emit=handler.emit_message,
+                timeout=timeout,
+                checkpoint_store=checkpoint_store,
+                prefetch=prefetch,
+                batch_size=batch_size,
+                stats=monitor_stats,
+                reconnect=reconnect,
+            )
+            return
+        start_single_monitor(
+            target=target,
+            enqueued_time_utc=enqueued_time,
+            on_start_string=on_start_string,
+            on_message_received=handler.parse_message,
+            timeout=timeout,
+            checkpoint_store=checkpoint_store,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            on_batch_received=handler.parse_messages,
+            pipeline=pipeline,
+            stats=monitor_stats,
+            recorder=recorder,
+            reconnect=reconnect,
+        )
+    finally:
+        if pipeline:
+            pipeline.shutdown()
+        if recorder:
+            recorder.close()
+        # emit the rollups of the last, partial, window
+        if handler.aggregator:
+            handler.aggregator.stop()
+        if handler.sampler and not workers:
+            handler.sampler.stop()
+        # flush whatever is buffered, including when the monitor is stopped with ctrl-c
+        if sink:
+            sink.close()
 
 
 def iot_hub_distributed_tracing_update(
@@ -3243,11 +3766,16 @@ def _get_hub_connection_string(
     ]
 
 
-def _iot_hub_monitor_feedback(target, device_id, wait_on_id):
+def _iot_hub_monitor_feedback(target, device_id, wait_on_id, wait_timeout=None, sent_time=None):
     from azext_iot.monitor import event
 
-    event.monitor_feedback(
-        target=target, device_id=device_id, wait_on_id=wait_on_id, token_duration=3600
+    return event.monitor_feedback(
+        target=target,
+        device_id=device_id,
+        wait_on_id=wait_on_id,
+        token_duration=3600,
+        wait_timeout=wait_timeout,
+        sent_time=sent_time,
     )
 
 
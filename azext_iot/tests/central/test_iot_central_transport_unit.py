@@ -0,0 +1,128 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import pytest
+import responses
+
+from datetime import datetime, timedelta
+from azext_iot.central.services import _transport, _utility, device as device_svc
+from azext_iot.central.models.enum import ApiVersion
+
+app_id = "myapp"
+devices_url = "https://myapp.azureiotcentral.com/api/devices"
+
+
+@pytest.fixture
+def sleep(mocker):
+    return mocker.patch.object(_transport, "sleep")
+
+
+@pytest.fixture
+def aad_token(mocker):
+    expires_on = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S.%f")
+    return mocker.patch.object(
+        _transport.auth,
+        "get_aad_token",
+        return_value={"accessToken": "aad-token", "expiresOn": expires_on},
+    )
+
+
+class TestCentralTransport:
+    def test_session_per_host(self):
+        session = _transport.get_session("https://myapp.azureiotcentral.com/api/devices")
+
+        assert _transport.get_session("https://MyApp.azureiotcentral.com/api/users") is session
+        assert _transport.get_session("https://other.azureiotcentral.com/api/devices") is not session
+
+        _transport.clear_transport_cache()
+        assert _transport.get_session("https://myapp.azureiotcentral.com/api/devices") is not session
+
+    def test_retry_after(self, mocked_response, sleep):
+        mocked_response.add(responses.GET, devices_url, status=429, headers={"Retry-After": "2"})
+        mocked_response.add(responses.GET, devices_url, status=503)
+        mocked_response.add(responses.GET, devices_url, status=200, json={"value": []})
+
+        response = _transport.get(devices_url, params={"api-version": "1.0"})
+
+        assert response.status_code == 200
+        assert len(mocked_response.calls) == 3
+        assert sleep.call_args_list[0][0][0] == 2
+        # exponential backoff with jitter without a Retry-After
+        assert 0.5 <= sleep.call_args_list[1][0][0] <= 1
+
+    def test_retry_gives_up(self, mocked_response, sleep):
+        for _ in range(_transport.RETRY_MAX_ATTEMPTS):
+            mocked_response.add(responses.PUT, devices_url, status=503, json={"error": {"code": "ServiceUnavailable"}})
+
+        response = _transport.put(devices_url, json={})
+
+        assert response.status_code == 503
+        assert len(mocked_response.calls) == _transport.RETRY_MAX_ATTEMPTS
+        assert sleep.call_count == _transport.RETRY_MAX_ATTEMPTS - 1
+
+    def test_retry_non_idempotent(self, mocked_response, sleep):
+        # may have run the command already, only throttled requests are retried
+        mocked_response.add(responses.POST, devices_url, status=429)
+        mocked_response.add(responses.POST, devices_url, status=503)
+
+        assert _transport.post(devices_url, json={}).status_code == 503
+        assert len(mocked_response.calls) == 2
+        assert sleep.call_count == 1
+
+    def test_no_retry(self, mocked_response, sleep):
+        mocked_response.add(responses.GET, devices_url, status=500, json={})
+
+        assert _transport.get(devices_url).status_code == 500
+        sleep.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [("5", 5), ("0.5", 0.5), ("-1", 0), ("Wed, 21 Oct 2015 07:28:00 GMT", 0), ("soon", None), (None, None)],
+    )
+    def test_parse_retry_after(self, value, expected):
+        assert _transport._parse_retry_after(value) == expected
+
+    def test_aad_token_cache(self, mocker, aad_token):
+        assert _transport.get_aad_token(None)["accessToken"] == "aad-token"
+        assert _transport.get_aad_token(None)["accessToken"] == "aad-token"
+        assert aad_token.call_count == 1
+        assert aad_token.call_args[1]["resource"] == _transport.CENTRAL_RESOURCE
+
+        # tokens close to their expiry are refreshed
+        mocker.patch.object(_transport, "time", return_value=datetime.now().timestamp() + 3600)
+        _transport.get_aad_token(None)
+        assert aad_token.call_count == 2
+
+    def test_aad_token_unknown_expiry(self, aad_token):
+        aad_token.return_value = {"accessToken": "aad-token", "expiresOn": "N/A"}
+
+        _transport.get_aad_token(None)
+        _transport.get_aad_token(None)
+
+        assert aad_token.call_count == 2
+
+    def test_paging_reuses_token_and_session(self, mocker, mocked_response, aad_token):
+        session = _transport.get_session(devices_url)
+        session_request = mocker.spy(session, "request")
+        mocked_response.add(
+            responses.GET,
+            devices_url,
+            json={"value": [{"id": "device1"}], "nextLink": devices_url + "?page=2"},
+        )
+        mocked_response.add(
+            responses.GET,
+            devices_url,
+            body=json.dumps({"value": [{"id": "device2"}]}),
+        )
+
+        devices = device_svc.list_devices(None, app_id, filter=None, token=None, api_version=ApiVersion.v1.value)
+        _utility.get_headers(None, None)
+
+        assert [device.id for device in devices] == ["device1", "device2"]
+        assert session_request.call_count == 2
+        assert aad_token.call_count == 1
+        assert mocked_response.calls[1].request.headers["Authorization"] == "Bearer aad-token"
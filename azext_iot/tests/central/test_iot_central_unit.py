@@ -228,8 +228,8 @@ class TestCentralDeviceProvider:
         assert mock_device_svc.list_devices.call_count == 1
         assert children_devices == self._edge_children
 
-    @mock.patch("azext_iot.central.services.device.requests")
-    @mock.patch("azext_iot.central.services.device.get_aad_token")
+    @mock.patch("azext_iot.central.services.device._transport")
+    @mock.patch("azext_iot.central.services._transport.get_aad_token")
     def test_should_list_device_modules(self, get_aad_token_svc, req_svc):
         # setup
         provider = CentralDeviceProvider(
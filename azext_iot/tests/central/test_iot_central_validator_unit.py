@@ -6,9 +6,15 @@
 
 import pytest
 import collections
+import time
 
 from azext_iot.central.models.v1 import TemplateV1
-from azext_iot.monitor.central_validator import validate, extract_schema_type
+from azext_iot.monitor.central_validator import (
+    validate,
+    extract_schema_type,
+    compile_validator,
+    get_validation_plan,
+)
 
 from azext_iot.tests.helpers import load_json
 from azext_iot.tests.test_constants import FileNames
@@ -43,6 +49,34 @@ class TestTemplateValidations:
             expected_component_list
         )
 
+    @pytest.mark.parametrize(
+        "template_file",
+        [
+            FileNames.central_device_template_file,
+            FileNames.central_property_validation_template_file,
+        ],
+    )
+    def test_template_schema_index(self, template_file):
+        template = TemplateV1(load_json(template_file))
+
+        for is_component in [False, True]:
+            entities = template.components if is_component else template.interfaces
+            names = {name for entity in entities.values() for name in entity}
+            for name in names | {"unknown"}:
+                # first entity defining the name wins
+                expected = next(
+                    (entity[name] for entity in entities.values() if entity.get(name)),
+                    None,
+                )
+                assert template.get_schema(name, is_component=is_component) is expected
+
+        for name in {name for entity in template.interfaces.values() for name in entity}:
+            assert template._get_interface_list_property(name) == [
+                interface
+                for interface, schema_names in template.schema_names.items()
+                if name in schema_names
+            ]
+
 
 class TestExtractSchemaType:
     def test_extract_schema_type_component(self):
@@ -236,6 +270,7 @@ class TestPredefinedComplexType:
     )
     def test_vector(self, value, expected_result):
         assert validate({"schema": "vector"}, value) == expected_result
+        assert compile_validator({"schema": "vector"})(value) == expected_result
 
 
 class TestComplexType:
@@ -385,3 +420,194 @@ class TestComplexType:
         )
         schema = template.get_schema("RidiculousObject")
         assert validate(schema, value) == expected_result
+
+
+SAMPLE_VALUES = [
+    None,
+    True,
+    1,
+    2,
+    123.123,
+    "A",
+    "2020-01-01",
+    "2020-01-01T12:00:00Z",
+    "P1D",
+    "12:00:00",
+    {"lat": 1, "lon": 2, "alt": 3},
+    {"x": 1, "y": 2, "z": 3},
+    {"Double": 123},
+    {"Double": "123"},
+    {"LayerC": {"Depth1C": {"SomeTelemetry": 100}}},
+    {"LayerC": {"Depth1C": {"SomeTelemetry": "100"}}},
+    [1, 2],
+]
+
+
+class TestValidationPlan:
+    @pytest.mark.parametrize(
+        "template_file",
+        [
+            FileNames.central_device_template_file,
+            FileNames.central_deeply_nested_device_template_file,
+            FileNames.central_property_validation_template_file,
+        ],
+    )
+    def test_plan_matches_template_schemas(self, template_file):
+        template = TemplateV1(load_json(template_file))
+        plan = get_validation_plan(template)
+        assert get_validation_plan(template) is plan
+
+        lookups = [
+            (False, "", list(template.interfaces)),
+            (True, "", list(template.components)),
+        ]
+        lookups.extend((False, name, [name]) for name in template.interfaces)
+        lookups.extend((True, name, [name]) for name in template.components)
+
+        for is_component, identifier, entity_names in lookups:
+            fields = plan.get_fields(is_component=is_component, identifier=identifier)
+            entities = template.components if is_component else template.interfaces
+            names = {name for entity in entity_names for name in entities[entity]}
+            for name in names | {"unknown"}:
+                schema = template.get_schema(
+                    name, is_component=is_component, identifier=identifier
+                )
+                field = fields.get(name)
+                if not schema:
+                    assert field is None
+                    continue
+
+                schema_type, validator = field
+                assert schema_type == extract_schema_type(schema)
+                for value in SAMPLE_VALUES:
+                    assert validator(value) == validate(schema, value)
+
+    @pytest.mark.parametrize(
+        "schema",
+        [
+            {"schema": "boolean"},
+            {"schema": "unknown"},
+            {},
+            "not a schema",
+            {"schema": {"@type": "Enum", "enumValues": [{"name": "no value"}]}},
+            {"schema": {"@type": "Object", "fields": [{"schema": "double"}]}},
+            {"schema": {"@type": ["Object"], "fields": [{"name": "a", "schema": "string"}]}},
+        ],
+    )
+    def test_compile_validator_edge_cases(self, schema):
+        validator = compile_validator(schema)
+        for value in SAMPLE_VALUES + [{"a": "b"}, {"a": 1}]:
+            try:
+                expected = validate(schema, value)
+            except Exception as e:
+                with pytest.raises(type(e)):
+                    validator(value)
+            else:
+                assert validator(value) == expected
+
+
+class TestValidationPlanBenchmark:
+    interface_count = 50
+    field_count = 40
+
+    def _large_template(self):
+        schemas = ["boolean", "double", "integer", "string", "dateTime", "vector"]
+        interfaces = []
+        for interface in range(self.interface_count):
+            contents = [
+                {
+                    "@type": "Telemetry",
+                    "name": "telemetry_{}_{}".format(interface, field),
+                    "schema": schemas[field % len(schemas)],
+                }
+                for field in range(self.field_count)
+            ]
+            contents.append(
+                {
+                    "@type": "Telemetry",
+                    "name": "object_{}".format(interface),
+                    "schema": {
+                        "@type": "Object",
+                        "fields": [
+                            {"name": "enum", "schema": {"@type": "Enum", "enumValues": [
+                                {"name": "one", "enumValue": 1}, {"name": "two", "enumValue": 2}
+                            ]}},
+                            {"name": "vector", "schema": "vector"},
+                        ],
+                    },
+                }
+            )
+            interfaces.append(
+                {
+                    "@id": "urn:benchmark:interface{}:1".format(interface),
+                    "schema": {"@type": "Interface", "contents": contents},
+                }
+            )
+        return TemplateV1(
+            {
+                "@id": "urn:benchmark:template:1",
+                "displayName": "benchmark",
+                "capabilityModel": {"@id": "urn:benchmark:dcm:1", "extends": interfaces},
+            }
+        )
+
+    def _messages(self):
+        values = [True, 1.5, 2, "value", "2020-01-01T12:00:00Z", {"x": 1, "y": 2, "z": 3}]
+        # fields spread over the template, so most lookups have to search many interfaces
+        return [
+            dict(
+                [
+                    (
+                        "telemetry_{}_{}".format(interface, field),
+                        values[field % len(values)],
+                    )
+                    for interface in range(index % 5, self.interface_count, 5)
+                    for field in range(0, self.field_count, 8)
+                ]
+                + [("object_{}".format(index % self.interface_count), {"enum": 1, "vector": {"x": 1, "y": 2, "z": 3}})]
+            )
+            for index in range(50)
+        ]
+
+    def _rate(self, validate_message, messages, duration=0.5):
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            for message in messages:
+                validate_message(message)
+            count += len(messages)
+        return count / (time.perf_counter() - start)
+
+    def test_messages_per_second(self):
+        template = self._large_template()
+        messages = self._messages()
+
+        def _validate_with_template(message):
+            valid = True
+            for name, value in message.items():
+                schema = template.get_schema(name)
+                expected_type = extract_schema_type(schema)
+                valid = valid and bool(expected_type) and validate(schema, value)
+            return valid
+
+        def _validate_with_plan(message):
+            fields = get_validation_plan(template).get_fields()
+            valid = True
+            for name, value in message.items():
+                expected_type, validator = fields[name]
+                valid = valid and bool(expected_type) and validator(value)
+            return valid
+
+        for message in messages:
+            assert _validate_with_template(message)
+            assert _validate_with_plan(message)
+
+        template_rate = self._rate(_validate_with_template, messages)
+        plan_rate = self._rate(_validate_with_plan, messages)
+        print(
+            "\n{} fields, {} interfaces: {:.0f} msg/s with template lookups, "
+            "{:.0f} msg/s with a validation plan".format(
+                len(messages[0]), self.interface_count, template_rate, plan_rate
+            )
+        )
+        assert plan_rate > template_rate
@@ -102,6 +102,23 @@ def fixture_cmd(mocker):
     return AzCliCommand(cli.loader, "iot-extension command", test_handler1)
 
 
+@pytest.fixture(autouse=True)
+def fixture_clear_caches():
+    # SDK clients, SAS and AAD tokens are cached per process, never share them between tests
+    from azext_iot._factory import clear_sdk_cache
+    from azext_iot.central.services._transport import clear_transport_cache
+    from azext_iot.common.sas_token_auth import get_sas_token_cache
+
+    def _clear():
+        clear_sdk_cache()
+        clear_transport_cache()
+        get_sas_token_cache().clear()
+
+    _clear()
+    yield
+    _clear()
+
+
 @pytest.fixture()
 def fixture_device(mocker):
     get_device = mocker.patch(path_get_device)
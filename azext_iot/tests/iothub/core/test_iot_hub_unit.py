@@ -13,6 +13,7 @@ from azext_iot.operations import hub as subject
 from azext_iot.tests.generators import generate_generic_id
 from azext_iot.common.utility import ensure_iothub_sdk_min_version
 from azext_iot.constants import IOTHUB_TRACK_2_SDK_MIN_VERSION
+from azext_iot.tests.conftest import mock_target
 
 hub_name = "HUBNAME"
 blob_container_uri = "https://example.com"
@@ -339,3 +340,60 @@ class TestIoTHubDeviceIdentityImport(object):
                 identity=req["identity"],
                 resource_group_name=req["resource_group_name"],
             )
+
+
+class TestIoTHubQueryStream(object):
+    @pytest.fixture
+    def service_client(self, mocked_response, fixture_ghcs):
+        pages = [
+            [{"deviceId": generate_generic_id()} for _ in range(3)] for _ in range(4)
+        ]
+
+        def query_callback(request):
+            token = request.headers.get("x-ms-continuation")
+            index = int(token) if token else 0
+            headers = {"x-ms-continuation": str(index + 1) if index + 1 < len(pages) else ""}
+            return (200, headers, json.dumps(pages[index]))
+
+        mocked_response.add_callback(
+            method=responses.POST,
+            url="https://{}/devices/query".format(mock_target["entity"]),
+            callback=query_callback,
+            content_type="application/json",
+            match_querystring=False,
+        )
+        mocked_response.pages = pages
+        yield mocked_response
+
+    @pytest.mark.parametrize("top, expected_calls", [(None, 4), (7, 3), (3, 1)])
+    def test_query_stream(self, fixture_cmd, service_client, capsys, top, expected_calls):
+        expected = [twin for page in service_client.pages for twin in page][:top]
+        result = subject.iot_query(
+            fixture_cmd,
+            "select * from devices",
+            hub_name=mock_target["entity"],
+            top=top,
+            stream=True,
+        )
+
+        assert result is None
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line) for line in lines] == expected
+        assert len(service_client.calls) == expected_calls
+
+        if top:
+            item_counts = [
+                int(call.request.headers["x-ms-max-item-count"])
+                for call in service_client.calls
+            ]
+            assert item_counts == list(range(top, 0, -3))[:expected_calls]
+
+    def test_query_pages(self, fixture_cmd, service_client):
+        from azext_iot.operations.generic import _iterate_query
+        from azext_iot._factory import SdkResolver
+        from azext_iot.common.shared import SdkType
+        service_sdk = SdkResolver(target=mock_target).get_sdk(SdkType.service_sdk)
+        pages = _iterate_query(["select * from devices"], service_sdk.query.get_twins)
+
+        assert next(pages) == service_client.pages[0]
+        assert list(pages) == service_client.pages[1:]
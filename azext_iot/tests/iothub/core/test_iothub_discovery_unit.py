@@ -4,7 +4,15 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import os
 import pytest
+from threading import Lock
+from time import sleep, time
+from types import SimpleNamespace
+from azext_iot._factory import _invalidate_unauthorized_target
+from azext_iot.common import discovery_cache
+from azext_iot.common.base_discovery import DISCOVERY_MAX_WORKERS
+from azure.cli.core.azclierror import ResourceNotFoundError
 from azext_iot.iothub.providers.discovery import IotHubDiscovery
 from azext_iot.common._azure import parse_iot_hub_connection_string
 
@@ -56,3 +64,183 @@ class TestIoTHubDiscovery:
         assert target["entity"] == parsed_fake_login["HostName"]
         assert target["policy"] == parsed_fake_login["SharedAccessKeyName"]
         assert target["primarykey"] == parsed_fake_login["SharedAccessKey"]
+
+
+class TestIoTHubDiscoveryCache:
+    @pytest.fixture
+    def cache_path(self, mocker, monkeypatch, tmp_path):
+        path = str(tmp_path / "iot_discovery_cache.json")
+        mocker.patch.object(discovery_cache, "get_discovery_cache_path", return_value=path)
+        monkeypatch.setenv("AZURE_IOT_DISCOVERY_CACHE_TTL", "3600")
+        return path
+
+    @pytest.fixture
+    def mgmt_client(self, mocker):
+        resource = SimpleNamespace(
+            name="myhub",
+            location="westus2",
+            sku=SimpleNamespace(tier="Standard"),
+            additional_properties={"resourcegroup": "myrg"},
+            properties=SimpleNamespace(
+                host_name="myhub.azure-devices.net",
+                event_hub_endpoints={
+                    "events": SimpleNamespace(
+                        endpoint="sb://ihsuprodbyres.servicebus.windows.net/",
+                        partition_count=2,
+                        path="myhub",
+                        partition_ids=["0", "1"],
+                    )
+                },
+            ),
+        )
+        policy = SimpleNamespace(
+            key_name="iothubowner",
+            rights="RegistryWrite, ServiceConnect, DeviceConnect",
+            primary_key="cHJpbWFyeQ==",
+            secondary_key="c2Vjb25kYXJ5",
+        )
+        client = mocker.MagicMock()
+        client.list_by_subscription.return_value.by_page.return_value = [[resource]]
+        client.list_keys.return_value.by_page.return_value = [[policy]]
+        client.get_keys_for_key_name.return_value = policy
+        return client
+
+    def _get_discovery(self, cmd, client):
+        discovery = IotHubDiscovery(cmd=cmd)
+        discovery.client = client
+        discovery.track2 = True
+        discovery.sub_id = "mysub"
+        return discovery
+
+    def test_cache_without_keys(self, fixture_cmd, cache_path, mgmt_client):
+        target = self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+        cached = self._get_discovery(fixture_cmd, mgmt_client).get_target("MyHub", key_type="secondary")
+
+        # the resource and policy name are reused, only the keys are fetched
+        assert mgmt_client.list_by_subscription.call_count == 1
+        assert mgmt_client.list_keys.call_count == 1
+        assert mgmt_client.get_keys_for_key_name.call_args[1] == {
+            "resource_name": "MyHub", "resource_group_name": "myrg", "key_name": "iothubowner"
+        }
+        assert cached == dict(
+            target,
+            cs="HostName=myhub.azure-devices.net;SharedAccessKeyName=iothubowner;SharedAccessKey=c2Vjb25kYXJ5",
+        )
+        with open(cache_path) as f:
+            content = f.read()
+        assert "myrg" in content
+        assert "cHJpbWFyeQ==" not in content
+
+    def test_cache_with_keys(self, monkeypatch, fixture_cmd, cache_path, mgmt_client):
+        monkeypatch.setenv("AZURE_IOT_DISCOVERY_CACHE_KEYS", "true")
+        target = self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub", include_events=True)
+
+        assert self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub", include_events=True) == target
+        assert "events" not in self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub", resource_group_name="MYRG")
+        assert mgmt_client.list_by_subscription.call_count == 1
+        assert mgmt_client.list_keys.call_count == 1
+        assert mgmt_client.get_keys_for_key_name.call_count == 0
+        assert os.stat(cache_path).st_mode & 0o077 == 0
+
+        # another resource group is discovered again
+        mgmt_client.get.return_value = mgmt_client.list_by_subscription.return_value.by_page.return_value[0][0]
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub", resource_group_name="otherrg")
+        assert mgmt_client.get.call_count == 1
+
+    def test_cache_expiry(self, mocker, fixture_cmd, cache_path, mgmt_client):
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+        mocker.patch.object(discovery_cache, "time", return_value=time() + 3601)
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+
+        assert mgmt_client.list_by_subscription.call_count == 2
+
+    def test_cache_invalidation(self, fixture_cmd, cache_path, mgmt_client):
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+
+        # the cached policy is gone
+        mgmt_client.get_keys_for_key_name.side_effect = [Exception("Not found"), mgmt_client.get_keys_for_key_name.return_value]
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+        assert mgmt_client.list_by_subscription.call_count == 2
+
+        # the hub rejected the cached credentials
+        _invalidate_unauthorized_target(SimpleNamespace(status_code=403, url="https://myhub.azure-devices.net/devices"))
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+        assert mgmt_client.list_by_subscription.call_count == 2
+
+        _invalidate_unauthorized_target(SimpleNamespace(status_code=401, url="https://myhub.azure-devices.net/devices"))
+        self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+        assert mgmt_client.list_by_subscription.call_count == 3
+
+    def test_cache_disabled(self, monkeypatch, fixture_cmd, cache_path, mgmt_client):
+        monkeypatch.delenv("AZURE_IOT_DISCOVERY_CACHE_TTL")
+        for _ in range(2):
+            self._get_discovery(fixture_cmd, mgmt_client).get_target("myhub")
+
+        assert mgmt_client.list_by_subscription.call_count == 2
+        assert not os.path.exists(cache_path)
+
+
+class TestIoTHubDiscoveryTargets:
+    def _build_resource(self, name):
+        return SimpleNamespace(
+            name=name,
+            location="westus2",
+            sku=SimpleNamespace(tier="Standard"),
+            additional_properties={"resourcegroup": "myrg"},
+            properties=SimpleNamespace(host_name="{}.azure-devices.net".format(name)),
+        )
+
+    def test_get_targets(self, mocker, fixture_cmd):
+        resources = [self._build_resource("hub{}".format(i)) for i in range(20)]
+        active = []
+        concurrency = []
+        lock = Lock()
+
+        def _list_keys(resource_name, resource_group_name):
+            with lock:
+                active.append(resource_name)
+                concurrency.append(len(active))
+            sleep(0.01)
+            with lock:
+                active.remove(resource_name)
+            if resource_name == "hub3":
+                raise ResourceNotFoundError("Gone")
+            policies = mocker.MagicMock()
+            policies.by_page.return_value = [[
+                SimpleNamespace(
+                    key_name="iothubowner",
+                    rights="RegistryWrite, ServiceConnect, DeviceConnect",
+                    primary_key=resource_name,
+                    secondary_key=resource_name,
+                )
+            ]]
+            return policies
+
+        client = mocker.MagicMock()
+        client.list_by_subscription.return_value.by_page.return_value = [resources[:10], resources[10:]]
+        client.list_keys.side_effect = _list_keys
+        discovery = IotHubDiscovery(cmd=fixture_cmd)
+        discovery.client = client
+        discovery.track2 = True
+        warning = mocker.patch("azext_iot.common.base_discovery.logger.warning")
+
+        targets = discovery.get_targets()
+
+        # listed resources are not fetched again, and targets keep their order
+        assert client.get.call_count == 0
+        assert [target["primarykey"] for target in targets] == [
+            resource.name for resource in resources if resource.name != "hub3"
+        ]
+        assert 1 < max(concurrency) <= DISCOVERY_MAX_WORKERS
+        warning.assert_called_once()
+        assert warning.call_args[0][1] == "hub3"
+
+    def test_get_targets_empty(self, mocker, fixture_cmd):
+        client = mocker.MagicMock()
+        client.list_by_resource_group.return_value.by_page.return_value = []
+        discovery = IotHubDiscovery(cmd=fixture_cmd)
+        discovery.client = client
+        discovery.track2 = True
+
+        assert discovery.get_targets(resource_group_name="myrg") == []
+        assert client.list_by_resource_group.call_args[1] == {"resource_group_name": "myrg"}
@@ -0,0 +1,223 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Counts the HTTPS connections opened by data plane commands against a local IoT Hub stand in.
+
+Run with -s to see the results.
+"""
+
+import datetime
+import ipaddress
+import json
+import ssl
+import threading
+import pytest
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from azext_iot import _factory
+from azext_iot._factory import SdkResolver
+from azext_iot.common.shared import SdkType
+from azext_iot.operations import hub as subject
+
+CHILD_COUNT = 100
+EDGE_DEVICE_ID = "edge-device"
+SAS_KEY = "a2V5"
+
+
+class _HubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super(_HubRequestHandler, self).setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        device_id = self.path.split("?")[0].split("/")[-1]
+        device = {
+            "deviceId": device_id,
+            "etag": "AAAAAAAAAAE=",
+            "capabilities": {"iotEdge": device_id == EDGE_DEVICE_ID},
+            "deviceScope": "ms-azure-iot-edge://{}-1".format(device_id),
+            "parentScopes": [],
+        }
+        self._respond(device)
+
+    def do_PUT(self):
+        self._respond(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _respond(self, body):
+        with self.server.lock:
+            self.server.requests += 1
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def _write_certificate(directory) -> tuple:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]
+            ),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = str(directory / "hub.pem")
+    key_path = str(directory / "hub.key")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_path, key_path
+
+
+@pytest.fixture
+def local_hub(tmp_path, monkeypatch):
+    cert_path, key_path = _write_certificate(tmp_path)
+    # requests picks the bundle up since msrest sessions trust the environment
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", cert_path)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HubRequestHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def local_target(local_hub):
+    return {
+        "entity": "localhost:{}".format(local_hub.server_address[1]),
+        "policy": "iothubowner",
+        "primarykey": SAS_KEY,
+        "secondarykey": SAS_KEY,
+        "cmd": None,
+    }
+
+
+def _get_adapter(sdk_client):
+    session = sdk_client.config.pipeline._sender.driver.session
+    return session.adapters["https://"]
+
+
+class TestSdkClientPool:
+    def test_children_add_connections(self, mocker, fixture_cmd, local_hub, local_target):
+        mocker.patch.object(subject.IotHubDiscovery, "get_target", return_value=local_target)
+        children = ["child-{}".format(i) for i in range(CHILD_COUNT)]
+
+        subject.iot_device_children_add(fixture_cmd, EDGE_DEVICE_ID, children)
+
+        print(
+            "\nchildren add ({} children): {} requests over {} connections".format(
+                CHILD_COUNT, local_hub.requests, local_hub.connections
+            )
+        )
+        # the edge device and every child are fetched and every child is updated
+        assert local_hub.requests == 2 * CHILD_COUNT + 1
+        assert local_hub.connections == 1
+
+    def test_clients_share_connections(self, local_hub, local_target):
+        service_sdk = SdkResolver(local_target).get_sdk(SdkType.service_sdk)
+        device_sdk = SdkResolver(local_target, device_id="device1").get_sdk(SdkType.device_sdk)
+
+        service_sdk.devices.get_identity(id="device1")
+        device_sdk.device.send_device_event(id="device1", message="ping")
+        SdkResolver(local_target).get_sdk(SdkType.service_sdk).devices.get_identity(id="device2")
+
+        assert local_hub.requests == 3
+        assert local_hub.connections == 1
+
+    def test_clients_keep_their_retries(self, local_hub, local_target):
+        service_sdk = SdkResolver(local_target).get_sdk(SdkType.service_sdk)
+        invoke_sdk = SdkResolver(local_target).get_sdk(SdkType.service_sdk, retries=1)
+        assert invoke_sdk is not service_sdk
+
+        service_sdk.devices.get_identity(id="device1")
+        invoke_sdk.devices.get_identity(id="device1")
+        assert _get_adapter(invoke_sdk).max_retries.total == 1
+        assert _get_adapter(service_sdk).max_retries.total == service_sdk.config.retry_policy.retries
+
+        # changes after the session was created apply to the next request
+        service_sdk.config.retry_policy.retries = 2
+        service_sdk.devices.get_identity(id="device2")
+        assert _get_adapter(service_sdk).max_retries.total == 2
+        assert _get_adapter(invoke_sdk).max_retries.total == 1
+
+        assert local_hub.requests == 3
+        assert local_hub.connections == 1
+
+    def test_sdk_cache(self, local_target):
+        resolver = SdkResolver(local_target)
+        service_sdk = resolver.get_sdk(SdkType.service_sdk)
+
+        assert SdkResolver(dict(local_target)).get_sdk(SdkType.service_sdk) is service_sdk
+        assert service_sdk.config.keep_alive
+        assert resolver.get_sdk(SdkType.dps_sdk) is not service_sdk
+        assert SdkResolver(local_target, device_id="device1").get_sdk(SdkType.device_sdk) is not (
+            SdkResolver(local_target, device_id="device2").get_sdk(SdkType.device_sdk)
+        )
+
+        # new credentials invalidate the cached client
+        rotated = dict(local_target, primarykey="bmV3a2V5")
+        assert SdkResolver(rotated).get_sdk(SdkType.service_sdk) is not service_sdk
+        assert SdkResolver(rotated).get_sdk(SdkType.service_sdk) is SdkResolver(rotated).get_sdk(
+            SdkType.service_sdk
+        )
+
+        # explicit credentials are never cached
+        override = SdkResolver(local_target, auth_override=object())
+        assert override.get_sdk(SdkType.service_sdk) is not override.get_sdk(SdkType.service_sdk)
+
+        _factory.clear_sdk_cache()
+        assert SdkResolver(local_target).get_sdk(SdkType.service_sdk) is not service_sdk
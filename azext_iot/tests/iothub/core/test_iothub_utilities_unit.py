@@ -4,8 +4,11 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from azext_iot.common.sas_token_auth import SasTokenAuthentication
+from azext_iot.common.sas_token_auth import SasTokenAuthentication, SasTokenCache, get_sas_token_cache
 import pytest
+from threading import Thread
+from azext_iot.common import sas_token_auth
+from azext_iot.dps.services.auth import get_dps_sas_auth_header
 from knack.cli import CLIError
 from azext_iot.operations import hub as subject
 from azext_iot.tests.generators import generate_generic_id
@@ -83,3 +86,84 @@ class TestGenerateSasToken:
                 cmd=fixture_cmd,
                 connection_string=req["connection_string"],
             )
+
+
+class TestSasTokenCache:
+    @pytest.fixture
+    def clock(self, mocker):
+        now = [1000.0]
+        mocker.patch.object(sas_token_auth, "time", side_effect=lambda: now[0])
+        return now
+
+    def test_reuse_token(self, clock):
+        auth = SasTokenAuthentication("myhub.azure-devices.net", "iothubowner", "a2V5", 3600)
+        token = auth.generate_sas_token()
+        assert "se=4600" in token
+
+        # the same uri, policy and key share the token until half its lifetime has passed
+        clock[0] += 1799
+        assert SasTokenAuthentication("myhub.azure-devices.net", "iothubowner", "a2V5").generate_sas_token() == token
+        assert SasTokenAuthentication("myhub.azure-devices.net", "iothubowner", "bmV3", 3600).generate_sas_token() != token
+        assert SasTokenAuthentication("myhub.azure-devices.net", "service", "a2V5", 3600).generate_sas_token() != token
+        assert "se=2800" in SasTokenAuthentication("myhub.azure-devices.net", "iothubowner", "a2V5", 1).generate_sas_token()
+
+        clock[0] += 1
+        refreshed = auth.generate_sas_token()
+        assert "se=6400" in refreshed
+
+        # absolute tokens are never cached
+        assert "se=60" in SasTokenAuthentication("myhub.azure-devices.net", "iothubowner", "a2V5", 60).generate_sas_token(
+            absolute=True
+        )
+
+    def test_reuse_fraction(self, clock):
+        cache = SasTokenCache(reuse_fraction=0.9, max_size=2)
+        calls = []
+
+        def _generate(ttl):
+            calls.append(ttl)
+            return str(ttl)
+
+        assert cache.get_token("uri", "policy", "key", 100, _generate) == "1100"
+        clock[0] += 89
+        assert cache.get_token("uri", "policy", "key", 100, _generate) == "1100"
+        clock[0] += 1
+        assert cache.get_token("uri", "policy", "key", 100, _generate) == "1190"
+
+        # the oldest token is dropped once full
+        cache.get_token("uri2", "policy", "key", 100, _generate)
+        cache.get_token("uri3", "policy", "key", 100, _generate)
+        cache.get_token("uri", "policy", "key", 100, _generate)
+        assert calls == [1100, 1190, 1190, 1190, 1190]
+
+    def test_concurrent_tokens(self):
+        cache = SasTokenCache()
+        calls = []
+        tokens = []
+
+        def _generate(ttl):
+            calls.append(ttl)
+            return "token"
+
+        def _get_tokens():
+            tokens.extend(cache.get_token("uri", "policy", "key", 3600, _generate) for _ in range(500))
+
+        threads = [Thread(target=_get_tokens) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert tokens == ["token"] * 2000
+
+    def test_dps_sas_auth_header(self, clock):
+        token = get_dps_sas_auth_header("0ne00000001", "device1", "a2V5")
+
+        assert token.startswith("SharedAccessSignature sr=0ne00000001%2Fregistrations%2Fdevice1&sig=")
+        assert token.endswith("&se=22600&skn=registration")
+        assert get_dps_sas_auth_header("0ne00000001", "device1", "a2V5") is token
+        assert get_dps_sas_auth_header("0ne00000001", "device2", "a2V5") != token
+
+        get_sas_token_cache().clear()
+        assert get_dps_sas_auth_header("0ne00000001", "device1", "a2V5") is not token
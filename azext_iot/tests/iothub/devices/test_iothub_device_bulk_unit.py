@@ -0,0 +1,227 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import pytest
+import json
+import re
+import responses
+from azext_iot.operations import hub as subject
+from azext_iot.tests.conftest import mock_target
+from azext_iot.tests.generators import generate_generic_id
+from azure.cli.core.azclierror import FileOperationError, InvalidArgumentValueError
+
+bulk_url = re.compile("https://{}/devices".format(mock_target["entity"]))
+
+
+def _bulk_callback(errors_for=None):
+    errors_for = errors_for or []
+
+    def _callback(request):
+        devices = json.loads(request.body)
+        errors = [
+            {
+                "deviceId": device["id"],
+                "errorCode": "DeviceAlreadyExists",
+                "errorStatus": "Device already exists.",
+            }
+            for device in devices
+            if device["id"] in errors_for
+        ]
+        return (
+            400 if errors else 200,
+            {"Content-Type": "application/json; charset=utf-8"},
+            json.dumps({"isSuccessful": not errors, "errors": errors, "warnings": []}),
+        )
+
+    return _callback
+
+
+def _write_jsonl(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+class TestDeviceBulk:
+    @pytest.mark.parametrize("device_count, workers", [(1, 1), (100, 4), (250, 2)])
+    def test_device_bulk_create(
+        self, fixture_cmd, mocked_response, fixture_ghcs, tmp_path, device_count, workers
+    ):
+        mocked_response.add_callback(
+            method=responses.POST, url=bulk_url, callback=_bulk_callback()
+        )
+        device_ids = [generate_generic_id() for _ in range(device_count)]
+        manifest = _write_jsonl(
+            tmp_path / "devices.jsonl", [{"deviceId": d} for d in device_ids]
+        )
+
+        result = subject.iot_device_bulk_create(
+            fixture_cmd, manifest, mock_target["entity"], workers=workers
+        )
+
+        assert result == {
+            "total": device_count,
+            "succeeded": device_count,
+            "failed": 0,
+            "failures": [],
+        }
+        assert len(mocked_response.calls) == -(-device_count // 100)
+
+        sent = []
+        for call in mocked_response.calls:
+            body = json.loads(call.request.body)
+            assert len(body) <= 100
+            for device in body:
+                assert device["importMode"] == "create"
+                assert device["authentication"]["type"] == "sas"
+                assert device["capabilities"]["iotEdge"] is False
+                assert device["status"] == "enabled"
+            sent.extend(device["id"] for device in body)
+        assert sorted(sent) == sorted(device_ids)
+
+    def test_device_bulk_create_csv(
+        self, fixture_cmd, mocked_response, fixture_ghcs, tmp_path
+    ):
+        mocked_response.add_callback(
+            method=responses.POST, url=bulk_url, callback=_bulk_callback()
+        )
+        manifest = tmp_path / "devices.csv"
+        manifest.write_text(
+            "deviceId,edgeEnabled,authMethod,primaryThumbprint,status\n"
+            "edge1,true,,,disabled\n"
+            "leaf1,false,x509_thumbprint,123,\n"
+        )
+
+        result = subject.iot_device_bulk_create(
+            fixture_cmd, str(manifest), mock_target["entity"]
+        )
+        assert result["succeeded"] == 2
+
+        body = json.loads(mocked_response.calls[0].request.body)
+        assert body[0]["id"] == "edge1"
+        assert body[0]["capabilities"]["iotEdge"] is True
+        assert body[0]["status"] == "disabled"
+        assert body[1]["id"] == "leaf1"
+        assert body[1]["authentication"]["type"] == "selfSigned"
+        assert body[1]["authentication"]["x509Thumbprint"]["primaryThumbprint"] == "123"
+
+    def test_device_bulk_create_report(
+        self, fixture_cmd, mocked_response, fixture_ghcs, tmp_path
+    ):
+        mocked_response.add_callback(
+            method=responses.POST,
+            url=bulk_url,
+            callback=_bulk_callback(errors_for=["existing"]),
+        )
+        manifest = _write_jsonl(
+            tmp_path / "devices.jsonl",
+            [
+                {"deviceId": "new"},
+                {"deviceId": "existing"},
+                {"deviceId": "badkeys", "primaryKey": "onlyone"},
+                {"edgeEnabled": True},
+                {"deviceId": "nullstatus", "status": None},
+                {"deviceId": "badstatus", "status": 1},
+            ],
+        )
+        report_file = str(tmp_path / "report.jsonl")
+
+        result = subject.iot_device_bulk_create(
+            fixture_cmd, manifest, mock_target["entity"], report_file=report_file
+        )
+        assert result == {
+            "total": 6,
+            "succeeded": 2,
+            "failed": 4,
+            "reportFile": report_file,
+        }
+
+        with open(report_file) as f:
+            report = {r["deviceId"]: r for r in (json.loads(line) for line in f)}
+        assert report["new"]["succeeded"] is True
+        assert report["existing"]["errorCode"] == "DeviceAlreadyExists"
+        assert report["badkeys"]["errorCode"] == "InvalidManifestEntry"
+        assert report[None]["errorCode"] == "InvalidManifestEntry"
+        assert report["nullstatus"]["succeeded"] is True
+        assert report["badstatus"]["errorCode"] == "InvalidManifestEntry"
+
+    @pytest.mark.parametrize(
+        "etag, import_mode", [(None, "update"), ("AAAA==", "updateIfMatchETag")]
+    )
+    def test_device_bulk_update(
+        self, fixture_cmd, mocked_response, fixture_ghcs, tmp_path, etag, import_mode
+    ):
+        mocked_response.add_callback(
+            method=responses.POST, url=bulk_url, callback=_bulk_callback()
+        )
+        manifest = _write_jsonl(
+            tmp_path / "devices.jsonl",
+            [{"deviceId": "dev1", "status": "disabled", "statusReason": "why", "etag": etag}],
+        )
+
+        subject.iot_device_bulk_update(fixture_cmd, manifest, mock_target["entity"])
+        device = json.loads(mocked_response.calls[0].request.body)[0]
+        assert device["importMode"] == import_mode
+        assert device["statusReason"] == "why"
+        assert device.get("eTag") == etag
+        # rows without auth fields keep the current authentication of the device
+        assert "authentication" not in device
+
+    def test_device_bulk_update_auth(self, fixture_cmd, mocked_response, fixture_ghcs, tmp_path):
+        mocked_response.add_callback(
+            method=responses.POST, url=bulk_url, callback=_bulk_callback()
+        )
+        manifest = _write_jsonl(
+            tmp_path / "devices.jsonl",
+            [{"deviceId": "dev1", "authMethod": "x509_thumbprint", "primaryThumbprint": "123"}],
+        )
+
+        subject.iot_device_bulk_update(fixture_cmd, manifest, mock_target["entity"])
+        device = json.loads(mocked_response.calls[0].request.body)[0]
+        assert device["authentication"]["x509Thumbprint"]["primaryThumbprint"] == "123"
+
+    @pytest.mark.parametrize(
+        "etag, import_mode", [(None, "delete"), ("AAAA==", "deleteIfMatchETag")]
+    )
+    def test_device_bulk_delete(
+        self, fixture_cmd, mocked_response, fixture_ghcs, tmp_path, etag, import_mode
+    ):
+        mocked_response.add_callback(
+            method=responses.POST, url=bulk_url, callback=_bulk_callback()
+        )
+        manifest = _write_jsonl(
+            tmp_path / "devices.jsonl", [{"deviceId": "dev1", "etag": etag}]
+        )
+
+        subject.iot_device_bulk_delete(fixture_cmd, manifest, mock_target["entity"])
+        device = json.loads(mocked_response.calls[0].request.body)[0]
+        expected = {"id": "dev1", "importMode": import_mode}
+        if etag:
+            expected["eTag"] = etag
+        assert device == expected
+
+    def test_device_bulk_request_error(
+        self, fixture_cmd, service_client_generic_errors, tmp_path
+    ):
+        manifest = _write_jsonl(
+            tmp_path / "devices.jsonl", [{"deviceId": "dev1"}, {"deviceId": "dev2"}]
+        )
+        result = subject.iot_device_bulk_create(fixture_cmd, manifest, mock_target["entity"])
+        assert result["failed"] == 2
+        assert all(f["errorCode"] == "RequestFailed" for f in result["failures"])
+
+    def test_device_bulk_invalid_args(self, fixture_cmd, fixture_ghcs, tmp_path):
+        with pytest.raises(FileOperationError):
+            subject.iot_device_bulk_create(
+                fixture_cmd, str(tmp_path / "missing.jsonl"), mock_target["entity"]
+            )
+
+        manifest = _write_jsonl(tmp_path / "devices.jsonl", [{"deviceId": "dev1"}])
+        with pytest.raises(InvalidArgumentValueError):
+            subject.iot_device_bulk_create(
+                fixture_cmd, manifest, mock_target["entity"], workers=0
+            )
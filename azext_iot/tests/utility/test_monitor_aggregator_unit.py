@@ -0,0 +1,182 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import json
+import pytest
+
+from uamqp.message import Message
+from azext_iot.monitor import aggregator
+from azext_iot.monitor.aggregator import TelemetryAggregator
+from azext_iot.monitor.handlers import CommonHandler
+from azext_iot.monitor.models.arguments import CommonHandlerArguments, CommonParserArguments
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER, MODULE_ID_IDENTIFIER
+
+
+def _build_result(device_id, payload, module_id=None, component=None):
+    return {
+        "event": {
+            "origin": device_id,
+            "module": module_id,
+            "interface": None,
+            "component": component,
+            "payload": payload,
+        }
+    }
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [1000.5]
+    mocker.patch.object(aggregator, "time", side_effect=lambda: now[0])
+    return now
+
+
+class TestTelemetryAggregator:
+    def test_aggregate_fields(self, clock):
+        rows = []
+        rollups = TelemetryAggregator(window=60, emit=rows.append)
+        for temperature, humidity in [(20, 40.5), (25.5, 41), (18, 39)]:
+            rollups.add(
+                _build_result(
+                    "device1",
+                    {
+                        "temperature": temperature,
+                        "env": {"humidity": humidity, "unit": "%"},
+                        "alarm": False,
+                        "readings": [1, 2],
+                    },
+                )
+            )
+        rollups.add(_build_result("device0", json.dumps({"temperature": 10})))
+        rollups.add(_build_result("device0", "not json"))
+        rollups.add(_build_result("device0", 42))
+
+        clock[0] = 1030
+        rollups.flush()
+
+        assert [row["deviceId"] for row in rows] == ["device0", "device1"]
+        assert rows[0] == {
+            "windowStart": "1970-01-01T00:16:00+00:00",
+            "windowEnd": "1970-01-01T00:17:00+00:00",
+            "deviceId": "device0",
+            "events": 3,
+            "fields": {"temperature": {"count": 1, "min": 10, "max": 10, "mean": 10.0, "last": 10}},
+        }
+        assert rows[1]["events"] == 3
+        assert rows[1]["fields"] == {
+            "env.humidity": {"count": 3, "min": 39, "max": 41, "mean": pytest.approx(40.1666, 1e-3), "last": 39},
+            "temperature": {"count": 3, "min": 18, "max": 25.5, "mean": pytest.approx(21.1666, 1e-3), "last": 18},
+        }
+
+        # each window starts over empty
+        rows.clear()
+        rollups.flush()
+        assert rows == []
+
+    @pytest.mark.parametrize(
+        "group_by, expected",
+        [
+            (None, [{"deviceId": "device1"}]),
+            (["module"], [{"deviceId": "device1", "moduleId": ""}, {"deviceId": "device1", "moduleId": "module1"}]),
+            (
+                ["module", "component"],
+                [
+                    {"deviceId": "device1", "moduleId": "", "component": "thermostat1"},
+                    {"deviceId": "device1", "moduleId": "module1", "component": ""},
+                ],
+            ),
+        ],
+    )
+    def test_aggregate_group_by(self, clock, group_by, expected):
+        rows = []
+        rollups = TelemetryAggregator(window=60, emit=rows.append, group_by=group_by)
+        rollups.add(_build_result("device1", {"value": 1}, module_id="module1"))
+        rollups.add(_build_result("device1", {"value": 2}, component="thermostat1"))
+        rollups.flush()
+
+        keys = [
+            {key: row[key] for key in ("deviceId", "moduleId", "component") if key in row} for row in rows
+        ]
+        assert keys == expected
+        assert sum(row["events"] for row in rows) == 2
+
+    def test_aggregate_windows(self):
+        rows = []
+        rollups = TelemetryAggregator(window=0.05, emit=rows.append)
+        loop = asyncio.new_event_loop()
+
+        async def _produce():
+            for _ in range(3):
+                rollups.add(_build_result("device1", {"value": 1}))
+                await asyncio.sleep(0.06)
+
+        rollups.start(loop)
+        loop.run_until_complete(_produce())
+        rollups.stop()
+
+        assert sum(row["events"] for row in rows) == 3
+        assert len(rows) >= 3
+        starts = [row["windowStart"] for row in rows]
+        assert starts == sorted(set(starts))
+
+    def test_aggregate_early_tick(self, mocker, clock):
+        rows = []
+        rollups = TelemetryAggregator(window=60, emit=rows.append)
+        loop = mocker.MagicMock()
+        rollups.add(_build_result("device1", {"value": 1}))
+
+        # the timer fires a little before the wall clock reaches the end of the window
+        clock[0] = 1019.99
+        rollups._tick(loop)
+        rollups.add(_build_result("device1", {"value": 2}))
+        clock[0] = 1079.99
+        rollups._tick(loop)
+
+        assert [(row["windowStart"], row["windowEnd"]) for row in rows] == [
+            ("1970-01-01T00:16:00+00:00", "1970-01-01T00:17:00+00:00"),
+            ("1970-01-01T00:17:00+00:00", "1970-01-01T00:18:00+00:00"),
+        ]
+        # the next tick is scheduled for the end of the next window
+        assert loop.call_later.call_args[0][0] == pytest.approx(60.01)
+
+
+class TestCommonHandlerAggregation:
+    def test_handler_aggregates(self, mocker):
+        output_message = mocker.patch.object(CommonHandler, "output_message")
+        handler = CommonHandler(
+            CommonHandlerArguments(
+                output="json",
+                common_parser_args=CommonParserArguments(content_type="application/json"),
+                aggregate_window=60,
+                aggregate_by=["module"],
+            )
+        )
+        for value in (1, 3):
+            handler.parse_message(
+                Message(
+                    body=json.dumps({"value": value}).encode(),
+                    annotations={DEVICE_ID_IDENTIFIER: b"device1", MODULE_ID_IDENTIFIER: b"module1"},
+                )
+            )
+        output_message.assert_not_called()
+
+        handler.aggregator.stop()
+
+        row = output_message.call_args[0][0]
+        assert (row["deviceId"], row["moduleId"], row["events"]) == ("device1", "module1", 2)
+        assert row["fields"]["value"]["mean"] == 2
+
+    def test_handler_without_aggregation(self, mocker):
+        handler = CommonHandler(
+            CommonHandlerArguments(output="json", common_parser_args=CommonParserArguments())
+        )
+        output_message = mocker.patch.object(handler, "output_message")
+
+        handler.emit_message({"event": {}})
+
+        assert handler.aggregator is None
+        output_message.assert_called_once_with({"event": {}})
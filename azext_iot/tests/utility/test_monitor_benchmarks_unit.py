@@ -0,0 +1,425 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Benchmarks for the monitor parse and validate hot path.
+
+Every benchmark reports messages/sec and the peak bytes allocated while handling a single
+message, and compares them to the stored baselines in json/monitor_benchmarks.json:
+
+- Throughput is stored as a cost relative to a fixed reference workload measured in the same
+  run, so baselines carry across machines. A benchmark fails when it becomes more than
+  BENCHMARK_TOLERANCE times slower. The check is skipped while a tracer (coverage, debugger)
+  is active since it slows down the code under test but not the reference workload.
+- Allocations differ between Python versions, so they are stored and compared per version.
+  Versions without a stored baseline are not compared.
+
+CI runs this module in its own step without coverage. Run with -s to see the results. Set
+AZEXT_IOT_BENCHMARK_SAVE=1 to store new baselines for the running Python version after an
+intended change in performance.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+import pytest
+
+from unittest import mock
+from uamqp.message import Message, MessageProperties
+from azext_iot.central.models.enum import ApiVersion
+from azext_iot.central.models.v1 import DeviceV1, TemplateV1
+from azext_iot.central.providers import (
+    CentralDeviceProvider,
+    CentralDeviceTemplateProvider,
+)
+from azext_iot.common.utility import parse_entity, unicode_binary_map
+from azext_iot.monitor.central_validator import validate, get_validation_plan
+from azext_iot.monitor.handlers import CentralHandler, CommonHandler
+from azext_iot.monitor.models.arguments import (
+    CentralHandlerArguments,
+    CommonHandlerArguments,
+    CommonParserArguments,
+)
+from azext_iot.monitor.parsers import common_parser
+from azext_iot.monitor.parsers.central_parser import CentralParser
+from azext_iot.monitor.parsers.common_parser import CommonParser
+from azext_iot.monitor.parsers.message_view import MessageView
+from azext_iot.tests.helpers import load_json
+from azext_iot.tests.test_constants import FileNames
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "json", "monitor_benchmarks.json"
+)
+BENCHMARK_TOLERANCE = float(os.environ.get("AZEXT_IOT_BENCHMARK_TOLERANCE", 2.0))
+ALLOCATION_TOLERANCE = 1.5
+ALLOCATION_SLACK_BYTES = 1024
+BENCHMARK_TRIALS = 5
+BENCHMARK_TRIAL_SECONDS = 0.05
+
+DEVICE_ID = "benchmark-device"
+PARSER_PROPERTIES = ["anno", "sys", "app"]
+
+REFERENCE_PAYLOAD = {
+    "temperature": 21.5,
+    "humidity": 40,
+    "status": "online",
+    "location": {"lat": 47.6, "lon": -122.1},
+}
+REFERENCE_MAP = {"key-{}".format(i).encode(): b"value" for i in range(8)}
+
+
+def _reference_workload():
+    # a little json and a little pure python, roughly what handling a message looks like
+    decoded = {str(k, "utf8"): str(v, "utf8") for k, v in REFERENCE_MAP.items()}
+    return json.loads(json.dumps([REFERENCE_PAYLOAD, decoded]))
+
+
+def _measure_rate(func, items) -> float:
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for item in items:
+            func(item)
+        count += len(items)
+        elapsed = time.perf_counter() - start
+        if elapsed >= BENCHMARK_TRIAL_SECONDS:
+            return count / elapsed
+
+
+def _measure_relative_cost(func, items) -> tuple:
+    # interleave with the reference workload and keep the best of each, so a busy machine
+    # slows both down instead of skewing the ratio
+    reference_items = [None] * 10
+    reference_rate = rate = 0.0
+    for _ in range(BENCHMARK_TRIALS):
+        reference_rate = max(
+            reference_rate, _measure_rate(lambda _: _reference_workload(), reference_items)
+        )
+        rate = max(rate, _measure_rate(func, items))
+    return reference_rate / rate, rate
+
+
+def _measure_allocations(func, items) -> int:
+    # restart tracing for every item to reset the peak, tracemalloc.reset_peak needs Python 3.9
+    peaks = []
+    for item in items:
+        tracemalloc.start()
+        try:
+            func(item)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peaks.append(peak)
+    return int(sum(peaks) / len(peaks))
+
+
+class MonitorBenchmarks:
+    def __init__(self):
+        self.python_version = "{}.{}".format(*sys.version_info[0:2])
+        self.traced = sys.gettrace() is not None
+        self.results = {}
+        self.baselines = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE) as f:
+                self.baselines = json.load(f).get("benchmarks", {})
+
+    def run(self, name: str, func, items: list):
+        # warm up caches (templates, compiled regexes, validation plans)
+        for item in items:
+            func(item)
+
+        relative_cost, rate = _measure_relative_cost(func, items)
+        baseline = self.baselines.get(name)
+        if baseline and relative_cost > baseline["relativeCost"] * BENCHMARK_TOLERANCE:
+            # measure again before calling it a regression, timings are noisy
+            relative_cost, rate = min(
+                (relative_cost, rate), _measure_relative_cost(func, items)
+            )
+        allocated_bytes = _measure_allocations(func, items[:20])
+        result = {
+            "relativeCost": round(relative_cost, 3),
+            "allocatedBytes": dict(
+                (baseline or {}).get("allocatedBytes", {}), **{self.python_version: allocated_bytes}
+            ),
+        }
+        self.results[name] = result
+        print(
+            "\n{}: {:.0f} msg/s, {} bytes allocated per message, relative cost {}".format(
+                name, rate, allocated_bytes, result["relativeCost"]
+            )
+        )
+
+        if not baseline:
+            return
+
+        if not self.traced:
+            assert result["relativeCost"] <= baseline["relativeCost"] * BENCHMARK_TOLERANCE, (
+                "{} is {:.1f}x slower than its baseline.".format(
+                    name, result["relativeCost"] / baseline["relativeCost"]
+                )
+            )
+        baseline_bytes = baseline.get("allocatedBytes", {}).get(self.python_version)
+        if baseline_bytes is not None:
+            assert allocated_bytes <= (
+                baseline_bytes * ALLOCATION_TOLERANCE + ALLOCATION_SLACK_BYTES
+            ), "{} allocates {} bytes per message on Python {}, baseline is {}.".format(
+                name, allocated_bytes, self.python_version, baseline_bytes
+            )
+
+    def save(self):
+        # benchmarks that did not run keep their baselines
+        benchmarks = dict(self.baselines, **self.results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(
+                {"benchmarks": benchmarks},
+                f,
+                indent=4,
+                sort_keys=True,
+            )
+            f.write("\n")
+
+
+@pytest.fixture(scope="module")
+def benchmarks():
+    benchmarks = MonitorBenchmarks()
+    yield benchmarks
+    if os.environ.get("AZEXT_IOT_BENCHMARK_SAVE"):
+        benchmarks.save()
+
+
+def _build_message(
+    payload,
+    component_name: str = None,
+    content_encoding: bytes = b"utf-8",
+    content_type: bytes = b"application/json",
+):
+    annotations = {
+        common_parser.DEVICE_ID_IDENTIFIER: DEVICE_ID.encode(),
+        b"iothub-enqueuedtime": 1600000000000,
+        b"x-opt-sequence-number": 1,
+        b"x-opt-offset": b"1234",
+        b"x-opt-enqueued-time": 1600000000000,
+    }
+    if component_name:
+        annotations[common_parser.COMPONENT_NAME_IDENTIFIER] = component_name.encode()
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    return Message(
+        body=body,
+        annotations=annotations,
+        properties=MessageProperties(
+            content_type=content_type,
+            content_encoding=content_encoding,
+            message_id=b"message-id",
+        ),
+        application_properties={b"app-key": b"app-value", b"source": b"benchmark"},
+    )
+
+
+def _small_payloads():
+    return [{"Bool": True, "Double": 21.5 + i, "String": "value"} for i in range(10)]
+
+
+def _large_payloads():
+    return [
+        {
+            "readings": [{"sensor": "s{}".format(j), "value": j * 1.5} for j in range(100)],
+            "metadata": {"key{}".format(j): "value{}".format(j) for j in range(100)},
+            "index": i,
+        }
+        for i in range(10)
+    ]
+
+
+def _template_payloads():
+    return [
+        {
+            "Bool": True,
+            "Double": 1.5 + i,
+            "Float": 2.5,
+            "Int": i,
+            "Long": 10000,
+            "String": "value",
+            "DateTime": "2020-01-01T12:00:00Z",
+            "IntEnum": 1,
+            "StringEnum": "A",
+            "Geopoint": {"lat": 1, "lon": 2, "alt": 3},
+            "Vector": {"x": 1, "y": 2, "z": 3},
+            "Object": {"Double": 1.5},
+        }
+        for i in range(10)
+    ]
+
+
+def _component_payloads():
+    return [
+        {"component2prop": True, "component2Prop2": False, "testComponent": bool(i % 2)}
+        for i in range(10)
+    ]
+
+
+def _central_providers(template: TemplateV1):
+    device_provider = CentralDeviceProvider(
+        cmd=None, app_id=None, api_version=ApiVersion.v1.value
+    )
+    template_provider = CentralDeviceTemplateProvider(
+        cmd=None, app_id=None, api_version=ApiVersion.v1.value
+    )
+    # served from the provider caches, no requests
+    device_provider._devices[DEVICE_ID] = DeviceV1({"id": DEVICE_ID, "template": template.id})
+    template_provider._device_templates[template.id] = template
+    return device_provider, template_provider
+
+
+@pytest.fixture(scope="module")
+def template():
+    return TemplateV1(load_json(FileNames.central_device_template_file))
+
+
+@pytest.fixture(scope="module")
+def component_template():
+    return TemplateV1(load_json(FileNames.central_property_validation_template_file))
+
+
+class TestMonitorBenchmarks:
+    def test_unicode_binary_map(self, benchmarks):
+        messages = [_build_message(payload) for payload in _small_payloads()]
+        benchmarks.run(
+            "unicode_binary_map",
+            lambda msg: unicode_binary_map(msg.annotations),
+            messages,
+        )
+
+    def test_parse_entity(self, benchmarks):
+        messages = [_build_message(payload) for payload in _small_payloads()]
+        benchmarks.run(
+            "parse_entity", lambda msg: parse_entity(msg.properties, True), messages
+        )
+
+    def test_message_view(self, benchmarks):
+        messages = [_build_message(payload) for payload in _small_payloads()]
+        benchmarks.run(
+            "message_view",
+            lambda msg: MessageView(msg).get_system_properties(),
+            messages,
+        )
+
+    @pytest.mark.parametrize(
+        "name, payloads, message_kwargs",
+        [
+            ("common_parser_small_json", _small_payloads(), {}),
+            ("common_parser_large_json", _large_payloads(), {}),
+            ("common_parser_invalid_encoding", _small_payloads(), {"content_encoding": b"ascii"}),
+            ("common_parser_invalid_json", [b"{'not': json}"] * 10, {}),
+        ],
+    )
+    def test_common_parser(self, benchmarks, name, payloads, message_kwargs):
+        args = CommonParserArguments(
+            properties=PARSER_PROPERTIES, content_type="application/json"
+        )
+        messages = [_build_message(payload, **message_kwargs) for payload in payloads]
+        benchmarks.run(
+            name,
+            lambda msg: CommonParser(message=msg, common_parser_args=args).parse_message(),
+            messages,
+        )
+
+    def test_common_handler(self, benchmarks):
+        handler = CommonHandler(
+            CommonHandlerArguments(
+                output="json",
+                common_parser_args=CommonParserArguments(
+                    properties=PARSER_PROPERTIES, content_type="application/json"
+                ),
+                device_id="benchmark-*",
+            )
+        )
+        messages = [_build_message(payload) for payload in _small_payloads()]
+        benchmarks.run("common_handler", handler.process_message, messages)
+
+    @pytest.mark.parametrize("component", [False, True])
+    def test_central_parser(self, benchmarks, template, component_template, component):
+        if component:
+            device_template = component_template
+            messages = [
+                _build_message(p, component_name="RS40OccupancySensorV36fy")
+                for p in _component_payloads()
+            ]
+        else:
+            device_template = template
+            messages = [_build_message(p) for p in _template_payloads()]
+        device_provider, template_provider = _central_providers(device_template)
+        args = CommonParserArguments(
+            properties=PARSER_PROPERTIES, content_type="application/json"
+        )
+
+        def _parse(msg):
+            parser = CentralParser(
+                message=msg,
+                common_parser_args=args,
+                central_device_provider=device_provider,
+                central_template_provider=template_provider,
+            )
+            parser.parse_message()
+            assert not parser.issues_handler.get_all_issues()
+
+        benchmarks.run(
+            "central_parser_component" if component else "central_parser", _parse, messages
+        )
+
+    def test_central_handler(self, benchmarks, template):
+        device_provider, template_provider = _central_providers(template)
+        handler = CentralHandler(
+            central_device_provider=device_provider,
+            central_template_provider=template_provider,
+            central_handler_args=CentralHandlerArguments(
+                duration=0,
+                max_messages=0,
+                style="json",
+                common_handler_args=CommonHandlerArguments(
+                    output="json",
+                    common_parser_args=CommonParserArguments(
+                        properties=PARSER_PROPERTIES, content_type="application/json"
+                    ),
+                ),
+            ),
+            central_dns_suffix="azureiotcentral.com",
+        )
+        # the template is known up front, as it is after warm up
+        handler._template_resolver._resolved[DEVICE_ID] = (template, None)
+        payloads = _template_payloads()
+        payloads[0]["Bool"] = "not a bool"
+        messages = [_build_message(payload) for payload in payloads]
+
+        # keep the progress output out of the measurement
+        with mock.patch("azext_iot.monitor.handlers.central_handler.print", create=True):
+            benchmarks.run("central_handler", handler.validate_message, messages)
+        handler.shutdown()
+
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_central_validators(self, benchmarks, template, compiled):
+        payloads = _template_payloads()
+        if compiled:
+            fields = get_validation_plan(template).get_fields()
+
+            def _validate(payload):
+                for name, value in payload.items():
+                    _, validator = fields[name]
+                    validator(value)
+
+        else:
+            schemas = {name: template.get_schema(name) for name in payloads[0]}
+
+            def _validate(payload):
+                for name, value in payload.items():
+                    validate(schemas[name], value)
+
+        benchmarks.run(
+            "central_validators_compiled" if compiled else "central_validators",
+            _validate,
+            payloads,
+        )
@@ -0,0 +1,114 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import pytest
+
+from uamqp.message import Message
+from azext_iot.monitor import telemetry
+from azext_iot.monitor.checkpoint import (
+    CheckpointStore,
+    OFFSET_IDENTIFIER,
+    SEQUENCE_NUMBER_IDENTIFIER,
+    ENQUEUED_TIME_IDENTIFIER,
+)
+from azext_iot.monitor.models.target import Target
+
+
+def _build_message(offset, sequence_number, enqueued_time=1600000000000):
+    return Message(
+        body="{}",
+        annotations={
+            OFFSET_IDENTIFIER: offset,
+            SEQUENCE_NUMBER_IDENTIFIER: sequence_number,
+            ENQUEUED_TIME_IDENTIFIER: enqueued_time,
+        },
+    )
+
+
+@pytest.fixture
+def target():
+    target = Target(
+        hostname="ihsuprodbyres.servicebus.windows.net",
+        path="iothub-ehub-myhub",
+        partitions=["0", "1"],
+        auth=None,
+    )
+    target.add_consumer_group("$Default")
+    return target
+
+
+class TestCheckpointStore:
+    def test_checkpoint_roundtrip(self, tmp_path, target):
+        store = CheckpointStore(str(tmp_path), flush_interval=60)
+        assert store.get_checkpoint(target, "0") is None
+
+        store.update_checkpoint(target, "0", _build_message(b"1024", 7))
+        store.update_checkpoint(target, "0", _build_message(b"2048", 8))
+        store.update_checkpoint(target, "1", _build_message(b"512", 3))
+
+        # nothing is written until the flush interval elapses or flush is called
+        assert not os.listdir(str(tmp_path))
+        store.flush()
+
+        partition_path = os.path.join(
+            str(tmp_path),
+            "ihsuprodbyres.servicebus.windows.net_iothub-ehub-myhub",
+            "_Default",
+            "0.json",
+        )
+        with open(partition_path) as f:
+            assert json.load(f) == {
+                "offset": "2048",
+                "sequenceNumber": 8,
+                "enqueuedTime": 1600000000000,
+            }
+
+        resumed = CheckpointStore(str(tmp_path))
+        assert resumed.get_checkpoint(target, "0")["offset"] == "2048"
+        assert resumed.get_checkpoint(target, "1")["sequenceNumber"] == 3
+
+        target.add_consumer_group("other")
+        assert resumed.get_checkpoint(target, "0") is None
+
+    def test_checkpoint_periodic_flush(self, tmp_path, target):
+        store = CheckpointStore(str(tmp_path), flush_interval=0)
+        store.update_checkpoint(target, "0", _build_message(b"1024", 7))
+
+        assert CheckpointStore(str(tmp_path)).get_checkpoint(target, "0")["offset"] == "1024"
+
+    def test_checkpoint_ignores_unannotated(self, tmp_path, target):
+        store = CheckpointStore(str(tmp_path), flush_interval=0)
+        store.update_checkpoint(target, "0", Message(body="{}"))
+        store.flush()
+
+        assert store.get_checkpoint(target, "0") is None
+        assert not os.listdir(str(tmp_path))
+
+    def test_checkpoint_unreadable(self, tmp_path, target):
+        store = CheckpointStore(str(tmp_path))
+        store.update_checkpoint(target, "0", _build_message(b"1024", 7))
+        store.flush()
+
+        path = store._get_path(store._get_key(target, "0"))
+        with open(path, "w") as f:
+            f.write("not json")
+
+        assert CheckpointStore(str(tmp_path)).get_checkpoint(target, "0") is None
+
+
+class TestEventFilter:
+    @pytest.mark.parametrize(
+        "checkpoint, expected",
+        [
+            (None, b"amqp.annotation.x-opt-enqueuedtimeutc > 1000"),
+            ({"offset": None}, b"amqp.annotation.x-opt-enqueuedtimeutc > 1000"),
+            ({"offset": "2048"}, b"amqp.annotation.x-opt-offset > '2048'"),
+        ],
+    )
+    def test_build_event_filter(self, checkpoint, expected):
+        assert telemetry._build_event_filter(1000, checkpoint) == expected
@@ -0,0 +1,251 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import json
+import pytest
+
+from uamqp.message import Message
+from azext_iot.monitor import event
+from azext_iot.monitor.feedback import FeedbackCorrelator, get_feedback_records, _parse_feedback_time
+from azext_iot.operations import hub as subject
+
+path_receive_client = "azext_iot.monitor.event.uamqp.ReceiveClientAsync"
+
+
+def _build_record(message_id, device_id="device1", status_code="Success", enqueued_time=None):
+    return {
+        "originalMessageId": message_id,
+        "description": status_code,
+        "deviceGenerationId": "637000000000000000",
+        "deviceId": device_id,
+        "enqueuedTimeUtc": enqueued_time,
+        "statusCode": status_code,
+    }
+
+
+def _build_feedback_message(records):
+    return Message(body=json.dumps(records).encode())
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def fixture_target():
+    return {
+        "entity": "myhub.azure-devices.net",
+        "policy": "iothubowner",
+        "primarykey": "a2V5",
+        "cmd": None,
+    }
+
+
+@pytest.fixture
+def feedback_client(mocker):
+    client = mocker.patch(path_receive_client)
+    batches = []
+
+    async def _close():
+        pass
+
+    async def _batch(max_batch_size=None, timeout=0):
+        if batches:
+            return [_build_feedback_message(records) for records in batches.pop(0)]
+        await asyncio.sleep(timeout / 1000)
+        return []
+
+    client.return_value.close_async = _close
+    client.return_value.receive_message_batch_async = mocker.MagicMock(side_effect=_batch)
+    client.batches = batches
+    return client
+
+
+class TestFeedbackCorrelator:
+    def test_correlate_feedback(self, loop):
+        correlator = FeedbackCorrelator(loop=loop)
+        futures = {
+            message_id: correlator.add(message_id, sent_time=1000)
+            for message_id in ("m1", "m2", "m3")
+        }
+        assert correlator.add("m1") is futures["m1"]
+
+        matched = correlator.process_feedback(
+            [
+                _build_record("m1", enqueued_time="1970-01-01T00:16:40.25Z"),
+                _build_record("other"),
+                _build_record("m3", status_code="Rejected"),
+            ],
+            received_time=1002,
+        )
+
+        assert [record["originalMessageId"] for record in matched] == ["m1", "m3"]
+        assert futures["m1"].result()["statusCode"] == "Success"
+        assert futures["m3"].result()["statusCode"] == "Rejected"
+        assert not futures["m2"].done()
+        assert correlator.outstanding == 1
+
+        summary = correlator.summary()
+        assert (summary["completed"], summary["expired"], summary["outstanding"]) == (2, 0, 1)
+        assert summary["statusCodes"] == {"Rejected": 1, "Success": 1}
+        # latency to the feedback enqueued time, or to the receive time when it has none
+        assert (summary["latencyMs"]["min"], summary["latencyMs"]["max"]) == (250, 2000)
+
+    def test_expire_feedback(self, loop):
+        correlator = FeedbackCorrelator(timeout=10, loop=loop)
+        first = correlator.add("m1", sent_time=1000)
+        second = correlator.add("m2", sent_time=1005)
+        longer = correlator.add("m3", sent_time=1000, timeout=60)
+
+        assert correlator.expire(now=1009) == 0
+        correlator.process_feedback([_build_record("m1")], received_time=1009)
+        assert correlator.expire(now=1020) == 1
+
+        assert first.result()["originalMessageId"] == "m1"
+        assert second.result() is None
+        assert not longer.done()
+        assert (correlator.completed, correlator.expired, correlator.outstanding) == (1, 1, 1)
+
+        # without a timeout, messages are waited on forever
+        forever = FeedbackCorrelator(loop=loop)
+        forever.add("m1", sent_time=1000)
+        assert forever.expire(now=100000) == 0
+
+    def test_feedback_text_summary(self, loop):
+        correlator = FeedbackCorrelator(loop=loop)
+        correlator.add("m1", sent_time=1000)
+        correlator.add("m2", sent_time=1000)
+        correlator.process_feedback(
+            [_build_record("m1", status_code="Expired")], received_time=1000.5
+        )
+
+        assert correlator.format_text_summary() == (
+            "[feedback] 1 completed, 0 expired, 1 outstanding, latency p50=500ms p90=500ms p99=500ms max=500ms\n"
+            "[feedback]   Expired: 1\n"
+        )
+
+    def test_feedback_without_sent_time(self, loop, mocker):
+        mocker.patch("azext_iot.monitor.feedback.time", return_value=1000)
+        correlator = FeedbackCorrelator(timeout=10, loop=loop)
+        correlator.add("m1")
+        correlator.add("m2")
+
+        # a record enqueued before the monitor started is not reported as a negative latency
+        correlator.process_feedback(
+            [_build_record("m1", enqueued_time="1970-01-01T00:16:30Z")], received_time=1000.5
+        )
+        assert correlator.expire(now=1010) == 1
+
+        summary = correlator.summary()
+        assert summary["latencyMs"]["count"] == 0
+        assert (summary["waitMs"]["count"], summary["waitMs"]["max"]) == (1, 500)
+        assert correlator.format_text_summary() == (
+            "[feedback] 1 completed, 1 expired, 0 outstanding, "
+            "waited since monitor start p50=500ms p90=500ms p99=500ms max=500ms\n"
+            "[feedback]   Success: 1\n"
+        )
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("1970-01-01T00:00:10.1234567Z", 10.1234567),
+            ("1970-01-01T00:01:00Z", 60),
+            ("1970-01-01T00:01:00", 60),
+            ("not a time", None),
+            (None, None),
+        ],
+    )
+    def test_parse_feedback_time(self, value, expected):
+        assert _parse_feedback_time(value) == (pytest.approx(expected) if expected else None)
+
+    def test_get_feedback_records(self):
+        records = [_build_record("m1"), _build_record("m2")]
+
+        assert get_feedback_records(_build_feedback_message(records)) == records
+        assert get_feedback_records(_build_feedback_message(records[0])) == records[:1]
+
+
+class TestReceiveFeedback:
+    def test_receive_until_complete(self, loop, mocker, fixture_target, feedback_client):
+        correlator = FeedbackCorrelator(loop=loop)
+        for message_id in ("m1", "m2", "m3"):
+            correlator.add(message_id)
+        feedback_client.batches.extend(
+            [
+                [[_build_record("m1"), _build_record("x1", device_id="device2")]],
+                [[_build_record("x2")], [_build_record("m2"), _build_record("m3")]],
+                [[_build_record("x3")]],
+            ]
+        )
+        on_feedback = mocker.MagicMock()
+
+        loop.run_until_complete(
+            event.receive_feedback(
+                fixture_target, correlator, on_feedback=on_feedback, until_complete=True
+            )
+        )
+
+        # every record of every batch is passed on, and receiving stops once all are matched
+        assert [c[0][0]["originalMessageId"] for c in on_feedback.call_args_list] == [
+            "m1",
+            "x1",
+            "x2",
+            "m2",
+            "m3",
+        ]
+        assert feedback_client.batches == [[[_build_record("x3")]]]
+        assert correlator.completed == 3
+        assert feedback_client.call_args[1]["source"].endswith(
+            "@myhub.azure-devices.net/messages/servicebound/feedback"
+        )
+
+    def test_monitor_feedback(self, mocker, fixture_target, feedback_client, capsys):
+        mocker.patch.object(event, "FEEDBACK_RECEIVE_TIMEOUT_MS", 10)
+        feedback_client.batches.append(
+            [[_build_record("m1", device_id="device2"), _build_record("m2"), _build_record("m3")]]
+        )
+
+        summary = event.monitor_feedback(
+            fixture_target, device_id="device1", wait_on_id=["m1", "m2", "m4"], wait_timeout=0.05
+        )
+
+        out, err = capsys.readouterr()
+        # records of other devices are not printed, but still complete their waiters
+        assert "originalMessageId: m2" in out and "originalMessageId: m3" in out
+        assert "originalMessageId: m1" not in out
+        assert (summary["completed"], summary["expired"], summary["outstanding"]) == (2, 1, 0)
+        assert err.startswith("[feedback] 2 completed, 1 expired, 0 outstanding")
+
+    def test_monitor_feedback_single_id(self, fixture_target, feedback_client):
+        feedback_client.batches.append([[_build_record("m1")]])
+
+        summary = event.monitor_feedback(fixture_target, device_id=None, wait_on_id="m1")
+
+        assert summary["completed"] == 1
+
+    def test_hub_monitor_feedback_returns_summary(
+        self, mocker, fixture_cmd, fixture_target, feedback_client, capsys
+    ):
+        mocker.patch("azext_iot.common.deps.ensure_uamqp")
+        mocker.patch.object(subject.IotHubDiscovery, "get_target", return_value=fixture_target)
+        mocker.patch.object(event, "FEEDBACK_RECEIVE_TIMEOUT_MS", 10)
+        feedback_client.batches.append(
+            [[_build_record("m1"), _build_record("m2", status_code="Rejected"), _build_record("m3")]]
+        )
+
+        summary = subject.iot_hub_monitor_feedback(
+            fixture_cmd, hub_name="myhub", wait_on_id=["m1", "m2", "m3", "m4"], wait_timeout=0.05
+        )
+
+        assert (summary["completed"], summary["expired"], summary["outstanding"]) == (3, 1, 0)
+        assert summary["statusCodes"] == {"Rejected": 1, "Success": 2}
+        assert summary["waitMs"]["count"] == 3
+        # no send times are known when waiting from monitor-feedback
+        assert summary["latencyMs"]["count"] == 0
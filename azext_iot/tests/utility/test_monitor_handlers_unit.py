@@ -0,0 +1,118 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import pytest
+
+from uamqp.message import Message
+from azext_iot.monitor.handlers import common_handler
+from azext_iot.monitor.models.arguments import (
+    CommonHandlerArguments,
+    CommonParserArguments,
+)
+from azext_iot.monitor.parsers.common_parser import (
+    DEVICE_ID_IDENTIFIER,
+    MODULE_ID_IDENTIFIER,
+    INTERFACE_NAME_IDENTIFIER_V1,
+    INTERFACE_NAME_IDENTIFIER_V2,
+)
+
+
+def _build_message(device_id=None, module_id=None, interface_name=None, interface_identifier=None):
+    annotations = {}
+    if device_id is not None:
+        annotations[DEVICE_ID_IDENTIFIER] = device_id.encode()
+    if module_id is not None:
+        annotations[MODULE_ID_IDENTIFIER] = module_id.encode()
+    if interface_name is not None:
+        annotations[interface_identifier or INTERFACE_NAME_IDENTIFIER_V1] = interface_name.encode()
+    return Message(body=b'{"temp": 1}', annotations=annotations)
+
+
+def _build_handler(device_id=None, devices=None, module_id=None, interface_name=None):
+    return common_handler.CommonHandler(
+        CommonHandlerArguments(
+            output="json",
+            common_parser_args=CommonParserArguments(content_type="application/json"),
+            devices=devices,
+            device_id=device_id,
+            interface_name=interface_name,
+            module_id=module_id,
+        )
+    )
+
+
+class TestCommonHandlerFilters:
+    @pytest.mark.parametrize(
+        "filters, message_args, expected",
+        [
+            ({}, {"device_id": "dev1"}, True),
+            ({}, {}, True),
+            ({"device_id": "dev1"}, {"device_id": "dev1"}, True),
+            ({"device_id": "dev1"}, {"device_id": "dev10"}, False),
+            ({"device_id": "dev1"}, {}, False),
+            ({"device_id": "dev*"}, {"device_id": "dev10"}, True),
+            ({"device_id": "dev?"}, {"device_id": "dev10"}, False),
+            ({"device_id": "dev?"}, {"device_id": "dev1"}, True),
+            ({"device_id": "*"}, {}, True),
+            ({"device_id": "d.v*"}, {"device_id": "dev1"}, False),
+            ({"devices": {"dev1": True}}, {"device_id": "dev1"}, True),
+            ({"devices": {"dev1": True}}, {"device_id": "dev2"}, False),
+            ({"devices": ["dev1"], "device_id": "dev*"}, {"device_id": "dev1"}, True),
+            ({"module_id": "mod*"}, {"device_id": "dev1", "module_id": "mod1"}, True),
+            ({"module_id": "mod1"}, {"device_id": "dev1"}, False),
+            ({"interface_name": "i1"}, {"interface_name": "i1"}, True),
+            (
+                {"interface_name": "i1"},
+                {"interface_name": "i1", "interface_identifier": INTERFACE_NAME_IDENTIFIER_V2},
+                True,
+            ),
+            ({"interface_name": "i1"}, {"interface_name": "i2"}, False),
+            ({"interface_name": "i1"}, {}, False),
+        ],
+    )
+    def test_should_process_message(self, filters, message_args, expected):
+        handler = _build_handler(**filters)
+        message = _build_message(**message_args)
+
+        assert handler._should_process_message(message, check_interface=True) is expected
+
+        # the pre-parse path must agree with the parser based checks
+        parser = common_handler.CommonParser(message, CommonParserArguments())
+        assert (
+            handler._should_process_device(parser.device_id)
+            and handler._should_process_module(parser.module_id)
+            and handler._should_process_interface(parser.interface_name)
+        ) is expected
+
+    def test_filtered_message_is_not_parsed(self, mocker, capsys):
+        parser = mocker.patch.object(common_handler, "CommonParser")
+        handler = _build_handler(device_id="dev*", module_id="mod1")
+
+        handler.parse_message(_build_message(device_id="other", module_id="mod1"))
+        handler.parse_message(_build_message(device_id="dev1", module_id="mod2"))
+        assert not parser.called
+
+        parser.return_value.parse_message.return_value = {"event": {"origin": "dev1"}}
+        handler.parse_message(_build_message(device_id="dev1", module_id="mod1"))
+        assert parser.call_count == 1
+        assert '"origin": "dev1"' in capsys.readouterr().out
+
+    def test_parse_message_writes_to_sink(self, mocker, capsys):
+        sink = mocker.MagicMock()
+        handler = common_handler.CommonHandler(
+            CommonHandlerArguments(
+                output="json",
+                common_parser_args=CommonParserArguments(content_type="application/json"),
+            ),
+            sink=sink,
+        )
+
+        handler.parse_message(_build_message(device_id="dev1"))
+
+        assert capsys.readouterr().out == ""
+        event = sink.write.call_args[0][0]["event"]
+        assert event["origin"] == "dev1"
+        assert event["payload"] == {"temp": 1}
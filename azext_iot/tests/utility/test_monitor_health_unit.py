@@ -0,0 +1,101 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import pytest
+import uamqp
+
+from azext_iot.monitor.health import MonitorHealth, ReconnectPolicy
+from azext_iot.monitor.stats import MonitorStats
+
+ErrorCodes = uamqp.constants.ErrorCodes
+
+
+class TestReconnectPolicy:
+    def test_reconnect_delays(self):
+        policy = ReconnectPolicy(max_attempts=10, initial_delay=1, max_delay=30, jitter=0)
+
+        assert [policy.get_delay(attempt) for attempt in range(1, 8)] == [1, 2, 4, 8, 16, 30, 30]
+
+    def test_reconnect_jitter(self):
+        policy = ReconnectPolicy(max_attempts=10, initial_delay=10, jitter=0.5)
+        delays = {policy.get_delay(1) for _ in range(100)}
+
+        assert all(5 <= delay <= 10 for delay in delays)
+        assert len(delays) > 1
+
+    @pytest.mark.parametrize(
+        "build_error, expected",
+        [
+            (lambda: uamqp.errors.LinkDetach(ErrorCodes.LinkDetachForced), True),
+            (lambda: uamqp.errors.LinkDetach(ErrorCodes.InternalServerError), True),
+            (lambda: uamqp.errors.LinkDetach(ErrorCodes.UnauthorizedAccess), False),
+            (lambda: uamqp.errors.LinkDetach(ErrorCodes.NotFound), False),
+            (lambda: uamqp.errors.LinkDetach(ErrorCodes.LinkStolen), False),
+            (lambda: uamqp.errors.VendorLinkDetach(b"com.microsoft:timeout"), True),
+            (lambda: uamqp.errors.ConnectionClose(ErrorCodes.ConnectionCloseForced), True),
+            (lambda: uamqp.errors.ConnectionClose(ErrorCodes.ConnectionRedirect), False),
+            (lambda: uamqp.errors.AMQPConnectionError("connection lost"), True),
+            (lambda: uamqp.errors.TokenExpired("token expired"), True),
+            (lambda: uamqp.errors.TokenAuthFailure(401, b"unauthorized"), False),
+            (lambda: ValueError("unexpected"), False),
+        ],
+    )
+    def test_reconnect_is_retriable(self, build_error, expected):
+        policy = ReconnectPolicy(max_attempts=3)
+        error = build_error()
+
+        assert policy.is_retriable(error) is expected
+        assert policy.should_retry(error, 3) is expected
+        assert not policy.should_retry(error, 4)
+
+
+class TestMonitorHealth:
+    def test_health_summary(self):
+        health = MonitorHealth()
+        health.connected(("path", "0"))
+        health.connected(("path", "1"))
+        health.disconnected(("path", "1"), "link detached")
+        health.connected(("path", "1"))
+        health.failed(("path", "0"), "unauthorized")
+        health.closed(("path", "0"))
+        health.closed(("path", "1"))
+
+        summary = health.summary()
+        assert summary["connects"] == 3
+        assert summary["reconnects"] == 1
+        assert summary["errors"] == 2
+        assert summary["partitions"]["0"]["state"] == "failed"
+        assert summary["partitions"]["0"]["lastError"] == "unauthorized"
+        assert summary["partitions"]["1"]["state"] == "closed"
+        assert summary["partitions"]["1"]["reconnects"] == 1
+        assert summary["partitions"]["1"]["lastErrorTime"]
+
+        assert health.format_text_summary() == (
+            "[health] partition 0: failed, 0 reconnects, last error: unauthorized\n"
+            "[health] partition 1: closed, 1 reconnects, last error: link detached\n"
+        )
+
+    def test_health_text_summary_healthy(self):
+        health = MonitorHealth()
+        health.connected(("path", "0"))
+
+        assert health.format_text_summary() == ""
+
+    @pytest.mark.parametrize("output", ["text", "json"])
+    def test_health_in_stats(self, output):
+        stream = io.StringIO()
+        stats = MonitorStats(output=output, stream=stream)
+        stats.health = MonitorHealth()
+        stats.health.disconnected(("path", "3"), "link detached")
+        stats.report()
+
+        report = stream.getvalue()
+        if output == "json":
+            assert json.loads(report)["health"]["partitions"]["3"]["reconnects"] == 1
+        else:
+            assert "[health] partition 3: reconnecting, 1 reconnects" in report
@@ -0,0 +1,97 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import csv
+import io
+import json
+import pytest
+
+from azext_iot.monitor.issue_summary import IssueSummary, get_issue_type, ISSUE_CSV_FIELDNAMES
+from azext_iot.monitor.models.enum import Severity
+from azext_iot.monitor.parsers import strings
+from azext_iot.monitor.parsers.issue import CentralIssue
+
+
+def _build_issues(count, device_count=3):
+    return [
+        CentralIssue(
+            severity=Severity.error if index % 2 else Severity.warning,
+            details=strings.invalid_primitive_schema_mismatch_template(
+                "temp{}".format(index), "double", index
+            )
+            if index % 2
+            else strings.invalid_json(),
+            message="message {}".format(index),
+            device_id="dev{}".format(index % device_count),
+            template_id="template1",
+        )
+        for index in range(count)
+    ]
+
+
+class TestIssueSummary:
+    @pytest.mark.parametrize("count", [1, 4])
+    def test_issue_summary_output_matches_full_list(self, count):
+        summary = IssueSummary(spool=True)
+        summary.add_issues(_build_issues(count))
+        expected = [issue.json_repr() for issue in _build_issues(count)]
+
+        stream = io.StringIO()
+        summary.write_json(stream)
+        assert stream.getvalue() == json.dumps(expected, indent=4) + "\n"
+
+        stream = io.StringIO()
+        summary.write_csv(stream)
+        expected_csv = io.StringIO()
+        writer = csv.DictWriter(expected_csv, fieldnames=ISSUE_CSV_FIELDNAMES)
+        writer.writeheader()
+        for issue in expected:
+            writer.writerow(issue)
+        assert stream.getvalue() == expected_csv.getvalue()
+
+        # issues can be added after writing out
+        summary.add_issues(_build_issues(1))
+        assert len(list(summary.iter_issues())) == count + 1
+        summary.close()
+
+    def test_issue_summary_is_bounded(self):
+        summary = IssueSummary()
+        for _ in range(1000):
+            summary.add_message()
+            summary.add_issues(_build_issues(10))
+
+        result = summary.summary()
+        assert result["messages"] == 1000
+        assert result["issues"] == 10000
+        assert result["severities"] == {"warning": 5000, "error": 5000}
+        assert len(summary.sample) == 5
+        # field names and values are blanked, so rollups do not grow with the data
+        assert len(result["rollups"]) == 6
+        assert result["rollups"][0]["count"] == 2000
+        assert {r["issue_type"] for r in result["rollups"]} == {
+            "Invalid JSON format",
+            "Datatype of telemetry field '' does not match the datatype double",
+        }
+        assert list(summary.iter_issues()) == []
+
+    @pytest.mark.parametrize(
+        "details, expected",
+        [
+            (strings.invalid_json(), "Invalid JSON format"),
+            (strings.unknown_device_id(), "Device ID not found in message"),
+            (strings.invalid_encoding("ascii"), "Encoding type '' is not supported"),
+            (
+                strings.invalid_field_name_mismatch_template(["a.b"], ["c"]),
+                "Device is sending data that has not been defined in the device template",
+            ),
+            (
+                strings.device_template_not_found(Exception("Not found. Retry.")),
+                "Error retrieving template ''",
+            ),
+        ],
+    )
+    def test_get_issue_type(self, details, expected):
+        assert get_issue_type(details) == expected
@@ -15,7 +15,9 @@ from azext_iot.central.providers import (
     CentralDeviceTemplateProvider,
 )
 from azext_iot.central.models.v1 import TemplateV1, DeviceV1
+from azext_iot.common.utility import parse_entity, unicode_binary_map
 from azext_iot.monitor.parsers import common_parser, central_parser
+from azext_iot.monitor.parsers.message_view import MessageView
 from azext_iot.monitor.parsers import strings
 from azext_iot.monitor.models.arguments import CommonParserArguments
 from azext_iot.monitor.models.enum import Severity
@@ -308,6 +310,69 @@ class TestCommonParser:
         _validate_issues(parser, Severity.error, 1, 1, [expected_details])
 
 
+class TestMessageView:
+    def _build_message(self):
+        properties = MessageProperties(
+            content_type=b"application/json",
+            content_encoding=b"utf-8",
+            message_id=b"message-id",
+            creation_time=1600000000000,
+            subject=b"",
+        )
+        return Message(
+            body=json.dumps({"key": "value"}).encode(),
+            properties=properties,
+            annotations={common_parser.DEVICE_ID_IDENTIFIER: b"device-id", b"x-opt-offset": 1},
+            application_properties={b"appKey": b"appValue"},
+        )
+
+    def test_message_view_matches_parse_entity(self):
+        message = self._build_message()
+        view = MessageView(message)
+
+        expected = unicode_binary_map(parse_entity(message.properties, True))
+        system_properties = view.get_system_properties()
+        assert system_properties == expected
+        assert list(system_properties) == list(expected)
+        assert view.annotations == unicode_binary_map(message.annotations)
+        assert view.application_properties == {"appKey": "appValue"}
+
+    def test_message_view_decodes_on_demand(self):
+        message = self._build_message()
+        reads = []
+
+        class _Properties:
+            def __getattr__(self, name):
+                reads.append(name)
+                return getattr(message.properties, name)
+
+        view = MessageView(
+            mock.MagicMock(properties=_Properties(), annotations={b"key": b"value"})
+        )
+
+        assert view.get_system_properties(["content_type", "subject"]) == {
+            "content_type": "application/json"
+        }
+        assert view.get_system_properties(["content_type"]) == {
+            "content_type": "application/json"
+        }
+        # only the requested fields are read, each one once
+        assert reads == ["content_type", "subject"]
+        assert view.annotations == {"key": "value"}
+        assert view.annotations is view.annotations
+
+    def test_message_view_invalid_utf8(self):
+        message = Message(
+            body=b"",
+            properties=MessageProperties(content_encoding=b"utf-8", user_id=b"\xff"),
+        )
+        view = MessageView(message)
+
+        assert view.get_system_properties(["content_encoding"]) == {"content_encoding": "utf-8"}
+        with pytest.raises(UnicodeDecodeError):
+            view.get_system_properties()
+
+
 class TestCentralParser:
     device_id = "some-device-id"
     payload = {"String": "someValue"}
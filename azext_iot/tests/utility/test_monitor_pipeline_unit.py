@@ -0,0 +1,93 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import pytest
+import random
+import threading
+import time
+
+from azext_iot.monitor.pipeline import MessagePipeline
+
+
+def _run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+class TestMessagePipeline:
+    def test_pipeline_keeps_partition_order(self):
+        emitted = []
+        threads = set()
+
+        def _process(message):
+            threads.add(threading.current_thread().name)
+            time.sleep(random.random() / 1000)
+            return None if message[1] % 5 == 0 else message
+
+        pipeline = MessagePipeline(process=_process, emit=emitted.append, workers=4, queue_size=8)
+
+        async def _partition(partition):
+            lane = pipeline.open_lane()
+            for index in range(50):
+                await lane.put((partition, index))
+            await lane.close()
+
+        async def _monitor():
+            await asyncio.gather(*[_partition(p) for p in range(3)])
+
+        _run(_monitor())
+        pipeline.shutdown()
+
+        for partition in range(3):
+            assert [m[1] for m in emitted if m[0] == partition] == [
+                i for i in range(50) if i % 5
+            ]
+        assert all(name.startswith("monitor-pipeline") for name in threads)
+
+    def test_pipeline_backpressure(self):
+        release = threading.Event()
+        pipeline = MessagePipeline(
+            process=lambda message: release.wait(), emit=lambda _: None, workers=1, queue_size=2
+        )
+
+        async def _monitor():
+            lane = pipeline.open_lane()
+            await lane.put(1)
+            await lane.put(2)
+            # the first message is being processed, the lane is full once a third is waiting
+            await lane.put(3)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(lane.put(4), timeout=0.05)
+            release.set()
+            await lane.put(5)
+            await lane.close()
+
+        _run(_monitor())
+        pipeline.shutdown()
+
+    def test_pipeline_callbacks_and_errors(self):
+        emitted = []
+
+        def _process(message):
+            if message == "bad":
+                raise ValueError(message)
+            return message
+
+        pipeline = MessagePipeline(process=_process, emit=emitted.append, workers=2)
+
+        async def _monitor():
+            lane = pipeline.open_lane()
+            await lane.put("good", on_emitted=lambda: emitted.append("callback"))
+            await lane.put("bad")
+            await asyncio.sleep(0.05)
+            with pytest.raises(ValueError):
+                await lane.put("after")
+            with pytest.raises(ValueError):
+                await lane.close()
+
+        _run(_monitor())
+        pipeline.shutdown()
+        assert emitted == ["good", "callback"]
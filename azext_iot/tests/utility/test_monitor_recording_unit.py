@@ -0,0 +1,110 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import pytest
+
+from uamqp.message import Message, MessageProperties
+from azext_iot.monitor.handlers import CommonHandler
+from azext_iot.monitor.models.arguments import (
+    CommonHandlerArguments,
+    CommonParserArguments,
+)
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+from azext_iot.monitor.recording import (
+    MessageRecorder,
+    read_recording,
+    replay_recording,
+    RECORDING_MAGIC,
+)
+
+
+def _build_message(index):
+    return Message(
+        body=json.dumps({"index": index}).encode(),
+        annotations={
+            DEVICE_ID_IDENTIFIER: "device{}".format(index % 2).encode(),
+            b"x-opt-enqueued-time": 1600000000000 + index,
+            b"x-opt-offset": str(index).encode(),
+        },
+        properties=MessageProperties(
+            content_type=b"application/json", content_encoding=b"utf-8", message_id=b"id"
+        ),
+        application_properties={b"key": b"value", "text": "value", "number": 1.5, "empty": None},
+    )
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = str(tmp_path / "messages.rec")
+    recorder = MessageRecorder(path)
+    for index in range(10):
+        recorder.record(_build_message(index))
+    recorder.close()
+    assert recorder.message_count == 10
+    return path
+
+
+class TestMessageRecording:
+    def test_read_recording(self, recording):
+        records = list(read_recording(recording))
+
+        assert len(records) == 10
+        times = [received for received, _ in records]
+        assert times == sorted(times)
+        for index, (_, message) in enumerate(records):
+            expected = _build_message(index)
+            assert list(message.get_data()) == list(expected.get_data())
+            assert message.annotations == expected.annotations
+            assert message.application_properties == expected.application_properties
+            assert message.properties.content_type == b"application/json"
+            assert message.properties.content_encoding == b"utf-8"
+            assert message.properties.message_id == b"id"
+
+    def test_read_truncated_recording(self, recording):
+        with open(recording, "rb") as f:
+            data = f.read()
+        with open(recording, "wb") as f:
+            f.write(data[:-10])
+
+        assert len(list(read_recording(recording))) == 9
+
+    def test_read_invalid_recording(self, tmp_path):
+        path = str(tmp_path / "not_a_recording")
+        with open(path, "wb") as f:
+            f.write(b"{}")
+        with pytest.raises(ValueError):
+            list(read_recording(path))
+
+        with open(path, "wb") as f:
+            f.write(RECORDING_MAGIC + bytes([99]))
+        with pytest.raises(ValueError):
+            list(read_recording(path))
+
+    @pytest.mark.parametrize("original_timing", [False, True])
+    def test_replay_recording(self, mocker, recording, original_timing):
+        handler = CommonHandler(
+            CommonHandlerArguments(
+                output="json",
+                common_parser_args=CommonParserArguments(
+                    properties=["anno", "sys", "app"], content_type="application/json"
+                ),
+                device_id="device1",
+            )
+        )
+        output = mocker.patch.object(handler, "output_message")
+
+        result = replay_recording(
+            recording, handler.parse_message, original_timing=original_timing
+        )
+
+        assert result["messages"] == 10
+        assert result["messagesPerSecond"] > 0
+        events = [c[0][0]["event"] for c in output.call_args_list]
+        assert [event["payload"]["index"] for event in events] == [1, 3, 5, 7, 9]
+        assert events[0]["origin"] == "device1"
+        assert events[0]["annotations"]["x-opt-offset"] == "1"
+        assert events[0]["properties"]["application"]["key"] == "value"
@@ -0,0 +1,138 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import pytest
+
+from threading import Thread
+from uamqp.message import Message
+from azext_iot.monitor import sampling
+from azext_iot.monitor.handlers import CommonHandler, common_handler
+from azext_iot.monitor.models.arguments import CommonHandlerArguments, CommonParserArguments
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+from azext_iot.monitor.sampling import DeviceSampler
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [100.0]
+    mocker.patch.object(sampling, "monotonic", side_effect=lambda: now[0])
+    return now
+
+
+class TestDeviceSampler:
+    def test_sample_every(self):
+        sampler = DeviceSampler(every=3, stream=io.StringIO())
+
+        sampled = [sampler.should_sample(device_id) for device_id in [b"d1", b"d2"] * 7]
+
+        assert sampled[0::2] == [True, False, False, True, False, False, True]
+        assert sampled[1::2] == sampled[0::2]
+        assert sampler.total_suppressed == 8
+
+    def test_sample_rate(self, clock):
+        sampler = DeviceSampler(rate=2, stream=io.StringIO())
+
+        # a burst of up to one second worth of events per device
+        assert [sampler.should_sample(b"d1") for _ in range(4)] == [True, True, False, False]
+        assert sampler.should_sample(b"d2")
+
+        clock[0] += 0.5
+        assert [sampler.should_sample(b"d1") for _ in range(2)] == [True, False]
+
+        # idle time never allows more than the burst
+        clock[0] += 60
+        assert [sampler.should_sample(b"d1") for _ in range(3)] == [True, True, False]
+        assert sampler.total_suppressed == 4
+
+    def test_sample_rate_below_one(self, clock):
+        sampler = DeviceSampler(rate=0.1, stream=io.StringIO())
+
+        assert [sampler.should_sample(b"d1") for _ in range(2)] == [True, False]
+        clock[0] += 5
+        assert not sampler.should_sample(b"d1")
+        clock[0] += 5
+        assert sampler.should_sample(b"d1")
+
+    def test_sample_concurrently(self):
+        sampler = DeviceSampler(every=10, stream=io.StringIO())
+        sampled = []
+
+        def _sample():
+            sampled.extend(sampler.should_sample(b"d1") for _ in range(1000))
+
+        threads = [Thread(target=_sample) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sampled.count(True) == 400
+        assert sampler.total_suppressed == 3600
+
+    def test_sampling_report(self, clock):
+        stream = io.StringIO()
+        sampler = DeviceSampler(every=2, stream=stream)
+        for device_id, count in [(b"d1", 9), (b"d2", 3), (b"", 2)]:
+            for _ in range(count):
+                sampler.should_sample(device_id)
+
+        clock[0] += 10
+        sampler.report()
+        assert stream.getvalue() == (
+            "[sampling] 10.0s: suppressed 6 events from 3 devices\n"
+            "[sampling]   device d1: 4 suppressed\n"
+            "[sampling]   device d2: 1 suppressed\n"
+            "[sampling]   device <unknown>: 1 suppressed\n"
+        )
+
+        # nothing suppressed since the last report
+        stream.truncate(0)
+        stream.seek(0)
+        sampler.report()
+        assert stream.getvalue() == ""
+
+        sampler.should_sample(b"d2")
+        sampler.stop()
+        assert stream.getvalue() == (
+            "[sampling] 0.0s: suppressed 1 events from 1 devices\n"
+            "[sampling]   device d2: 1 suppressed\n"
+            "[sampling] suppressed 7 events in total\n"
+        )
+
+
+class TestCommonHandlerSampling:
+    def test_handler_samples_before_parsing(self, mocker):
+        parser = mocker.spy(common_handler, "CommonParser")
+        output_message = mocker.patch.object(CommonHandler, "output_message")
+        handler = CommonHandler(
+            CommonHandlerArguments(
+                output="json",
+                common_parser_args=CommonParserArguments(content_type="application/json"),
+                sample_every=2,
+            )
+        )
+        handler.sampler.stream = io.StringIO()
+
+        for value in range(4):
+            handler.parse_message(
+                Message(
+                    body=json.dumps({"value": value}).encode(),
+                    annotations={DEVICE_ID_IDENTIFIER: b"device1"},
+                )
+            )
+
+        assert parser.call_count == 2
+        assert [call[0][0]["event"]["payload"]["value"] for call in output_message.call_args_list] == [0, 2]
+        assert handler.sampler.total_suppressed == 2
+
+    def test_handler_without_sampling(self):
+        handler = CommonHandler(
+            CommonHandlerArguments(output="json", common_parser_args=CommonParserArguments())
+        )
+
+        assert handler.sampler is None
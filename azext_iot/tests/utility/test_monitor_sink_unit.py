@@ -0,0 +1,83 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import json
+import os
+
+from azext_iot.monitor.sink import NdjsonSink
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestNdjsonSink:
+    def test_sink_stdout_buffers_until_flush_size(self, capsys):
+        sink = NdjsonSink(flush_size=100, flush_interval=60)
+        event = {"event": {"origin": "dev1", "payload": {"temp": 1}}}
+
+        sink.write(event)
+        assert capsys.readouterr().out == ""
+
+        sink.write(event)
+        assert capsys.readouterr().out == ""
+
+        # the third event takes the buffer past flush_size
+        sink.write(event)
+        out = capsys.readouterr().out
+        assert out.count("\n") == 3
+        assert json.loads(out.splitlines()[0]) == event
+        assert " " not in out
+
+        sink.write(event)
+        sink.close()
+        assert capsys.readouterr().out.count("\n") == 1
+
+    def test_sink_flushes_on_interval(self, capsys):
+        sink = NdjsonSink(flush_interval=0)
+        sink.write({"a": 1})
+        assert capsys.readouterr().out == '{"a":1}\n'
+
+    def test_sink_flushes_quiet_stream_while_monitoring(self, capsys):
+        sink = NdjsonSink(flush_interval=0.01)
+
+        async def _monitor():
+            sink.write({"a": 1})
+            assert capsys.readouterr().out == ""
+            await asyncio.sleep(0.05)
+
+        asyncio.new_event_loop().run_until_complete(_monitor())
+        assert capsys.readouterr().out == '{"a":1}\n'
+
+    def test_sink_file_rotation(self, tmp_path):
+        path = str(tmp_path / "out" / "events.ndjson")
+        line_size = len('{"index":0}\n')
+        sink = NdjsonSink(
+            output_file=path,
+            max_file_size=line_size * 2,
+            backup_count=2,
+            flush_size=1,
+        )
+
+        for index in range(7):
+            sink.write({"index": index})
+        sink.close()
+
+        assert _read_lines(path) == [{"index": 6}]
+        assert _read_lines(path + ".1") == [{"index": 4}, {"index": 5}]
+        assert _read_lines(path + ".2") == [{"index": 2}, {"index": 3}]
+        assert not os.path.exists(path + ".3")
+
+    def test_sink_file_appends(self, tmp_path):
+        path = str(tmp_path / "events.ndjson")
+        for index in range(2):
+            sink = NdjsonSink(output_file=path)
+            sink.write({"index": index})
+            sink.close()
+
+        assert _read_lines(path) == [{"index": 0}, {"index": 1}]
@@ -0,0 +1,104 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import json
+import pytest
+import random
+
+from time import time
+from uamqp.message import Message
+from azext_iot.monitor.checkpoint import ENQUEUED_TIME_IDENTIFIER
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+from azext_iot.monitor.stats import Histogram, MonitorStats, _bucket_index, _bucket_upper_bound
+
+
+def _build_message(device_id, body=b"0123456789", latency_ms=100):
+    return Message(
+        body=body,
+        annotations={
+            DEVICE_ID_IDENTIFIER: device_id.encode(),
+            ENQUEUED_TIME_IDENTIFIER: int(time() * 1000 - latency_ms),
+        },
+    )
+
+
+class TestHistogram:
+    def test_histogram_buckets(self):
+        previous = -1
+        for value in list(range(5000)) + [2 ** 40, 2 ** 40 + 12345]:
+            index = _bucket_index(value)
+            upper = _bucket_upper_bound(index)
+            assert index >= previous
+            assert value <= upper
+            assert upper - value <= max(value / 16, 0)
+            previous = index
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        assert histogram.percentile(50) is None
+
+        values = list(range(1, 100001))
+        random.shuffle(values)
+        for value in values:
+            histogram.record(value)
+        histogram.record(-5)
+
+        assert histogram.count == 100001
+        assert histogram.min == 0
+        assert histogram.max == 100000
+        for percentile in (50, 90, 99):
+            expected = 100000 * percentile / 100
+            assert expected <= histogram.percentile(percentile) <= expected * 1.07
+        assert histogram.percentile(100) == 100000
+        # sparse storage, far fewer buckets than values
+        assert len(histogram.counts) < 300
+
+
+class TestMonitorStats:
+    def test_stats_summary(self):
+        stats = MonitorStats()
+        for _ in range(3):
+            stats.record_message(("hub", "0"), _build_message("dev1"))
+        stats.record_message(("hub", "1"), _build_message("dev2", latency_ms=5000))
+        stats.record_message(("hub", "1"), Message(body=b"01234"))
+        stats.record_parse_time(0.002, 2)
+
+        summary = stats.summary()
+        assert summary["messages"] == 5
+        assert set(summary["partitions"]) == {"0", "1"}
+        assert summary["partitions"]["0"]["messages"] == 3
+        assert summary["partitions"]["1"]["latencyMs"]["count"] == 1
+        assert 5000 <= summary["partitions"]["1"]["latencyMs"]["max"] < 6000
+        assert 100 <= summary["devices"]["dev1"]["latencyMs"]["p50"] < 200
+        assert summary["devices"][""]["messages"] == 1
+        assert summary["parseTimeUs"]["count"] == 2
+        assert 950 <= summary["parseTimeUs"]["p50"] <= 1000
+
+        stats.record_message(("other", "0"), _build_message("dev1"))
+        assert set(stats.summary()["partitions"]) == {"hub/0", "hub/1", "other/0"}
+
+    @pytest.mark.parametrize("output", ["text", "json"])
+    def test_stats_report(self, output):
+        stream = io.StringIO()
+        stats = MonitorStats(output=output, stream=stream)
+        stats.record_message(("hub", "0"), _build_message("dev1"))
+        stats.report()
+
+        report = stream.getvalue()
+        if output == "json":
+            summary = json.loads(report)
+            assert summary["messages"] == 1
+            assert summary["devices"]["dev1"]["messages"] == 1
+        else:
+            lines = report.splitlines()
+            assert lines[0].startswith("[stats]")
+            assert "partition 0:" in lines[1]
+            assert "device dev1:" in lines[2]
+
+        # counters cover a single interval
+        assert stats.summary()["messages"] == 0
+        assert stats.total_messages == 1
@@ -0,0 +1,139 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import pytest
+
+from time import time
+from azext_iot.monitor.builders import _common, central_target_builder
+from azext_iot.monitor.builders.hub_target_builder import EventTargetBuilder
+
+path_get_iot_central_tokens = (
+    "azext_iot.monitor.builders.central_target_builder.get_iot_central_tokens"
+)
+
+
+def _async_stub(mocker, return_value=None):
+    # unittest.mock.AsyncMock needs Python 3.8
+    async def _stub(*args, **kwargs):
+        return return_value
+
+    return mocker.Mock(side_effect=_stub)
+
+
+def _build_tokens(suffix, expiry):
+    return {
+        hub: {
+            "eventhubSasToken": {
+                "hostname": "sb://{}.servicebus.windows.net/".format(hub),
+                "entityPath": "{}-path".format(hub),
+                "sasToken": "{}-{}".format(hub, suffix),
+            },
+            "expiry": expiry,
+        }
+        for hub in ("hub1", "hub2")
+    }
+
+
+def _run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+class TestEventHubTokenSource:
+    def test_token_source_reuses_tokens(self, mocker):
+        expiry = time() + 3600
+        get_tokens = mocker.patch(
+            path_get_iot_central_tokens, return_value=_build_tokens("new", expiry + 3600)
+        )
+        source = central_target_builder.EventHubTokenSource(
+            "cmd", "app", None, "azureiotcentral.com", tokens=_build_tokens("old", expiry)
+        )
+
+        assert source.get_token("hub1.servicebus.windows.net", "hub1-path") == ("hub1-old", expiry)
+        get_tokens.assert_not_called()
+
+        # the first hub to need a newer token fetches a new set, the other hub reuses it
+        assert source.get_token("hub1.servicebus.windows.net", "hub1-path", expiry) == (
+            "hub1-new",
+            expiry + 3600,
+        )
+        assert source.get_token("hub2.servicebus.windows.net", "hub2-path", expiry) == (
+            "hub2-new",
+            expiry + 3600,
+        )
+        get_tokens.assert_called_once_with("cmd", "app", None, "azureiotcentral.com")
+
+    def test_token_source_unknown_hub(self, mocker):
+        mocker.patch(path_get_iot_central_tokens, return_value=_build_tokens("new", time()))
+        source = central_target_builder.EventHubTokenSource(
+            "cmd", "app", None, "azureiotcentral.com"
+        )
+
+        with pytest.raises(Exception, match="No event hub token issued"):
+            source.get_token("hub3.servicebus.windows.net", "hub3-path")
+
+
+class TestRefreshableTargets:
+    def test_refreshable_auth(self, mocker):
+        expiry = time() + 3600
+        get_token = mocker.MagicMock(return_value=("refreshed", expiry + 3600))
+        auth = _common._build_refreshable_auth_container(
+            "hostname", "path", "token", expiry, get_token
+        )
+
+        _run(auth.update_token())
+
+        get_token.assert_called_once_with(expiry)
+        assert auth.token == b"refreshed"
+        assert auth.expires_at == expiry + 3600
+
+    def test_central_target_auth_factory(self, mocker):
+        expiry = time() + 3600
+        tokens = _build_tokens("old", expiry)
+        mocker.patch.object(
+            _common, "_query_meta_data_internal", _async_stub(mocker, {b"partition_count": 2})
+        )
+        get_token = mocker.MagicMock(return_value=("hub1-new", expiry + 3600))
+
+        target = _run(_common.convert_token_to_target(tokens["hub1"], get_token=get_token))
+
+        assert (target.hostname, target.path, target.partitions) == (
+            "hub1.servicebus.windows.net",
+            "hub1-path",
+            ["0", "1"],
+        )
+        assert target.auth.token == b"hub1-old"
+
+        auth = target.build_auth()
+        assert auth is not target.auth
+        assert auth.token == b"hub1-new"
+        hostname, path, expires_after = get_token.call_args[0]
+        assert (hostname, path) == ("hub1.servicebus.windows.net", "hub1-path")
+        assert expires_after > time()
+
+    def test_central_target_without_token_source(self, mocker):
+        mocker.patch.object(
+            _common, "_query_meta_data_internal", _async_stub(mocker, {b"partition_count": 1})
+        )
+
+        target = _run(
+            _common.convert_token_to_target(_build_tokens("old", time() + 3600)["hub1"])
+        )
+
+        assert target.build_auth() is target.auth
+
+    def test_hub_target_auth_factory(self):
+        target = EventTargetBuilder().build_iot_hub_target(
+            {
+                "policy": "iothubowner",
+                "primarykey": "a2V5",
+                "events": {"endpoint": "endpoint", "path": "path", "partition_ids": ["0"]},
+            }
+        )
+
+        auth = target.build_auth()
+        assert auth is not target.auth
+        assert auth.uri == target.auth.uri == "sb://endpoint/path"
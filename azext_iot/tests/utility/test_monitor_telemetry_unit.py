@@ -0,0 +1,367 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import pytest
+import uamqp
+
+from functools import partial
+from uamqp.message import Message
+from azext_iot.monitor import telemetry
+from azext_iot.monitor.checkpoint import OFFSET_IDENTIFIER
+from azext_iot.monitor.health import MonitorHealth, ReconnectPolicy
+from azext_iot.monitor.models.target import Target
+from azext_iot.monitor.pipeline import MessagePipeline
+from azext_iot.monitor.stats import MonitorStats
+
+path_receive_client = "azext_iot.monitor.telemetry.uamqp.ReceiveClientAsync"
+
+
+def _async_stub(mocker, return_value=None):
+    # unittest.mock.AsyncMock needs Python 3.8
+    async def _stub(*args, **kwargs):
+        return return_value
+
+    return mocker.Mock(side_effect=_stub)
+
+
+@pytest.fixture
+def target():
+    target = Target(hostname="hostname", path="path", partitions=["0"], auth=None)
+    target.add_consumer_group("$Default")
+    return target
+
+
+@pytest.fixture
+def messages():
+    return [Message(body="message {}".format(i)) for i in range(5)]
+
+
+@pytest.fixture
+def receive_client(mocker, messages):
+    client = mocker.patch(path_receive_client)
+    instance = client.return_value
+
+    async def _noop(*args, **kwargs):
+        pass
+
+    async def _iter():
+        for message in messages:
+            yield message
+
+    batches = [messages[:3], messages[3:], []]
+
+    async def _batch(max_batch_size=None, timeout=0):
+        return batches.pop(0)
+
+    instance.open_async = _noop
+    instance.close_async = _noop
+    instance.receive_messages_iter_async = _iter
+    instance.receive_message_batch_async = mocker.MagicMock(side_effect=_batch)
+    return client
+
+
+def _run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+class TestMonitorEvents:
+    def test_monitor_events_iterator(self, mocker, target, messages, receive_client):
+        on_message_received = mocker.MagicMock()
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=on_message_received,
+            )
+        )
+
+        assert receive_client.call_args[1]["prefetch"] == 0
+        assert [c[0][0] for c in on_message_received.call_args_list] == messages
+
+    @pytest.mark.parametrize(
+        "prefetch, batch_size, expected_prefetch", [(None, 3, 3), (10, 3, 10)]
+    )
+    def test_monitor_events_batch(
+        self, mocker, target, messages, receive_client, prefetch, batch_size, expected_prefetch
+    ):
+        on_message_received = mocker.MagicMock()
+        on_batch_received = mocker.MagicMock()
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=on_message_received,
+                prefetch=prefetch,
+                batch_size=batch_size,
+                on_batch_received=on_batch_received,
+            )
+        )
+
+        assert receive_client.call_args[1]["prefetch"] == expected_prefetch
+        batch_call = receive_client.return_value.receive_message_batch_async
+        assert batch_call.call_args[1]["max_batch_size"] == batch_size
+        assert [c[0][0] for c in on_batch_received.call_args_list] == [messages[:3], messages[3:]]
+        on_message_received.assert_not_called()
+
+    def test_monitor_events_batch_without_handler(self, mocker, target, messages, receive_client):
+        on_message_received = mocker.MagicMock()
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=on_message_received,
+                batch_size=3,
+            )
+        )
+
+        assert [c[0][0] for c in on_message_received.call_args_list] == messages
+
+    @pytest.mark.parametrize("batch_size", [None, 3])
+    def test_monitor_events_pipeline(self, mocker, target, messages, receive_client, batch_size):
+        on_message_received = mocker.MagicMock()
+        checkpoint_store = mocker.MagicMock()
+        emitted = []
+
+        def _emit(result):
+            # checkpoints trail emitted messages
+            assert checkpoint_store.update_checkpoint.call_count <= len(emitted)
+            emitted.append(result)
+
+        pipeline = MessagePipeline(process=lambda msg: msg, emit=_emit, workers=2)
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=on_message_received,
+                checkpoint_store=checkpoint_store,
+                batch_size=batch_size,
+                pipeline=pipeline,
+            )
+        )
+        pipeline.shutdown()
+
+        assert emitted == messages
+        on_message_received.assert_not_called()
+        checkpointed = [c[0][2] for c in checkpoint_store.update_checkpoint.call_args_list]
+        assert checkpointed == ([messages[2], messages[4]] if batch_size else messages)
+
+    @pytest.mark.parametrize("batch_size, use_pipeline", [(None, False), (3, False), (None, True)])
+    def test_monitor_events_stats(
+        self, mocker, target, messages, receive_client, batch_size, use_pipeline
+    ):
+        stats = MonitorStats()
+        pipeline = (
+            MessagePipeline(process=lambda msg: msg, emit=lambda _: None) if use_pipeline else None
+        )
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=mocker.MagicMock(),
+                batch_size=batch_size,
+                pipeline=pipeline,
+                stats=stats,
+            )
+        )
+        if pipeline:
+            pipeline.shutdown()
+
+        summary = stats.summary()
+        assert summary["partitions"]["0"]["messages"] == len(messages)
+        assert summary["partitions"]["0"]["bytesPerSec"] > 0
+        assert summary["parseTimeUs"]["count"] == len(messages)
+
+    @pytest.mark.parametrize("batch_size", [None, 3])
+    def test_monitor_events_record(self, mocker, target, messages, receive_client, batch_size):
+        recorder = mocker.MagicMock()
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=mocker.MagicMock(),
+                batch_size=batch_size,
+                recorder=recorder,
+            )
+        )
+
+        assert [c[0][0] for c in recorder.record.call_args_list] == messages
+
+
+def _build_offset_messages(count):
+    return [
+        Message(body="message {}".format(i), annotations={OFFSET_IDENTIFIER: str(i * 100).encode()})
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def flaky_receive_client(mocker):
+    """
+    Receive clients yielding the messages of each connection in turn, each connection
+    ending with the error built by its error factory, if any.
+    """
+    connections = []
+
+    def _build_client(*args, **kwargs):
+        client = mocker.MagicMock()
+        messages, build_error = connections.pop(0)
+
+        async def _noop(*args, **kwargs):
+            pass
+
+        async def _iter():
+            for message in messages:
+                yield message
+            if build_error:
+                raise build_error()
+
+        client.open_async = mocker.MagicMock(side_effect=_noop)
+        client.close_async = _noop
+        client.receive_messages_iter_async = _iter
+        return client
+
+    mocker.patch(path_receive_client, side_effect=_build_client)
+    return connections
+
+
+def _link_detach(condition=uamqp.constants.ErrorCodes.LinkDetachForced):
+    return uamqp.errors.LinkDetach(condition, b"link detached")
+
+
+def _connection_close():
+    return uamqp.errors.ConnectionClose(uamqp.constants.ErrorCodes.ConnectionCloseForced)
+
+
+class TestMonitorEventsReconnect:
+    def test_monitor_events_reconnect(self, mocker, target, flaky_receive_client):
+        messages = _build_offset_messages(5)
+        flaky_receive_client.extend(
+            [
+                (messages[:2], _link_detach),
+                ([], _connection_close),
+                (messages[2:], None),
+            ]
+        )
+        target.add_auth_factory(mocker.MagicMock(side_effect=["auth 1", "auth 2"]))
+        build_event_filter = mocker.spy(telemetry, "_build_event_filter")
+        sleep = mocker.patch("azext_iot.monitor.telemetry.asyncio.sleep", _async_stub(mocker))
+        on_message_received = mocker.MagicMock()
+        health = MonitorHealth()
+
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection="connection",
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=on_message_received,
+                reconnect=ReconnectPolicy(max_attempts=2, initial_delay=1, jitter=0),
+                health=health,
+            )
+        )
+
+        assert [c[0][0] for c in on_message_received.call_args_list] == messages
+        # the first receiver shares the connection, reconnects open their own with new auth
+        client_calls = telemetry.uamqp.ReceiveClientAsync.call_args_list
+        assert [c[1]["auth"] for c in client_calls] == [None, "auth 1", "auth 2"]
+        assert [c[0][1] for c in build_event_filter.call_args_list] == [
+            None,
+            {"offset": "100", "sequenceNumber": None, "enqueuedTime": None},
+            {"offset": "100", "sequenceNumber": None, "enqueuedTime": None},
+        ]
+        # no message between the two errors, so the second attempt backs off further
+        assert [c[0][0] for c in sleep.call_args_list] == [1, 2]
+
+        summary = health.summary()["partitions"]["0"]
+        assert summary["state"] == "closed"
+        assert summary["connects"] == 3
+        assert summary["reconnects"] == 2
+        assert summary["errors"] == 2
+
+    def test_monitor_events_reconnect_attempts_reset(self, mocker, target, flaky_receive_client):
+        messages = _build_offset_messages(3)
+        flaky_receive_client.extend(
+            [
+                (messages[:1], _link_detach),
+                (messages[1:2], _link_detach),
+                (messages[2:], None),
+            ]
+        )
+        mocker.patch("azext_iot.monitor.telemetry.asyncio.sleep", _async_stub(mocker))
+        on_message_received = mocker.MagicMock()
+
+        _run(
+            telemetry._monitor_events(
+                target=target,
+                connection=None,
+                partition="0",
+                enqueued_time_utc=0,
+                on_message_received=on_message_received,
+                reconnect=ReconnectPolicy(max_attempts=1),
+            )
+        )
+
+        assert on_message_received.call_count == 3
+
+    @pytest.mark.parametrize(
+        "condition, max_attempts",
+        [
+            (uamqp.constants.ErrorCodes.UnauthorizedAccess, 5),
+            (uamqp.constants.ErrorCodes.LinkStolen, 5),
+            (uamqp.constants.ErrorCodes.LinkDetachForced, 0),
+        ],
+    )
+    def test_monitor_events_reconnect_gives_up(
+        self, mocker, target, flaky_receive_client, condition, max_attempts
+    ):
+        build_error = partial(_link_detach, condition)
+        flaky_receive_client.extend([([], build_error), ([], build_error)])
+        mocker.patch("azext_iot.monitor.telemetry.asyncio.sleep", _async_stub(mocker))
+        health = MonitorHealth()
+
+        with pytest.raises(RuntimeError, match="link detached"):
+            _run(
+                telemetry._monitor_events(
+                    target=target,
+                    connection=None,
+                    partition="0",
+                    enqueued_time_utc=0,
+                    on_message_received=mocker.MagicMock(),
+                    reconnect=ReconnectPolicy(max_attempts=max_attempts),
+                    health=health,
+                )
+            )
+
+        summary = health.summary()["partitions"]["0"]
+        assert summary["state"] == "failed"
+        assert summary["reconnects"] == 0
+
+    def test_monitor_events_without_reconnect(self, mocker, target, flaky_receive_client):
+        flaky_receive_client.append(([], _link_detach))
+
+        with pytest.raises(RuntimeError, match="link detached"):
+            _run(
+                telemetry._monitor_events(
+                    target=target,
+                    connection=None,
+                    partition="0",
+                    enqueued_time_utc=0,
+                    on_message_received=mocker.MagicMock(),
+                )
+            )
@@ -0,0 +1,238 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import json
+import pytest
+import threading
+import time
+
+from unittest import mock
+from uamqp.message import Message
+from azext_iot.central.models.enum import ApiVersion
+from azext_iot.central.models.v1 import DeviceV1, TemplateV1
+from azext_iot.central.providers import (
+    CentralDeviceProvider,
+    CentralDeviceTemplateProvider,
+)
+from azext_iot.monitor.handlers import CentralHandler
+from azext_iot.monitor.models.arguments import (
+    CentralHandlerArguments,
+    CommonHandlerArguments,
+    CommonParserArguments,
+)
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+from azext_iot.monitor import template_resolver
+from azext_iot.monitor.recording import MessageRecorder, replay_recording
+from azext_iot.tests.helpers import load_json
+from azext_iot.tests.test_constants import FileNames
+
+
+@pytest.fixture
+def template():
+    return TemplateV1(load_json(FileNames.central_device_template_file))
+
+
+@pytest.fixture
+def device_provider():
+    return CentralDeviceProvider(cmd=None, app_id=None, api_version=ApiVersion.v1.value)
+
+
+@pytest.fixture
+def template_provider():
+    return CentralDeviceTemplateProvider(cmd=None, app_id=None, api_version=ApiVersion.v1.value)
+
+
+def _build_handler(device_provider, template_provider, device_id=None):
+    return CentralHandler(
+        central_device_provider=device_provider,
+        central_template_provider=template_provider,
+        central_handler_args=CentralHandlerArguments(
+            duration=0,
+            max_messages=0,
+            common_handler_args=CommonHandlerArguments(
+                output="json",
+                common_parser_args=CommonParserArguments(content_type="application/json"),
+                device_id=device_id,
+            ),
+        ),
+        central_dns_suffix="azureiotcentral.com",
+    )
+
+
+def _build_message(device_id, index=0):
+    return Message(
+        body=json.dumps({"index": index}).encode(),
+        annotations={DEVICE_ID_IDENTIFIER: device_id.encode()},
+    )
+
+
+class TestCentralTemplateResolver:
+    def test_warm_up(self, mocker, device_provider, template_provider, template):
+        template_list = mocker.patch(
+            "azext_iot.central.services.device_template.list_device_templates",
+            return_value=[template],
+        )
+        device_list = mocker.patch(
+            "azext_iot.central.services.device.list_devices",
+            return_value=[
+                DeviceV1({"id": "dev1", "template": template.id}),
+                DeviceV1({"id": "dev2", "template": "unknown"}),
+                DeviceV1({"id": "dev3"}),
+            ],
+        )
+        get_device = mocker.patch("azext_iot.central.services.device.get_device")
+        handler = _build_handler(device_provider, template_provider)
+
+        handler.warm_up_template_cache()
+
+        assert template_list.call_count == 1
+        assert device_list.call_count == 1
+        resolver = handler._template_resolver
+        assert resolver.get_template("dev1") is template
+        assert not resolver.is_resolved("dev2")
+        assert not resolver.is_resolved("dev3")
+        # warm up also fills the provider caches used for any later lookups
+        assert template_provider.get_device_template(template.id) is template
+        assert device_provider.get_device("dev2").template == "unknown"
+        get_device.assert_not_called()
+
+    def test_warm_up_skipped_for_single_device(self, mocker, device_provider, template_provider):
+        device_list = mocker.patch("azext_iot.central.services.device.list_devices")
+        _build_handler(device_provider, template_provider, device_id="dev1").warm_up_template_cache()
+        device_list.assert_not_called()
+
+    def test_warm_up_failure_falls_back(self, mocker, device_provider, template_provider):
+        mocker.patch(
+            "azext_iot.central.services.device_template.list_device_templates",
+            side_effect=Exception("forbidden"),
+        )
+        handler = _build_handler(device_provider, template_provider)
+        handler.warm_up_template_cache()
+        assert not handler._template_resolver.is_resolved("dev1")
+
+    def test_unresolved_device_does_not_block(self, device_provider, template_provider, template):
+        release = threading.Event()
+
+        def _get_device(device_id, central_dns_suffix):
+            if device_id == "slow":
+                release.wait(5)
+            if device_id == "missing":
+                raise Exception("not found")
+            return DeviceV1({"id": device_id, "template": template.id})
+
+        device_provider.get_device = mock.MagicMock(side_effect=_get_device)
+        template_provider.get_device_template = mock.MagicMock(return_value=template)
+        handler = _build_handler(device_provider, template_provider)
+        handler._template_resolver._resolved["fast"] = (template, None)
+        validated = mock.MagicMock(side_effect=handler._validate_message)
+        handler._validate_message = validated
+
+        async def _monitor():
+            handler.validate_message(_build_message("slow", 0))
+            handler.validate_message(_build_message("slow", 1))
+            handler.validate_message(_build_message("fast", 2))
+            handler.validate_message(_build_message("missing", 3))
+            # the known device is validated right away
+            assert handler._summary.message_count == 1
+
+            release.set()
+            for _ in range(100):
+                if handler._summary.message_count == 4:
+                    break
+                await asyncio.sleep(0.01)
+
+        asyncio.new_event_loop().run_until_complete(_monitor())
+        spool = handler._summary._spool
+        handler.shutdown()
+        assert spool.closed
+
+        indexes = [json.loads(next(c[0][0].get_data()))["index"] for c in validated.call_args_list]
+        assert indexes.index(0) < indexes.index(1)
+        assert sorted(indexes) == [0, 1, 2, 3]
+        # one lookup per device, however many messages it sent
+        assert [c[0][0] for c in device_provider.get_device.call_args_list].count("slow") == 1
+        rollups = handler._summary.summary()["rollups"]
+        assert "Error retrieving template ''" in [
+            r["issue_type"] for r in rollups if r["device_id"] == "missing"
+        ]
+
+    def test_replay_drains_pending_lookups(self, tmp_path, device_provider, template_provider, template):
+        def _get_device(device_id, central_dns_suffix):
+            time.sleep(0.1)
+            return DeviceV1({"id": device_id, "template": template.id})
+
+        device_provider.get_device = mock.MagicMock(side_effect=_get_device)
+        template_provider.get_device_template = mock.MagicMock(return_value=template)
+        path = str(tmp_path / "messages.rec")
+        recorder = MessageRecorder(path)
+        for index in range(4):
+            recorder.record(_build_message("dev{}".format(index % 2), index))
+        recorder.close()
+        handler = _build_handler(device_provider, template_provider)
+
+        result = replay_recording(path, handler.validate_message, drain=handler.drain)
+        handler.shutdown()
+
+        # every message waiting on a lookup was validated before the stats were returned
+        assert result["messages"] == 4
+        assert handler._summary.message_count == 4
+
+    def test_failed_lookup_is_retried(self, mocker, device_provider, template_provider, template):
+        device_provider.get_device = mock.MagicMock(
+            side_effect=[Exception("throttled"), DeviceV1({"id": "dev1", "template": template.id})]
+        )
+        template_provider.get_device_template = mock.MagicMock(return_value=template)
+        resolver = template_resolver.CentralTemplateResolver(device_provider, template_provider)
+        results = []
+
+        def _callback():
+            try:
+                results.append(resolver.get_template("dev1"))
+            except Exception as e:
+                results.append(e)
+
+        async def _resolve():
+            resolver.resolve("dev1", _callback)
+            await resolver.drain()
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(_resolve())
+        assert str(results[0]) == "throttled"
+        # the error is reported until the retry deadline, then the device is looked up again
+        assert resolver.is_resolved("dev1")
+        mocker.patch.object(
+            template_resolver,
+            "monotonic",
+            return_value=time.monotonic() + template_resolver.TEMPLATE_RESOLVER_RETRY_SECONDS,
+        )
+        assert not resolver.is_resolved("dev1")
+        loop.run_until_complete(_resolve())
+        resolver.shutdown()
+        loop.close()
+
+        assert results[1] is template
+        assert device_provider.get_device.call_count == 2
+
+    def test_cancelled_lookup(self, device_provider, template_provider):
+        release = threading.Event()
+        device_provider.get_device = mock.MagicMock(side_effect=lambda *args, **kwargs: release.wait(5))
+        resolver = template_resolver.CentralTemplateResolver(device_provider, template_provider)
+        callback = mock.MagicMock()
+
+        async def _cancel():
+            resolver.resolve("dev1", callback)
+            resolver._lookups["dev1"].cancel()
+            await resolver.drain()
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(asyncio.wait_for(_cancel(), 5))
+        release.set()
+        resolver.shutdown()
+        loop.close()
+
+        callback.assert_not_called()
+        assert not resolver.is_resolved("dev1")
@@ -0,0 +1,271 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import asyncio
+import pickle
+import pytest
+
+from queue import Queue
+from time import time
+from uamqp.message import Message
+from azext_iot.monitor import workers
+from azext_iot.monitor.checkpoint import (
+    CheckpointStore,
+    ENQUEUED_TIME_IDENTIFIER,
+    OFFSET_IDENTIFIER,
+    SEQUENCE_NUMBER_IDENTIFIER,
+)
+from azext_iot.monitor.handlers import CommonHandler
+from azext_iot.monitor.health import MonitorHealth
+from azext_iot.monitor.models.arguments import CommonHandlerArguments, CommonParserArguments
+from azext_iot.monitor.models.target import Target
+from azext_iot.monitor.parsers.common_parser import DEVICE_ID_IDENTIFIER
+from azext_iot.monitor.stats import MonitorStats
+
+
+def _build_message(device_id, offset):
+    return Message(
+        body='{{"offset": {}}}'.format(offset).encode(),
+        annotations={
+            DEVICE_ID_IDENTIFIER: device_id.encode(),
+            OFFSET_IDENTIFIER: str(offset).encode(),
+            SEQUENCE_NUMBER_IDENTIFIER: offset,
+            ENQUEUED_TIME_IDENTIFIER: int(time() * 1000),
+        },
+    )
+
+
+def _build_handler_args(device_id=""):
+    return CommonHandlerArguments(
+        output="json",
+        common_parser_args=CommonParserArguments(),
+        device_id=device_id,
+    )
+
+
+@pytest.fixture
+def target():
+    target = Target(hostname="hostname", path="path", partitions=["0", "1"], auth=None)
+    target.add_consumer_group("$Default")
+    return target
+
+
+class _FakeProcess:
+    def __init__(self, name, exitcode=0):
+        self.name = name
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return False
+
+
+class TestShardPartitions:
+    @pytest.mark.parametrize(
+        "partitions, worker_count, expected",
+        [
+            (["0", "1", "2", "3"], 2, [["0", "2"], ["1", "3"]]),
+            (["0", "1", "2", "3", "4"], 3, [["0", "3"], ["1", "4"], ["2"]]),
+            (["0", "1"], 4, [["0"], ["1"]]),
+            (["0", "1"], 1, [["0", "1"]]),
+            ([], 4, []),
+        ],
+    )
+    def test_shard_partitions(self, partitions, worker_count, expected):
+        shards = workers.shard_partitions(partitions, worker_count)
+
+        assert shards == expected
+        assert sorted(p for shard in shards for p in shard) == sorted(partitions)
+
+
+class TestWorkerChannel:
+    def test_worker_channel_units(self, target):
+        queue = Queue()
+        channel = workers.WorkerChannel(
+            queue=queue,
+            handler=CommonHandler(_build_handler_args(device_id="device1")),
+            checkpoints={"0": {"offset": "5"}},
+            collect_checkpoints=True,
+        )
+        kept = _build_message("device1", 10)
+        filtered = _build_message("device2", 11)
+
+        assert channel.get_checkpoint(target, "0") == {"offset": "5"}
+        assert channel.get_checkpoint(target, "1") is None
+
+        for message in (kept, filtered):
+            channel.record_message(("path", "0"), message)
+            channel.on_message_received(message)
+            channel.record_parse_time(0.001)
+            channel.update_checkpoint(target, "0", message)
+
+        first, second = queue.get_nowait(), queue.get_nowait()
+        assert queue.empty()
+
+        assert [item[0] for item in first] == ["stats", "event", "parse", "checkpoint"]
+        assert first[0][1:4] == (("path", "0"), "device1", len(b'{"offset": 10}'))
+        assert first[1][1]["event"]["origin"] == "device1"
+        assert first[3] == (
+            "checkpoint",
+            "0",
+            {"offset": "10", "sequenceNumber": 10, "enqueuedTime": kept.annotations[ENQUEUED_TIME_IDENTIFIER]},
+        )
+        # filtered out events are not sent, their checkpoint still is
+        assert [item[0] for item in second] == ["stats", "parse", "checkpoint"]
+
+    def test_worker_channel_without_checkpoints(self, target):
+        queue = Queue()
+        channel = workers.WorkerChannel(
+            queue=queue, handler=CommonHandler(_build_handler_args())
+        )
+        channel.on_batch_received([_build_message("device1", 1), _build_message("device1", 2)])
+        channel.update_checkpoint(target, "0", _build_message("device1", 2))
+        channel.update_checkpoint(target, "0", _build_message("device1", 3))
+
+        unit = queue.get_nowait()
+        assert [item[0] for item in unit] == ["event", "event"]
+        assert queue.empty()
+
+
+class TestMergeWorkerResults:
+    def test_merge_worker_results(self, tmp_path, target):
+        queue = Queue()
+        queue.put([
+            ("stats", ("path", "0"), "device1", 10, 5.0),
+            ("event", {"event": 1}),
+            ("parse", 0.002, 1),
+            ("checkpoint", "0", {"offset": "1"}),
+        ])
+        queue.put([("stats", ("path", "1"), "device2", 20, None), ("event", {"event": 2})])
+        queue.put([("event", {"event": 3}), ("checkpoint", "1", {"offset": "7"}), ("done",)])
+        queue.put([("error", "link detached"), ("done",)])
+
+        emitted = []
+        checkpoint_store = CheckpointStore(str(tmp_path), flush_interval=60)
+        stats = MonitorStats()
+        errors = asyncio.new_event_loop().run_until_complete(
+            workers.merge_worker_results(
+                queue=queue,
+                processes=[_FakeProcess("worker-0"), _FakeProcess("worker-1")],
+                emit=emitted.append,
+                target=target,
+                checkpoint_store=checkpoint_store,
+                stats=stats,
+            )
+        )
+
+        assert emitted == [{"event": 1}, {"event": 2}, {"event": 3}]
+        assert errors == ["link detached"]
+        assert checkpoint_store.get_checkpoint(target, "0") == {"offset": "1"}
+        assert checkpoint_store.get_checkpoint(target, "1") == {"offset": "7"}
+
+        summary = stats.summary()
+        assert summary["totalMessages"] == 2
+        assert summary["partitions"]["0"]["latencyMs"]["count"] == 1
+        assert summary["partitions"]["1"]["latencyMs"]["count"] == 0
+        assert summary["devices"]["device2"]["messages"] == 1
+        assert summary["parseTimeUs"]["count"] == 1
+
+    def test_merge_worker_results_health(self, target):
+        queue = Queue()
+        channel = workers.WorkerChannel(queue=queue, handler=None)
+        channel.connected(("path", "0"))
+        channel.disconnected(("path", "0"), RuntimeError("link detached"))
+        channel.connected(("path", "0"))
+        channel.closed(("path", "0"))
+        queue.put([("done",)])
+
+        health = MonitorHealth()
+        asyncio.new_event_loop().run_until_complete(
+            workers.merge_worker_results(
+                queue=queue,
+                processes=[_FakeProcess("worker-0")],
+                emit=None,
+                target=target,
+                health=health,
+            )
+        )
+
+        summary = health.summary()["partitions"]["0"]
+        assert (summary["state"], summary["connects"], summary["reconnects"]) == ("closed", 2, 1)
+        assert summary["lastError"] == "link detached"
+
+    def test_merge_worker_results_crashed_worker(self, target):
+        errors = asyncio.new_event_loop().run_until_complete(
+            workers.merge_worker_results(
+                queue=Queue(),
+                processes=[_FakeProcess("worker-0", exitcode=1)],
+                emit=None,
+                target=target,
+            )
+        )
+
+        assert errors == ["Monitor worker worker-0 exited with code 1"]
+
+
+class TestRunWorker:
+    def test_run_worker(self, mocker):
+        mocker.patch("azext_iot.monitor.workers.signal.signal")
+        messages = [_build_message("device1", 1), _build_message("device1", 2)]
+        monitored = {}
+
+        async def _initiate_event_monitor(target, on_message_received, checkpoint_store, stats, **kwargs):
+            monitored["target"] = target
+            for message in messages:
+                stats.record_message((target.path, target.partitions[0]), message)
+                on_message_received(message)
+                checkpoint_store.update_checkpoint(target, target.partitions[0], message)
+            return [RuntimeError("link detached")]
+
+        mocker.patch(
+            "azext_iot.monitor.telemetry._initiate_event_monitor", _initiate_event_monitor
+        )
+
+        spec = workers.WorkerSpec(
+            target_config={
+                "policy": "iothubowner",
+                "primarykey": "a2V5",
+                "events": {"endpoint": "endpoint", "path": "path", "partition_ids": ["0", "1", "2"]},
+            },
+            consumer_group="group",
+            partitions=["1"],
+            checkpoints={},
+            enqueued_time_utc=0,
+            handler_args=_build_handler_args(),
+            collect_stats=True,
+            collect_checkpoints=True,
+        )
+        # the spec is sent to a spawned process
+        spec = pickle.loads(pickle.dumps(spec))
+        queue = Queue()
+        workers.run_worker(spec, queue)
+
+        target = monitored["target"]
+        assert (target.hostname, target.path, target.partitions) == ("endpoint", "path", ["1"])
+        assert target.consumer_group == "group"
+        assert target.auth is not None
+
+        units = [queue.get_nowait() for _ in range(3)]
+        assert queue.empty()
+        assert [item[0] for item in units[0]] == ["stats", "event", "checkpoint"]
+        assert units[1][2] == ("checkpoint", "1", mocker.ANY)
+        assert units[2] == [("error", "link detached"), ("done",)]
+
+    def test_worker_target_config(self, mocker):
+        target_config = {
+            "cmd": mocker.MagicMock(),
+            "cs": "HostName=hub;SharedAccessKeyName=iothubowner;SharedAccessKey=a2V5",
+            "entity": "hub",
+            "policy": "iothubowner",
+            "primarykey": "a2V5",
+            "secondarykey": "a2V5",
+            "events": {"endpoint": "endpoint", "path": "path", "partition_ids": ["0"]},
+        }
+
+        assert workers._get_worker_target_config(target_config) == {
+            "policy": "iothubowner",
+            "primarykey": "a2V5",
+            "events": {"endpoint": "endpoint", "path": "path", "partition_ids": ["0"]},
+        }
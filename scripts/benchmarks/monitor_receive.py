@@ -0,0 +1,147 @@
+# coding=utf-8
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Receive loop throughput benchmark for the event monitor.
+
+Runs azext_iot.monitor.telemetry against a local stand-in for uamqp.ReceiveClientAsync so that
+receive modes can be compared without a live IoT Hub. The stand-in models an AMQP link where
+each network round trip (do_work) takes a fixed latency and transfers at most the outstanding
+link credit, capped at a per-read frame burst. Results are reported as messages/sec per partition.
+
+Usage:
+    python scripts/benchmarks/monitor_receive.py [--messages 20000] [--partitions 4] [--latency-ms 0.5]
+"""
+
+import argparse
+import asyncio
+import time
+
+from collections import deque
+from unittest import mock
+
+import uamqp
+from azext_iot.monitor import telemetry
+from azext_iot.monitor.models.target import Target
+
+# uamqp replaces a falsy prefetch with this link credit
+UAMQP_DEFAULT_PREFETCH = 300
+
+
+class StandInReceiveClient:
+    """Mimics the parts of uamqp.ReceiveClientAsync used by the monitor."""
+
+    messages_per_partition = 0
+    latency = 0.0
+    frame_burst = 0
+
+    def __init__(self, source, prefetch=None, timeout=0, **kwargs):
+        self._credit = prefetch or UAMQP_DEFAULT_PREFETCH
+        self._remaining = self.messages_per_partition
+        self._queue = deque()
+        self.round_trips = 0
+
+    async def open_async(self, connection=None):
+        pass
+
+    async def close_async(self):
+        pass
+
+    async def _do_work(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        count = min(self._credit - len(self._queue), self.frame_burst, self._remaining)
+        self._remaining -= count
+        self._queue.extend(uamqp.Message(body=b"{}") for _ in range(max(count, 0)))
+        return bool(self._queue) or self._remaining > 0
+
+    async def receive_messages_iter_async(self):
+        while True:
+            # uamqp re-checks the client state before every message
+            await self.open_async()
+            while not self._queue:
+                if not await self._do_work():
+                    return
+            yield self._queue.popleft()
+
+    async def receive_message_batch_async(self, max_batch_size=None, timeout=0):
+        if not self._queue:
+            await self._do_work()
+        batch = []
+        while self._queue and len(batch) < max_batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+
+class StandInConnection:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *args):
+        pass
+
+
+def run(scenario, messages, partitions):
+    prefetch, batch_size = scenario
+    received = {"count": 0}
+
+    def on_message(_):
+        received["count"] += 1
+
+    def on_batch(batch):
+        received["count"] += len(batch)
+
+    target = Target(
+        hostname="localhost", path="standin", partitions=[str(p) for p in range(partitions)], auth=None
+    )
+    target.add_consumer_group("$Default")
+
+    with mock.patch.object(telemetry.uamqp, "ReceiveClientAsync", StandInReceiveClient), mock.patch.object(
+        telemetry.uamqp, "ConnectionAsync", StandInConnection
+    ), mock.patch("builtins.print"):
+        start = time.perf_counter()
+        telemetry.start_multiple_monitors(
+            targets=[target],
+            on_start_string="",
+            enqueued_time_utc=0,
+            on_message_received=on_message,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            on_batch_received=on_batch,
+        )
+        elapsed = time.perf_counter() - start
+
+    assert received["count"] == messages * partitions
+    return messages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000, help="Messages per partition.")
+    parser.add_argument("--partitions", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Simulated round trip per network read.")
+    parser.add_argument("--frame-burst", type=int, default=256, help="Max messages transferred per network read.")
+    args = parser.parse_args()
+
+    StandInReceiveClient.messages_per_partition = args.messages
+    StandInReceiveClient.latency = args.latency_ms / 1000
+    StandInReceiveClient.frame_burst = args.frame_burst
+
+    scenarios = [
+        ("prefetch=1 (iterator)", (1, None)),
+        ("prefetch=0 (iterator, previous default)", (None, None)),
+        ("prefetch=1000, batch-size=500", (1000, 500)),
+    ]
+    print("{:<42} {:>22}".format("mode", "msgs/sec/partition"))
+    for name, scenario in scenarios:
+        print("{:<42} {:>22,.0f}".format(name, run(scenario, args.messages, args.partitions)))
+
+
+if __name__ == "__main__":
+    main()